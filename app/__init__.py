@@ -7,9 +7,23 @@ from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
+from app.utils.assets import init_assets
+from app.utils.compression import init_compression
+from app.utils.engine import (configure_engine_options, dispose_engines,
+                              enable_sqlite_foreign_keys, install_fork_guard,
+                              install_statement_timeout)
+from app.utils.fragment_cache import FragmentCacheExtension, fragment_cache
+from app.utils.log_queue import install_log_queue
+from app.utils.logger import (JsonFormatter, TextFormatter,
+                              init_request_logging)
+from app.utils.money import format_money
+from app.utils.query_stats import init_query_stats
+from app.utils.replica import RoutingSession
+from app.utils.slow_queries import slow_query_recorder
+from app.utils.template_cache import init_template_cache
 from config import DevelopmentConfig, ProductionConfig
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login = LoginManager()
 login.login_view = 'auth.login'  # type: ignore
 migrate = Migrate()
@@ -26,15 +40,18 @@ def create_app(
     app.logger.handlers.clear()
 
     # Configure logging
+    if app.config['LOG_JSON']:
+        log_formatter = JsonFormatter()
+    else:
+        log_formatter = TextFormatter(app.config['LOG_FORMAT'])
+
     # Always set up console handler for development
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(
-        logging.Formatter(app.config['LOG_FORMAT'])
-    )
+    console_handler.setFormatter(log_formatter)
     console_handler.setLevel(
         getattr(logging, app.config['LOG_LEVEL'])
     )
-    app.logger.addHandler(console_handler)
+    log_handlers = [console_handler]
 
     # File handler for production and when not in debug mode
     if not app.debug and not app.testing:
@@ -46,27 +63,57 @@ def create_app(
             maxBytes=10240000,
             backupCount=10
         )
-        file_handler.setFormatter(
-            logging.Formatter(app.config['LOG_FORMAT'])
-        )
+        file_handler.setFormatter(log_formatter)
         file_handler.setLevel(
             getattr(logging, app.config['LOG_LEVEL'])
         )
-        app.logger.addHandler(file_handler)
+        log_handlers.append(file_handler)
+
+    # Keep log I/O (and rotations) out of the request threads
+    if app.config['LOG_QUEUE_SIZE']:
+        install_log_queue(
+            app.logger, log_handlers, app.config['LOG_QUEUE_SIZE'])
+    else:
+        for handler in log_handlers:
+            app.logger.addHandler(handler)
+    init_request_logging(app)
 
     app.logger.setLevel(getattr(logging, app.config['LOG_LEVEL']))
     app.logger.info('ClientEase startup')
 
+    configure_engine_options(app)
     db.init_app(app)
     migrate.init_app(app, db)
     login.init_app(app)
-    
+    init_query_stats(app)
+    slow_query_recorder.configure(app)
+    from app.utils.audit import audit_buffer
+    audit_buffer.configure(app)
+
     # Register CLI commands (import here to avoid circular imports)
-    from app.commands import seed_db
+    from app.commands import (archive_settled_invoices, compress_static,
+                              partitions, precompile_templates,
+                              purge_deleted_rows, reconcile_summaries,
+                              seed_db, slow_queries)
     app.cli.add_command(seed_db)
+    app.cli.add_command(slow_queries)
+    app.cli.add_command(purge_deleted_rows)
+    app.cli.add_command(archive_settled_invoices)
+    app.cli.add_command(reconcile_summaries)
+    app.cli.add_command(partitions)
+    app.cli.add_command(compress_static)
+    app.cli.add_command(precompile_templates)
 
     # Test database connection at startup
     with app.app_context():
+        for engine in db.engines.values():
+            install_fork_guard(engine)
+            if engine.dialect.name == 'sqlite':
+                enable_sqlite_foreign_keys(engine)
+            if (app.config.get('PGBOUNCER') == 'transaction'
+                    and app.config['DB_STATEMENT_TIMEOUT_MS']):
+                install_statement_timeout(
+                    engine, app.config['DB_STATEMENT_TIMEOUT_MS'])
         try:
             # Try to execute a simple query to test connection
             with db.engine.connect() as connection:
@@ -78,8 +125,12 @@ def create_app(
                 f"Failed to connect to PostgreSQL database: {e}. "
                 "Please check your DATABASE_URL configuration."
             ) from e
+        # Don't keep the startup connection around: with gunicorn's
+        # preload_app the master would otherwise hand it to every worker.
+        dispose_engines(db)
 
     from app.admin import bp as admin_bp
+    from app.api import bp as api_bp
     from app.auth import bp as auth_bp
     from app.client import bp as client_bp
     from app.invoice import bp as invoice_bp
@@ -92,6 +143,14 @@ def create_app(
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(invoice_bp)
+    app.register_blueprint(api_bp)
+
+    app.add_template_filter(format_money, 'money')
+    fragment_cache.configure(app)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    init_template_cache(app)
+    init_assets(app)
+    init_compression(app)
 
     # Register error handlers
     @app.errorhandler(403)
@@ -1,8 +1,14 @@
+import os
+
+import sqlalchemy as sa
+
 from app import db
-from app.models import User
+from app.models import AuditEvent, User
+from app.utils.db import keyset_page
 from app.utils.decorators import admin_only
+from app.utils.slow_queries import slow_query_recorder
 from app.admin import bp
-from flask import request, render_template
+from flask import current_app, request, render_template
 
 
 # FUTURE: Implement the CRUD routes for the Role model
@@ -16,3 +22,42 @@ def user_list():
     per_page = 10
     users = User.query.paginate(page=page, per_page=per_page, error_out=False)
     return render_template('admin/users.html', users=users)
+
+
+# View the slow query table of the worker handling this request
+@bp.route('/slow-queries')
+@admin_only
+def slow_queries():
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in ('total_ms', 'mean_ms', 'calls'):
+        sort = 'total_ms'
+    return render_template(
+        'admin/slow_queries.html',
+        rows=slow_query_recorder.top(sort=sort),
+        sort=sort,
+        threshold_ms=current_app.config['SLOW_QUERY_THRESHOLD_MS'],
+        pid=os.getpid()
+    )
+
+
+# Page through the audit history, newest first
+@bp.route('/audit')
+@admin_only
+def audit_events():
+    filters = {
+        'action': request.args.get('action') or None,
+        'user_id': request.args.get('user_id', type=int),
+    }
+    stmt = sa.select(AuditEvent).filter_by(
+        **{name: value for name, value in filters.items()
+           if value is not None})
+    events, next_after = keyset_page(
+        stmt, AuditEvent.id,
+        after=request.args.get('after', type=int),
+        per_page=current_app.config['AUDIT_EVENTS_PER_PAGE'])
+    return render_template(
+        'admin/audit_events.html',
+        events=events,
+        next_after=next_after,
+        filters=filters,
+    )
@@ -0,0 +1,7 @@
+from flask import Blueprint
+
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+from app.api import api_routes  # noqa
@@ -0,0 +1,11 @@
+from flask_wtf import FlaskForm
+
+from app.invoice.inv_forms import InvoiceForm
+
+
+class InvoiceUpdateForm(FlaskForm):
+    """The fields of an invoice the API updates in bulk; lines are edited
+    one invoice at a time."""
+    date = InvoiceForm.date
+    description = InvoiceForm.description
+    status = InvoiceForm.status
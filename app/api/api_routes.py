@@ -0,0 +1,477 @@
+"""
+Versioned JSON API for clients, projects and invoices.
+
+Lists are paged by id, newest first: pass the ``after`` value of a response
+back as ``?after=`` to get the next page. ``?fields=name,email`` selects
+only those columns (the id is always included). Creates and updates take a
+JSON array of up to ``API_MAX_BULK_ROWS`` objects, validated with the forms
+of the HTML pages, and write all of them in one transaction with one
+multi-row INSERT or batched UPDATE. The API uses the session of the logged
+in user; writes must be sent as ``application/json``, which browsers only
+send cross-site after a CORS preflight.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import abort, current_app, request
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+
+from app import db
+from app.api import bp
+from app.api.api_forms import InvoiceUpdateForm
+from app.client.client_forms import (CreateClientForm, UpdateClientForm,
+                                     live_client_emails)
+from app.invoice.inv_forms import InvoiceForm
+from app.models import Client, Invoice, InvoiceLine, Project
+from app.models.project_models import InvoiceStatus
+from app.project.prj_forms import ProjectForm
+from app.utils.db import (filter_by_balance, get_owned_or_404, keyset_page,
+                          search_in_query)
+from app.utils.invoice_lines import line_rows, line_totals
+from app.utils.summaries import apply_deltas, combine, invoice_delta
+
+SUMMARY_FIELDS = (
+    'invoice_count', 'invoiced_total', 'paid_total', 'outstanding_total')
+CLIENT_FIELDS = ('id', 'name', 'email', 'phone', 'address', 'created_at',
+                 'updated_at') + SUMMARY_FIELDS
+PROJECT_FIELDS = ('id', 'title', 'description', 'start_date', 'end_date',
+                  'client_id', 'updated_at') + SUMMARY_FIELDS
+INVOICE_FIELDS = ('id', 'date', 'description', 'status', 'project_id',
+                  'client_id', 'currency', 'subtotal_cents', 'tax_cents',
+                  'amount_cents', 'updated_at')
+
+
+@bp.before_request
+def before_request():
+    """Only verified users can use the API."""
+    if not current_user.is_authenticated:
+        abort(401)
+    if not current_user.email_verified:
+        abort(403, 'Verify your email address to use the API')
+
+
+# 403 and 404 are named, or the application's HTML pages for them would
+# take precedence
+@bp.errorhandler(HTTPException)
+@bp.errorhandler(403)
+@bp.errorhandler(404)
+def http_error(error):
+    return {'error': error.description}, error.code
+
+
+@bp.errorhandler(IntegrityError)
+def integrity_error(error):
+    db.session.rollback()
+    return {'error': 'The rows conflict with existing data, e.g. a '
+                     'duplicate email'}, 409
+
+
+def _fields(allowed: tuple) -> list[str]:
+    """The columns named by the "fields" request argument, id first."""
+    requested = request.args.get('fields')
+    if not requested:
+        return list(allowed)
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = set(names) - set(allowed)
+    if unknown:
+        abort(400, f'Unknown fields: {", ".join(sorted(unknown))}')
+    return ['id'] + [name for name in dict.fromkeys(names) if name != 'id']
+
+
+def _load_only(model, fields):
+    return so.load_only(*(getattr(model, name) for name in fields))
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _to_json(row, fields) -> dict:
+    return {name: _json_value(getattr(row, name)) for name in fields}
+
+
+def _list(model, allowed, stmt):
+    """One page of the rows selected by ``stmt``, with the requested
+    fields."""
+    fields = _fields(allowed)
+    per_page = request.args.get(
+        'per_page', default=current_app.config['API_PER_PAGE'], type=int)
+    rows, after = keyset_page(
+        stmt.options(_load_only(model, fields)), model.id,
+        after=request.args.get('after', type=int),
+        per_page=max(min(per_page, current_app.config['API_MAX_PER_PAGE']),
+                     1))
+    return {'data': [_to_json(row, fields) for row in rows], 'after': after}
+
+
+def _detail(model, allowed, ident):
+    fields = _fields(allowed)
+    row = get_owned_or_404(model, ident, _load_only(model, fields))
+    return {'data': _to_json(row, fields)}
+
+
+def _json_rows() -> list[dict]:
+    """The array of objects sent to a bulk endpoint."""
+    if not request.is_json:
+        abort(415, 'Send the rows as application/json')
+    rows = request.get_json(silent=True)
+    if (not isinstance(rows, list) or not rows
+            or not all(isinstance(row, dict) for row in rows)):
+        abort(400, 'Expected a non-empty JSON array of objects')
+    if len(rows) > current_app.config['API_MAX_BULK_ROWS']:
+        abort(413, f'At most {current_app.config["API_MAX_BULK_ROWS"]} '
+                   'rows per request')
+    return rows
+
+
+def _formdata(row: dict, prefix: str = '') -> list[tuple]:
+    """Flatten a JSON object into form fields, with arrays of objects named
+    like the entries of a ``FieldList``."""
+    pairs = []
+    for key, value in row.items():
+        if isinstance(value, list):
+            for index, entry in enumerate(value):
+                if isinstance(entry, dict):
+                    pairs += _formdata(entry, f'{prefix}{key}-{index}-')
+        elif value is not None:
+            pairs.append((prefix + key, str(value)))
+    return pairs
+
+
+def _validate(form_class, rows, data=None, prepare=None):
+    """
+    Validate each row with ``form_class``.
+
+    Args:
+        form_class (FlaskForm): The form validating one row.
+        rows (list[dict]): The rows sent.
+        data (list[dict], optional): Current values of the fields the rows
+            leave out, for updates.
+        prepare (Callable, optional): Called with each form and the index
+            of its row before it is validated, e.g. to set the choices of
+            its select fields.
+
+    Returns:
+        tuple[list, dict]: The forms, and the errors of the invalid rows by
+            index.
+    """
+    forms, errors = [], {}
+    for index, row in enumerate(rows):
+        form = form_class(
+            formdata=MultiDict(_formdata(row)),
+            data=data[index] if data else None, meta={'csrf': False})
+        if prepare is not None:
+            prepare(form, index)
+        if not form.validate():
+            errors[index] = form.errors
+        forms.append(form)
+    return forms, errors
+
+
+def _owned_ids(model, ids) -> set:
+    """The ids among ``ids`` of live rows owned by the current user."""
+    ids = {ident for ident in ids if isinstance(ident, int)}
+    if not ids:
+        return set()
+    return set(db.session.scalars(
+        sa.select(model.id)
+        .where(model.id.in_(ids), model.user_id == current_user.id,
+               model.live())))
+
+
+def _owned_rows(model, rows) -> list:
+    """The live rows owned by the current user that ``rows`` update, in
+    order; aborts with 404 if any of them is missing."""
+    ids = [row.get('id') for row in rows]
+    if (not all(isinstance(ident, int) for ident in ids)
+            or len(set(ids)) != len(ids)):
+        abort(400, 'Every row needs a distinct integer "id"')
+    found = {obj.id: obj for obj in db.session.scalars(
+        sa.select(model)
+        .where(model.id.in_(ids), model.user_id == current_user.id,
+               model.live()))}
+    missing = [ident for ident in ids if ident not in found]
+    if missing:
+        abort(404, f'Not found: {", ".join(map(str, missing))}')
+    return [found[ident] for ident in ids]
+
+
+def _insert(model, values: list[dict]):
+    """Insert ``values`` in one statement and return their ids, in order."""
+    return db.session.scalars(
+        sa.insert(model).returning(model.id, sort_by_parameter_order=True),
+        values).all()
+
+
+def _created(ids):
+    return {'data': [{'id': ident} for ident in ids]}, 201
+
+
+def _updated(objs):
+    return {'data': [{'id': obj.id} for obj in objs]}
+
+
+@bp.route('/clients', methods=['GET'])
+def list_clients():
+    stmt = search_in_query(
+        query=sa.select(Client).where(
+            Client.user_id == current_user.id, Client.live()),
+        request=request,
+        fields=(Client.name, Client.email, Client.phone, Client.address))
+    return _list(Client, CLIENT_FIELDS,
+                 filter_by_balance(stmt, request, Client))
+
+
+@bp.route('/clients/<int:client_id>', methods=['GET'])
+def get_client(client_id):
+    return _detail(Client, CLIENT_FIELDS, client_id)
+
+
+def _client_values(form) -> dict:
+    return {'name': form.name.data, 'email': form.email.data.lower(),
+            'phone': form.phone.data, 'address': form.address.data}
+
+
+def _validate_clients(form_class, rows, clients=None):
+    """Validate client rows, checking their emails against the live
+    clients with one query and against each other."""
+    taken = live_client_emails(
+        str(row['email']).lower() for row in rows if row.get('email'))
+
+    data = None
+    if clients is not None:
+        data = [{name: getattr(client, name)
+                 for name in ('name', 'email', 'phone', 'address')}
+                for client in clients]
+
+    def prepare(form, index):
+        form.taken_emails = taken
+        if clients is not None:
+            form.client_id = clients[index].id
+
+    forms, errors = _validate(form_class, rows, data=data, prepare=prepare)
+    seen = set()
+    for index, form in enumerate(forms):
+        email = (form.email.data or '').lower()
+        if email in seen:
+            errors.setdefault(index, {})['email'] = [
+                'Another row uses this email.']
+        seen.add(email)
+    return forms, errors
+
+
+@bp.route('/clients', methods=['POST'])
+def create_clients():
+    rows = _json_rows()
+    forms, errors = _validate_clients(CreateClientForm, rows)
+    if errors:
+        return {'errors': errors}, 422
+    ids = _insert(Client, [
+        {**_client_values(form), 'user_id': current_user.id}
+        for form in forms])
+    db.session.commit()
+    return _created(ids)
+
+
+@bp.route('/clients', methods=['PATCH'])
+def update_clients():
+    rows = _json_rows()
+    clients = _owned_rows(Client, rows)
+    forms, errors = _validate_clients(UpdateClientForm, rows, clients)
+    if errors:
+        return {'errors': errors}, 422
+    db.session.execute(sa.update(Client), [
+        {'id': client.id, **_client_values(form)}
+        for client, form in zip(clients, forms)])
+    db.session.commit()
+    return _updated(clients)
+
+
+@bp.route('/projects', methods=['GET'])
+def list_projects():
+    stmt = search_in_query(
+        query=sa.select(Project).where(
+            Project.user_id == current_user.id, Project.live()),
+        request=request,
+        fields=(Project.title, Project.description))
+    stmt = filter_by_balance(stmt, request, Project)
+    client_id = request.args.get('client_id', type=int)
+    if client_id:
+        stmt = stmt.where(Project.client_id == client_id)
+    return _list(Project, PROJECT_FIELDS, stmt)
+
+
+@bp.route('/projects/<int:prj_id>', methods=['GET'])
+def get_project(prj_id):
+    return _detail(Project, PROJECT_FIELDS, prj_id)
+
+
+def _project_values(form) -> dict:
+    return {'title': form.title.data, 'description': form.description.data,
+            'start_date': form.start_date.data,
+            'end_date': form.end_date.data}
+
+
+def _client_field(row: dict) -> dict:
+    # The form names the client field "client"
+    row = dict(row)
+    if 'client_id' in row:
+        row['client'] = row.pop('client_id')
+    return row
+
+
+@bp.route('/projects', methods=['POST'])
+def create_projects():
+    rows = [_client_field(row) for row in _json_rows()]
+    client_ids = _owned_ids(Client, [row.get('client') for row in rows])
+
+    def choices(form, index):
+        form.client.choices = [(ident, ident) for ident in client_ids]
+
+    forms, errors = _validate(ProjectForm, rows, prepare=choices)
+    if errors:
+        return {'errors': errors}, 422
+    ids = _insert(Project, [
+        {**_project_values(form), 'client_id': int(form.client.data),
+         'user_id': current_user.id}
+        for form in forms])
+    db.session.commit()
+    return _created(ids)
+
+
+@bp.route('/projects', methods=['PATCH'])
+def update_projects():
+    rows = [_client_field(row) for row in _json_rows()]
+    projects = _owned_rows(Project, rows)
+
+    def choices(form, index):
+        # Moving a project to another client is not supported
+        client_id = projects[index].client_id
+        form.client.choices = [(client_id, client_id)]
+
+    forms, errors = _validate(ProjectForm, rows, data=[
+        {'title': project.title, 'description': project.description,
+         'start_date': project.start_date, 'end_date': project.end_date,
+         'client': project.client_id}
+        for project in projects], prepare=choices)
+    if errors:
+        return {'errors': errors}, 422
+    db.session.execute(sa.update(Project), [
+        {'id': project.id, **_project_values(form)}
+        for project, form in zip(projects, forms)])
+    db.session.commit()
+    return _updated(projects)
+
+
+@bp.route('/invoices', methods=['GET'])
+def list_invoices():
+    stmt = search_in_query(
+        query=sa.select(Invoice).where(
+            Invoice.user_id == current_user.id, Invoice.live()),
+        request=request,
+        fields=(Invoice.description,))
+    for name in ('project_id', 'client_id'):
+        ident = request.args.get(name, type=int)
+        if ident:
+            stmt = stmt.where(getattr(Invoice, name) == ident)
+    status = request.args.get('status')
+    if status:
+        try:
+            stmt = stmt.where(Invoice.status == InvoiceStatus(status))
+        except ValueError:
+            abort(400, f'Unknown status: {status}')
+    return _list(Invoice, INVOICE_FIELDS, stmt)
+
+
+@bp.route('/invoices/<int:id>', methods=['GET'])
+def get_invoice(id):
+    return _detail(Invoice, INVOICE_FIELDS, id)
+
+
+@bp.route('/invoices', methods=['POST'])
+def create_invoices():
+    rows = _json_rows()
+    project_ids = {row.get('project_id') for row in rows
+                   if isinstance(row.get('project_id'), int)}
+    # Client of each owned project
+    projects = dict(db.session.execute(
+        sa.select(Project.id, Project.client_id)
+        .where(Project.id.in_(project_ids),
+               Project.user_id == current_user.id, Project.live())).all())
+    forms, errors = _validate(InvoiceForm, rows)
+    for index, row in enumerate(rows):
+        project_id = row.get('project_id')
+        if not isinstance(project_id, int) or project_id not in projects:
+            errors.setdefault(index, {})['project_id'] = ['Project not found']
+    if errors:
+        return {'errors': errors}, 422
+
+    invoices, lines = [], []
+    for row, form in zip(rows, forms):
+        entries = line_rows(None, form.lines.data)
+        subtotal, tax = line_totals(entries)
+        invoices.append({
+            'date': form.date.data,
+            'description': form.description.data,
+            'status': InvoiceStatus(form.status.data),
+            'currency': current_user.currency,
+            'subtotal_cents': subtotal,
+            'tax_cents': tax,
+            'amount_cents': subtotal + tax,
+            'project_id': row['project_id'],
+            'client_id': projects[row['project_id']],
+            'user_id': current_user.id,
+        })
+        lines.append(entries)
+    ids = _insert(Invoice, invoices)
+    db.session.execute(sa.insert(InvoiceLine), [
+        {**entry, 'invoice_id': ident}
+        for ident, entries in zip(ids, lines) for entry in entries])
+    apply_deltas(
+        (invoice_delta(invoice['amount_cents'], invoice['status']),
+         invoice['project_id'], invoice['client_id'])
+        for invoice in invoices)
+    db.session.commit()
+    return _created(ids)
+
+
+@bp.route('/invoices', methods=['PATCH'])
+def update_invoices():
+    rows = _json_rows()
+    invoices = _owned_rows(Invoice, rows)
+    forms, errors = _validate(InvoiceUpdateForm, rows, data=[
+        {'date': invoice.date, 'description': invoice.description,
+         'status': invoice.status.value}
+        for invoice in invoices])
+    if errors:
+        return {'errors': errors}, 422
+
+    values, changes = [], []
+    for invoice, form in zip(invoices, forms):
+        status = InvoiceStatus(form.status.data)
+        values.append({'id': invoice.id, 'date': form.date.data,
+                       'description': form.description.data,
+                       'status': status})
+        if status is not invoice.status:
+            changes.append((
+                combine(
+                    invoice_delta(invoice.amount_cents, invoice.status, -1),
+                    invoice_delta(invoice.amount_cents, status)),
+                invoice.project_id, invoice.client_id))
+    db.session.execute(sa.update(Invoice), values)
+    apply_deltas(changes)
+    db.session.commit()
+    return _updated(invoices)
@@ -1,11 +1,15 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, BooleanField
+from wtforms import (BooleanField, PasswordField, SelectField, StringField,
+                     SubmitField)
 from wtforms.validators import DataRequired, Email, EqualTo
 
 from flask import current_app
 import re
 from wtforms import ValidationError
 
+from app.utils.money import CURRENCIES, DEFAULT_CURRENCY
+
+
 def validate_password(form, field):
     min_length = current_app.config.get('USER_PASSWORD_LENGTH', 8)
 
@@ -29,6 +33,10 @@ class RegistrationForm(FlaskForm):
     confirm_password = PasswordField(
         'Confirm Password', validators=[DataRequired(), EqualTo('password')]
     )
+    # Every invoice of the account is issued in this currency
+    currency = SelectField(
+        'Currency', choices=[(code, code) for code in CURRENCIES],
+        default=DEFAULT_CURRENCY, validators=[DataRequired()])
     submit = SubmitField('Sign Up')
 
 
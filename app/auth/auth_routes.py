@@ -9,6 +9,7 @@ from app.auth.auth_emails import (send_reset_password_email,
 from app.auth.auth_forms import (ForgotPasswordForm, LoginForm,
                                  RegistrationForm, ResetPasswordForm)
 from app.models import User
+from app.utils.audit import audit
 from app.utils.logger import log_info, log_warning, log_security_event, log_user_action
 
 
@@ -31,6 +32,7 @@ def login():
                 ip_address=request.remote_addr,
                 email=form.email.data
             )
+            audit('login_failed', email=form.email.data)
             return redirect(url_for('auth.login'))
 
         login_user(user, remember=form.remember_me.data)
@@ -40,6 +42,7 @@ def login():
             email=user.email,
             ip_address=request.remote_addr
         )
+        audit('login_successful')
 
         # Redirect based on email verification status
         if user.email_verified:
@@ -64,6 +67,7 @@ def register():
         user.first_name = form.first_name.data
         user.last_name = form.last_name.data
         user.email = form.email.data.lower()
+        user.currency = form.currency.data
         # set the password for the user
         user.set_password(form.password.data)
         # add the user to the database
@@ -80,6 +84,7 @@ def register():
             email=user.email,
             ip_address=request.remote_addr
         )
+        audit('user_registered')
 
         # flash a message to the user
         flash(
@@ -104,6 +109,7 @@ def logout():
             email=current_user.email,
             ip_address=request.remote_addr
         )
+        audit('logout')
         logout_user()
     return redirect(url_for('main.index'))
 
@@ -150,6 +156,8 @@ def reset_password(token):
     if form.validate_on_submit():
         # set the password for the user
         user.set_password(form.password.data)
+        # Written with the new password: a reset must never go unaudited
+        audit('password_reset', user, critical=True, user_id=user.id)
         # add the user to the database
         db.session.commit()
         # flash a message to the user
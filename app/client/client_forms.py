@@ -1,7 +1,29 @@
+import sqlalchemy as sa
 from flask_wtf import FlaskForm
-from wtforms import StringField, SubmitField
+from wtforms import StringField, SubmitField, ValidationError
 from wtforms.validators import DataRequired, Email, Length, Optional
 
+from app import db
+from app.models import Client
+
+
+def live_client_emails(emails) -> dict:
+    """
+    Look up which of ``emails`` live clients already use.
+
+    Args:
+        emails (Iterable[str]): Lowercase email addresses.
+
+    Returns:
+        dict: Each email in use mapped to the id of its client.
+    """
+    emails = set(emails)
+    if not emails:
+        return {}
+    return dict(db.session.execute(
+        sa.select(Client.email, Client.id)
+        .where(Client.email.in_(emails), Client.live())).all())
+
 
 class CreateClientForm(FlaskForm):
     name = StringField('Name', validators=[DataRequired(), Length(max=100)])
@@ -11,6 +33,22 @@ class CreateClientForm(FlaskForm):
     address = StringField('Address', validators=[Optional()])
     submit = SubmitField('Add Client')
 
+    def __init__(self, *args, client_id=None, taken_emails=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The client being edited, which keeps its own email
+        self.client_id = client_id
+        # The result of live_client_emails(), when the caller validates many
+        # forms and looked the emails up at once
+        self.taken_emails = taken_emails
+
+    def validate_email(self, field):
+        email = field.data.lower()
+        taken = self.taken_emails
+        if taken is None:
+            taken = live_client_emails([email])
+        if taken.get(email, self.client_id) != self.client_id:
+            raise ValidationError('Another client already uses this email.')
+
 
 # FUTURE: instead of a separete form and template, use same form and template
 # for creating and updating a client with dynamic values.
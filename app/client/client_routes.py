@@ -1,14 +1,20 @@
 from flask import (current_app, flash, redirect, render_template, request,
                    url_for, abort)
-from app.utils.db import paginate_query, search_in_query
+from app.utils.db import (filter_by_balance, get_owned_or_404, lazy_paginate,
+                          paginate_query, scope_version, search_in_query,
+                          sort_query)
 from flask_login import current_user
-from sqlalchemy.orm import joinedload
 
 from app import db
 from app.client import bp
-from app.client.client_forms import CreateClientForm, UpdateClientForm
-from app.models import Client
+from app.client.client_forms import (CreateClientForm, UpdateClientForm,
+                                     live_client_emails)
+from app.models import Client, Invoice, Project
+from app.models.mixins import utcnow
+from app.utils.audit import audit
+from app.utils.decorators import conditional
 from app.utils.logger import log_user_action, log_error
+from app.utils.soft_delete import flash_deleted, validate_restore
 
 
 # Instead of using the @login_required decorator, we use this function to
@@ -31,19 +37,34 @@ def before_request():
         return redirect(url_for('auth.verification_reminder'))
 
 
+# Sort keys accepted by the client list ("-" prefix for descending)
+CLIENT_SORTS = {
+    'name': Client.name,
+    'created': Client.created_at,
+    'balance': Client.outstanding_total,
+    'invoiced': Client.invoiced_total,
+}
+
+
+def _clients_version():
+    return scope_version((Client, Client.user_id == current_user.id))
+
+
 @bp.route('/')
+@conditional(_clients_version)
 def index():
     """Shows the list of the clients"""
     current_app.logger.info('/client/ route called')
     # Filter clients based on user_id and optionally search_query
-    clients = paginate_query(
-        query=search_in_query(
-            query=Client.query.filter_by(user_id=current_user.id),
-            request=request,
-            fields=(Client.name, Client.email, Client.phone, Client.address)
-        ),
-        request=request
+    query = search_in_query(
+        query=Client.query.filter_by(
+            user_id=current_user.id, deleted_at=None),
+        request=request,
+        fields=(Client.name, Client.email, Client.phone, Client.address)
     )
+    query = filter_by_balance(query, request, Client)
+    query = sort_query(query, request, CLIENT_SORTS, default='name')
+    clients = lazy_paginate(query=query.order_by(Client.id), request=request)
     return render_template(
         'client/index.html',
         clients=clients,
@@ -69,21 +90,98 @@ def add_client():
     return render_template('client/add_client.html', form=form)
 
 
-@bp.route('/<client_id>')
+# Number of projects / invoices shown per page on the client detail page
+RELATED_PER_PAGE = 10
+
+
+def _client_projects(client, page):
+    return paginate_query(
+        Project.query.filter_by(client_id=client.id, deleted_at=None)
+        .order_by(Project.start_date.desc(), Project.id.desc()),
+        request=request, page=page, per_page=RELATED_PER_PAGE,
+        error_out=False
+    )
+
+
+def _client_invoices(client, page):
+    return paginate_query(
+        Invoice.query.filter_by(client_id=client.id, deleted_at=None)
+        .order_by(Invoice.date.desc(), Invoice.id.desc()),
+        request=request, page=page, per_page=RELATED_PER_PAGE,
+        error_out=False
+    )
+
+
+def _page_as_json(pagination, serialize):
+    return {
+        'items': [serialize(item) for item in pagination.items],
+        'page': pagination.page,
+        'pages': pagination.pages,
+        'total': pagination.total,
+        'has_next': pagination.has_next,
+    }
+
+
+def _client_version(client_id):
+    return scope_version(
+        (Client, Client.id == client_id),
+        (Project, Project.client_id == client_id),
+        (Invoice, Invoice.client_id == client_id),
+    )
+
+
+@bp.route('/<int:client_id>')
+@conditional(_client_version)
 def view_client(client_id):
-    client = Client.query.options(
-        joinedload(Client.projects),
-        joinedload(Client.invoices),
-        ).get_or_404(client_id)
-    return render_template('client/view_client.html', client=client)
+    # Projects and invoices are fetched as separate bounded pages instead of
+    # eager-loading both collections, whose JOIN multiplies the rows.
+    client = get_owned_or_404(Client, client_id)
+    return render_template(
+        'client/view_client.html',
+        client=client,
+        projects=_client_projects(client, page=1),
+        invoices=_client_invoices(client, page=1),
+    )
+
+
+@bp.route('/<int:client_id>/projects')
+def client_projects(client_id):
+    """JSON page of the client's projects, used by "Load more"."""
+    client = get_owned_or_404(Client, client_id)
+    projects = _client_projects(
+        client, page=request.args.get('page', 1, type=int))
+    return _page_as_json(projects, lambda project: {
+        'id': project.id,
+        'title': project.title,
+        'start_date': project.start_date.isoformat(),
+        'end_date': (project.end_date.isoformat()
+                     if project.end_date else None),
+        'url': url_for('project.view_project', prj_id=project.id),
+    })
 
 
-@bp.route('/<client_id>/edit', methods=['GET', 'POST'])
+@bp.route('/<int:client_id>/invoices')
+def client_invoices(client_id):
+    """JSON page of the client's invoices, used by "Load more"."""
+    client = get_owned_or_404(Client, client_id)
+    invoices = _client_invoices(
+        client, page=request.args.get('page', 1, type=int))
+    return _page_as_json(invoices, lambda invoice: {
+        'id': invoice.id,
+        'date': invoice.date.isoformat(),
+        'amount': str(invoice.amount),
+        'status': invoice.status.value,
+        'url': url_for('invoice.view_invoice', id=invoice.id),
+    })
+
+
+@bp.route('/<int:client_id>/edit', methods=['GET', 'POST'])
 def update_client(client_id):
-    client = Client.query.get_or_404(client_id)
-    form = UpdateClientForm(obj=client)
+    client = get_owned_or_404(Client, client_id)
+    form = UpdateClientForm(obj=client, client_id=client.id)
     if form.validate_on_submit():
         form.populate_obj(client)
+        client.email = client.email.lower()
         db.session.commit()
         flash('Client updated successfully', 'success')
         return redirect(url_for('client.view_client', client_id=client.id))
@@ -91,39 +189,45 @@ def update_client(client_id):
                            client=client)
 
 
-@bp.route('/<client_id>/delete', methods=['DELETE'])
+@bp.route('/<int:client_id>/delete', methods=['DELETE'])
 def delete_client(client_id):
-    client = Client.query.get_or_404(client_id)
-    
-    # Check authorization
-    if client.user_id != current_user.id:
-        log_error('Unauthorized client deletion attempt', 
-                 user_id=current_user.id, 
-                 client_id=client_id, 
-                 ip_address=request.remote_addr)
-        # Always return error page for unauthorized access
-        abort(403)
+    client = get_owned_or_404(Client, client_id)
 
     try:
+        # Tombstone the children with the same timestamp so that undoing
+        # the delete restores exactly the rows it hid.
+        deleted_at = utcnow()
+        projects = db.session.execute(Project.tombstone(
+            Project.client_id == client.id, deleted_at=deleted_at))
+        invoices = db.session.execute(Invoice.tombstone(
+            Invoice.client_id == client.id, deleted_at=deleted_at))
+        client.deleted_at = deleted_at
+
         # Log the deletion action
         log_user_action(
             'client_deleted',
             user_id=current_user.id,
             client_id=client.id,
             client_name=client.name,
+            projects_deleted=projects.rowcount,
+            invoices_deleted=invoices.rowcount,
             ip_address=request.remote_addr
         )
-        
-        db.session.delete(client)
+
         db.session.commit()
-        
+        audit('client_deleted', client,
+              projects_deleted=projects.rowcount,
+              invoices_deleted=invoices.rowcount)
+        restore_url = url_for('client.restore_client', client_id=client.id)
+        flash_deleted('Client deleted.', restore_url)
+
         # Check if it's an AJAX request
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return {'message': 'Client deleted successfully'}, 200
+            return {'message': 'Client deleted successfully',
+                    'restore_url': restore_url}, 200
         else:
-            flash('Client deleted successfully', 'success')
             return redirect(url_for('client.index'))
-            
+
     except Exception as e:
         db.session.rollback()
         log_error('Failed to delete client', 
@@ -135,3 +239,31 @@ def delete_client(client_id):
             return {'error': 'Failed to delete client'}, 500
         else:
             abort(500)
+
+
+@bp.route('/<int:client_id>/restore', methods=['POST'])
+def restore_client(client_id):
+    validate_restore()
+    client = get_owned_or_404(Client, client_id, include_deleted=True)
+
+    if client.is_deleted and live_client_emails([client.email]):
+        flash('Another client now uses the email of this client; change '
+              'it before restoring this one', 'warning')
+        return redirect(url_for('client.index'))
+    if client.is_deleted:
+        deleted_at = client.deleted_at
+        db.session.execute(Project.untombstone(
+            Project.client_id == client.id, deleted_at=deleted_at))
+        db.session.execute(Invoice.untombstone(
+            Invoice.client_id == client.id, deleted_at=deleted_at))
+        client.deleted_at = None
+        log_user_action(
+            'client_restored',
+            user_id=current_user.id,
+            client_id=client.id,
+            ip_address=request.remote_addr
+        )
+        db.session.commit()
+        audit('client_restored', client)
+        flash('Client restored', 'success')
+    return redirect(url_for('client.view_client', client_id=client.id))
@@ -1,7 +1,18 @@
+from datetime import timedelta
+
 import click
+from flask import current_app
 from flask.cli import with_appcontext
 from app import db
-from app.models import Role
+from app.models import Client, Invoice, Project, Role
+from app.models.mixins import utcnow
+from app.utils import partitions as invoice_partitions
+from app.utils.archive import archive_invoices
+from app.utils.assets import compress_static_files
+from app.utils.slow_queries import load_dumps
+from app.utils.soft_delete import purge_deleted
+from app.utils.summaries import reconcile
+from app.utils import template_cache
 
 @click.command("seed-db")
 @with_appcontext
@@ -25,3 +36,166 @@ def seed_db():
 
     db.session.commit()
     click.echo("✅ Database roles seeded successfully!")
+
+
+@click.command("slow-queries")
+@click.option("--sort", type=click.Choice(["total_ms", "mean_ms", "calls"]),
+              default="total_ms", show_default=True)
+@click.option("--limit", default=20, show_default=True)
+@with_appcontext
+def slow_queries(sort, limit):
+    """Print the slow query table merged across all workers."""
+    dump_dir = current_app.config["SLOW_QUERY_DUMP_DIR"]
+    if not dump_dir:
+        raise click.ClickException("SLOW_QUERY_DUMP_DIR is not set.")
+    rows = load_dumps(dump_dir, sort, limit)
+    if not rows:
+        click.echo("No slow queries recorded.")
+        return
+    for row in rows:
+        click.echo(
+            f"{row['total_ms']:10.1f} ms total  {row['mean_ms']:8.1f} ms mean  "
+            f"{row['max_ms']:8.1f} ms max  {row['calls']:6d} calls  "
+            f"{row['endpoint']}"
+        )
+        click.echo(f"    {row['fingerprint']}")
+
+
+@click.command("purge-deleted")
+@click.option("--older-than-days", type=int, default=None,
+              help="Defaults to SOFT_DELETE_GRACE_DAYS.")
+@click.option("--batch-size", default=500, show_default=True)
+@click.option("--pause", default=0.1, show_default=True,
+              help="Seconds to sleep between batches.")
+@with_appcontext
+def purge_deleted_rows(older_than_days, batch_size, pause):
+    """Permanently delete rows soft-deleted before the grace period."""
+    if older_than_days is None:
+        older_than_days = current_app.config["SOFT_DELETE_GRACE_DAYS"]
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    # Children first, so no single batch cascades to an unbounded number
+    # of rows through ON DELETE CASCADE
+    for model in (Invoice, Project, Client):
+        deleted = purge_deleted(model, cutoff, batch_size, pause)
+        click.echo(f"Purged {deleted} {model.__tablename__}")
+
+
+@click.command("archive-invoices")
+@click.option("--older-than-days", type=int, default=None,
+              help="Defaults to INVOICE_ARCHIVE_AFTER_DAYS.")
+@click.option("--batch-size", default=500, show_default=True)
+@click.option("--pause", default=0.1, show_default=True,
+              help="Seconds to sleep between batches.")
+@with_appcontext
+def archive_settled_invoices(older_than_days, batch_size, pause):
+    """Move old paid and cancelled invoices to the archive table."""
+    if older_than_days is None:
+        older_than_days = current_app.config["INVOICE_ARCHIVE_AFTER_DAYS"]
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    archived = archive_invoices(cutoff, batch_size, pause)
+    click.echo(f"Archived {archived} invoices")
+
+
+@click.command("reconcile-summaries")
+@with_appcontext
+def reconcile_summaries():
+    """Recompute the invoice totals of every project and client."""
+    for model, foreign_key in ((Project, Invoice.project_id),
+                               (Client, Invoice.client_id)):
+        updated = reconcile(model, foreign_key)
+        db.session.commit()
+        click.echo(f"Reconciled {updated} {model.__tablename__}")
+
+
+@click.command("compress-static")
+@with_appcontext
+def compress_static():
+    """Write precompressed .gz/.br siblings of the static files."""
+    written = compress_static_files(current_app.static_folder)
+    click.echo(f"Compressed {len(written)} files")
+    for name in written:
+        click.echo(f"    {name}")
+
+
+@click.command("precompile-templates")
+@with_appcontext
+def precompile_templates():
+    """Compile the templates into TEMPLATE_CACHE_DIR."""
+    if not current_app.config["TEMPLATE_CACHE_DIR"]:
+        raise click.ClickException("TEMPLATE_CACHE_DIR is not set")
+    names = template_cache.precompile_templates(current_app)
+    click.echo(f"Compiled {len(names)} templates into "
+               f"{current_app.config['TEMPLATE_CACHE_DIR']}")
+
+
+@click.group("partitions")
+def partitions():
+    """Manage the monthly partitions of the invoices table."""
+
+
+def _partition_connection():
+    connection = db.engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT")
+    if not invoice_partitions.is_partitioned(connection):
+        connection.close()
+        raise click.ClickException(
+            "invoices is not partitioned; convert it with "
+            "'flask partitions convert'")
+    return connection
+
+
+@partitions.command("convert")
+@click.option("--months-ahead", default=3, show_default=True,
+              help="Create partitions up to this many months ahead.")
+@click.confirmation_option(
+    prompt="This copies every invoice under an exclusive lock. Continue?")
+@with_appcontext
+def convert_partitions(months_ahead):
+    """Convert the invoices table into monthly partitions."""
+    if db.engine.dialect.name != "postgresql":
+        raise click.ClickException("Partitioning needs PostgreSQL")
+    with db.engine.begin() as connection:
+        if invoice_partitions.is_partitioned(connection):
+            raise click.ClickException("invoices is already partitioned")
+        created = invoice_partitions.partition_table(
+            connection, utcnow().date(), months_ahead)
+    click.echo(f"Converted invoices into {len(created)} partitions")
+    for name in created:
+        click.echo(f"    {name}")
+
+
+@partitions.command("create")
+@click.option("--months-ahead", default=3, show_default=True,
+              help="Create partitions up to this many months ahead.")
+@with_appcontext
+def create_partitions(months_ahead):
+    """Create the missing partitions up to a few months ahead."""
+    today = utcnow().date()
+    last = invoice_partitions.add_months(
+        invoice_partitions.month_start(today), months_ahead)
+    with _partition_connection() as connection:
+        created = invoice_partitions.create_partitions(
+            connection, today, last)
+    click.echo(f"Created {len(created)} partitions")
+    for name in created:
+        click.echo(f"    {name}")
+
+
+@partitions.command("detach")
+@click.option("--older-than-months", type=int, required=True,
+              help="Detach partitions for months before this many months "
+                   "ago.")
+@click.option("--drop", is_flag=True,
+              help="Also drop the detached partitions and their lines.")
+@with_appcontext
+def detach_partitions(older_than_months, drop):
+    """Detach (and optionally drop) the partitions of old invoices."""
+    before = invoice_partitions.add_months(
+        invoice_partitions.month_start(utcnow()), -older_than_months)
+    with _partition_connection() as connection:
+        detached = invoice_partitions.detach_partitions(
+            connection, before, drop=drop)
+    click.echo(f"{'Dropped' if drop else 'Detached'} {len(detached)} "
+               f"partitions")
+    for name in detached:
+        click.echo(f"    {name}")
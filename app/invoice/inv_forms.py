@@ -1,13 +1,29 @@
 from flask_wtf import FlaskForm
-from wtforms import (DateField, FloatField, SelectField, SubmitField,
-                     TextAreaField)
-from wtforms.validators import DataRequired, Length, NumberRange
+from wtforms import (DateField, DecimalField, FieldList, Form, FormField,
+                     SelectField, StringField, SubmitField, TextAreaField)
+from wtforms.validators import (DataRequired, InputRequired, Length,
+                                NumberRange, Optional)
+
+MAX_INVOICE_LINES = 100
+
+
+class InvoiceLineForm(Form):
+    """One line of an InvoiceForm; a plain Form so it has no CSRF token."""
+    description = StringField(
+        'Description', validators=[DataRequired(), Length(max=200)])
+    quantity = DecimalField(
+        'Quantity', places=2, default=1,
+        validators=[InputRequired(), NumberRange(min=0)])
+    unit_price = DecimalField(
+        'Unit Price', places=2,
+        validators=[InputRequired(), NumberRange(min=0)])
+    tax_rate = DecimalField(
+        'Tax %', places=2, default=0,
+        validators=[Optional(), NumberRange(min=0, max=100)])
 
 
 class InvoiceForm(FlaskForm):
     date = DateField('Date', validators=[DataRequired()])
-    amount = FloatField(
-        'Amount', validators=[DataRequired(), NumberRange(min=0)])
     description = TextAreaField('Description', validators=[Length(max=200)])
     status = SelectField('Status', choices=[
         ('pending', 'Pending'),
@@ -15,4 +31,7 @@ class InvoiceForm(FlaskForm):
         ('overdue', 'Overdue'),
         ('cancelled', 'Cancelled')
     ], validators=[DataRequired()])
+    lines = FieldList(
+        FormField(InvoiceLineForm), 'Lines',
+        min_entries=1, max_entries=MAX_INVOICE_LINES)
     submit = SubmitField('Submit')
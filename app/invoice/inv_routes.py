@@ -1,14 +1,27 @@
+from datetime import date, datetime, time, timedelta
+
 from flask import flash, redirect, render_template, request, url_for, current_app, abort
 from flask import send_file
 from flask_login import current_user
+import sqlalchemy as sa
+import sqlalchemy.orm as so
 
 from app import db
 from app.invoice import bp
 from app.invoice.inv_forms import InvoiceForm
-from app.models import Client, Invoice, Project
-from app.utils.db import paginate_query, search_in_query
+from app.models import ArchivedInvoice, Client, Invoice, Project
+from app.models.mixins import utcnow
+from app.models.project_models import InvoiceStatus
+from app.utils.audit import audit
+from app.utils.db import (get_owned, get_owned_or_404, lazy_paginate,
+                          scope_version, search_in_query)
+from app.utils.decorators import conditional
+from app.utils.invoice_lines import add_lines, replace_lines
 from app.utils.pdf import generate_invoice
 from app.utils.logger import log_user_action, log_error
+from app.utils.money import Money
+from app.utils.soft_delete import flash_deleted, validate_restore
+from app.utils.summaries import apply_delta, combine, invoice_delta
 
 
 @bp.before_request
@@ -29,7 +42,16 @@ def before_request():
         return redirect(url_for('auth.verification_reminder'))
 
 
+def _invoices_version():
+    return scope_version(
+        (Invoice, Invoice.user_id == current_user.id),
+        (Project, Project.user_id == current_user.id),
+        (Client, Client.user_id == current_user.id),
+    )
+
+
 @bp.route('/', methods=['GET'])
+@conditional(_invoices_version)
 def get_invoices():
     # TODO: Check if it possibe to add search_in_query and paginate_query to
     # the methods of the query itself to be used like
@@ -47,22 +69,26 @@ def get_invoices():
             Project.title,
             Client.name
         )
+        .filter(Invoice.live())
         .filter_by(user_id=current_user.id)
     )
 
     status = request.args.get('status')
-    date = request.args.get('date')
+    day = request.args.get('date', type=date.fromisoformat)
     if status:
         query = query.filter_by(status=status)
-    if date:
-        query = query.filter(Invoice.date == date)
+    if day:
+        # A half-open range matches the whole day and lets PostgreSQL
+        # prune a partitioned invoices table to one partition
+        start = datetime.combine(day, time.min)
+        query = query.filter(Invoice.date >= start,
+                             Invoice.date < start + timedelta(days=1))
 
-    invoices = paginate_query(
+    invoices = lazy_paginate(
         search_in_query(
             query=query,
             request=request,
             fields=(
-                Invoice.amount,
                 Invoice.description,
                 Project.title,
                 Client.name
@@ -78,17 +104,19 @@ def get_invoices():
 
 @bp.route('/edit/<int:id>', methods=['GET', 'PUT'])
 def update_invoice(id):
-    invoice = Invoice.query.get_or_404(id)
-    if (not invoice) or (invoice.project.user_id != current_user.id):
-        log_error('Unauthorized invoice edit attempt', 
-                 user_id=current_user.id, 
-                 invoice_id=id, 
-                 ip_address=request.remote_addr)
-        abort(403)
+    invoice = get_owned_or_404(Invoice, id, so.selectinload(Invoice.lines))
 
     form = InvoiceForm(obj=invoice)
     if form.validate_on_submit():
-        form.populate_obj(invoice)
+        removed = invoice_delta(invoice.amount_cents, invoice.status, -1)
+        invoice.date = form.date.data
+        invoice.description = form.description.data
+        invoice.status = InvoiceStatus(form.status.data)
+        # The lines are written in bulk, and the totals computed from them
+        replace_lines(invoice, form.lines.data)
+        apply_delta(
+            combine(removed, invoice_delta(invoice.amount_cents, invoice.status)),
+            project_id=invoice.project_id, client_id=invoice.client_id)
         db.session.commit()
         flash('Invoice updated successfully', 'success')
         return redirect(url_for('invoice.view_invoice', id=invoice.id))
@@ -102,14 +130,7 @@ def update_invoice(id):
 
 @bp.route('/<int:id>', methods=['DELETE'])
 def delete_invoice(id):
-    invoice = Invoice.query.get_or_404(id)
-    if (not invoice) or (invoice.project.user_id != current_user.id):
-        log_error('Unauthorized invoice deletion attempt', 
-                 user_id=current_user.id, 
-                 invoice_id=id, 
-                 ip_address=request.remote_addr)
-        # Always return error page for unauthorized access
-        abort(403)
+    invoice = get_owned_or_404(Invoice, id)
 
     try:
         # Log the deletion action
@@ -118,18 +139,24 @@ def delete_invoice(id):
             user_id=current_user.id,
             invoice_id=invoice.id,
             project_id=invoice.project_id,
-            amount=invoice.amount,
+            amount=str(invoice.amount),
             ip_address=request.remote_addr
         )
         
-        db.session.delete(invoice)
+        invoice.deleted_at = utcnow()
+        apply_delta(invoice_delta(invoice.amount_cents, invoice.status, -1),
+                    project_id=invoice.project_id,
+                    client_id=invoice.client_id)
         db.session.commit()
-        
+        audit('invoice_deleted', invoice)
+        restore_url = url_for('invoice.restore_invoice', id=invoice.id)
+        flash_deleted('Invoice deleted.', restore_url)
+
         # Check if it's an AJAX request
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return {'message': 'Invoice deleted successfully'}, 200
+            return {'message': 'Invoice deleted successfully',
+                    'restore_url': restore_url}, 200
         else:
-            flash('Invoice deleted successfully', 'success')
             return redirect(url_for('project.view_project', prj_id=invoice.project_id))
             
     except Exception as e:
@@ -145,21 +172,74 @@ def delete_invoice(id):
             abort(500)
 
 
+@bp.route('/<int:id>/restore', methods=['POST'])
+def restore_invoice(id):
+    validate_restore()
+    invoice = get_owned_or_404(
+        Invoice, id, so.joinedload(Invoice.project), include_deleted=True)
+
+    if invoice.is_deleted:
+        if invoice.project.is_deleted:
+            flash('Restore the project of this invoice first', 'warning')
+            return redirect(url_for('invoice.get_invoices'))
+        invoice.deleted_at = None
+        apply_delta(invoice_delta(invoice.amount_cents, invoice.status),
+                    project_id=invoice.project_id,
+                    client_id=invoice.client_id)
+        log_user_action(
+            'invoice_restored',
+            user_id=current_user.id,
+            invoice_id=invoice.id,
+            ip_address=request.remote_addr
+        )
+        db.session.commit()
+        audit('invoice_restored', invoice)
+        flash('Invoice restored', 'success')
+    return redirect(url_for('invoice.view_invoice', id=invoice.id))
+
+
+def _get_invoice_or_archived_404(id):
+    """The invoice with its client, project and lines, looked up in the
+    archive when it is no longer in the invoices table."""
+    return get_owned_or_404(
+        Invoice, id,
+        so.joinedload(Invoice.client), so.joinedload(Invoice.project),
+        so.selectinload(Invoice.lines),
+        fallback=lambda: get_owned(
+            ArchivedInvoice, id,
+            so.joinedload(ArchivedInvoice.client),
+            so.joinedload(ArchivedInvoice.project),
+            so.selectinload(ArchivedInvoice.lines))
+    )
+
+
+def _invoice_version(id):
+    def parent_id(column, archived_column):
+        # The client or project of the invoice, archived or not
+        return sa.func.coalesce(
+            sa.select(column).where(Invoice.id == id).scalar_subquery(),
+            sa.select(archived_column)
+            .where(ArchivedInvoice.id == id).scalar_subquery())
+
+    return scope_version(
+        (Invoice, Invoice.id == id),
+        (Client, Client.id == parent_id(
+            Invoice.client_id, ArchivedInvoice.client_id)),
+        (Project, Project.id == parent_id(
+            Invoice.project_id, ArchivedInvoice.project_id)),
+    )
+
+
 @bp.route('/<int:id>', methods=['GET'])
+@conditional(_invoice_version)
 def view_invoice(id):
-    invoice = Invoice.query.get_or_404(id)
-    if (not invoice) or (invoice.project.user_id != current_user.id):
-        flash('You are not authorized to view this invoice', 'error')
-        return redirect(url_for('main.index'))
+    invoice = _get_invoice_or_archived_404(id)
     return render_template('invoice/invoice.html', invoice=invoice)
 
 
 @bp.route('/<int:inv_id>/download', methods=['GET'])
 def download_invoice(inv_id):
-    invoice = Invoice.query.get_or_404(inv_id)
-    if (not invoice) or (invoice.project.user_id != current_user.id):
-        flash('You are not authorized to download this invoice', 'error')
-        return redirect(url_for('main.index'))
+    invoice = _get_invoice_or_archived_404(inv_id)
 
     pdf_buffer = generate_invoice(
         freelancer=current_user.last_name,
@@ -170,6 +250,9 @@ def download_invoice(inv_id):
         invoice_date=invoice.date,
         invoice_number=invoice.id,
         status=invoice.status.value,
+        lines=invoice.lines,
+        subtotal=invoice.subtotal,
+        tax=invoice.tax,
         total_amount=invoice.amount
     )
 
@@ -184,11 +267,8 @@ def download_invoice(inv_id):
 @bp.route('/create', methods=['GET', 'POST'])
 def create_invoice():
     # the project id will be passed in the get request
-    project = Project.query.get_or_404(request.args.get('project_id'))
-    # Since I am using get_or_404, it is impossible for project to be None
-    if project.user_id != current_user.id:
-        flash('You are not authorized to create an invoice for this project', 'error')
-        return redirect(url_for('main.index'))
+    project = get_owned_or_404(
+        Project, request.args.get('project_id', type=int))
 
     form = InvoiceForm()
     if form.validate_on_submit():
@@ -197,11 +277,16 @@ def create_invoice():
         invoice.user_id = current_user.id
         invoice.client_id = project.client_id
         invoice.date = form.date.data
-        invoice.amount = form.amount.data
+        # The totals are computed from the lines once they are inserted
+        invoice.amount = Money(0, current_user.currency)
         invoice.description = form.description.data
-        invoice.status = form.status.data
+        invoice.status = InvoiceStatus(form.status.data)
 
         db.session.add(invoice)
+        db.session.flush()
+        add_lines(invoice, form.lines.data)
+        apply_delta(invoice_delta(invoice.amount_cents, invoice.status),
+                    project_id=project.id, client_id=project.client_id)
         db.session.commit()
         flash('Invoice created successfully', 'success')
         return redirect(url_for('invoice.view_invoice', id=invoice.id))
@@ -7,6 +7,8 @@ from app.main import bp
 from app import db
 from app.models import Client, Project, Invoice
 from app.models.project_models import InvoiceStatus
+from app.utils.db import scope_version
+from app.utils.decorators import conditional
 
 
 @bp.route('/')
@@ -15,8 +17,19 @@ def index():
         return redirect(url_for('main.dashboard'))
     return render_template('index.html')
 
+def _dashboard_version():
+    # The deadlines shown depend on the time too
+    hour = datetime.now(tz=timezone.utc).strftime('%Y-%m-%d %H')
+    return hour, scope_version(
+        (Client, Client.user_id == current_user.id),
+        (Project, Project.user_id == current_user.id),
+        (Invoice, Invoice.user_id == current_user.id),
+    )
+
+
 @bp.route('/dashboard')
 @login_required
+@conditional(_dashboard_version)
 def dashboard():
     current_app.logger.info('Dashboard route called')
     
@@ -25,101 +38,84 @@ def dashboard():
     week_from_now = now + timedelta(days=7)
     month_ago = now - timedelta(days=30)
     
-    # Clients Summary
-    total_clients = db.session.scalar(
-        sa.select(sa.func.count(Client.id))
-        .where(Client.user_id == current_user.id)
-    )
+    # The counters below run on every dashboard view, so they are built as
+    # lambda statements: SQLAlchemy caches each statement per call site and
+    # only substitutes the bound values (user_id, dates) on later requests.
+    user_id = current_user.id
+
+    # Clients Summary, with the invoice totals kept on each client (see
+    # app.utils.summaries): summing them over the user's clients reads
+    # neither the invoices table nor, once partitioned, its every partition.
+    # The invoice count includes archived invoices.
+    (total_clients, total_invoices, pending_invoices, overdue_invoices,
+     total_pending_amount) = db.session.execute(sa.lambda_stmt(
+        lambda: sa.select(
+            sa.func.count(Client.id),
+            sa.func.coalesce(sa.func.sum(Client.invoice_count), 0),
+            sa.func.coalesce(sa.func.sum(Client.pending_count), 0),
+            sa.func.coalesce(sa.func.sum(Client.overdue_count), 0),
+            # In cents of the user's currency
+            sa.func.coalesce(sa.func.sum(Client.outstanding_total), 0),
+        )
+        .where(Client.user_id == user_id, Client.deleted_at.is_(None))
+    )).one()
     
-    new_clients_this_month = db.session.scalar(
-        sa.select(sa.func.count(Client.id))
+    new_clients_this_month = db.session.scalar(sa.lambda_stmt(
+        lambda: sa.select(sa.func.count(Client.id))
         .where(
             sa.and_(
-                Client.user_id == current_user.id,
+                Client.user_id == user_id,
+                Client.deleted_at.is_(None),
                 Client.created_at >= month_ago
             )
         )
-    )
+    ))
     
     # Projects Summary
-    total_projects = db.session.scalar(
-        sa.select(sa.func.count(Project.id))
-        .where(Project.user_id == current_user.id)
-    )
+    total_projects = db.session.scalar(sa.lambda_stmt(
+        lambda: sa.select(sa.func.count(Project.id))
+        .where(Project.user_id == user_id, Project.deleted_at.is_(None))
+    ))
     
-    active_projects = db.session.scalar(
-        sa.select(sa.func.count(Project.id))
+    active_projects = db.session.scalar(sa.lambda_stmt(
+        lambda: sa.select(sa.func.count(Project.id))
         .where(
             sa.and_(
-                Project.user_id == current_user.id,
+                Project.user_id == user_id,
+                Project.deleted_at.is_(None),
                 Project.end_date.is_(None)  # No end date means active
             )
         )
-    )
+    ))
     
-    projects_ending_soon = db.session.scalar(
-        sa.select(sa.func.count(Project.id))
+    projects_ending_soon = db.session.scalar(sa.lambda_stmt(
+        lambda: sa.select(sa.func.count(Project.id))
         .where(
             sa.and_(
-                Project.user_id == current_user.id,
+                Project.user_id == user_id,
+                Project.deleted_at.is_(None),
                 Project.end_date.isnot(None),
                 Project.end_date <= week_from_now,
                 Project.end_date >= now
             )
         )
-    )
-    
-    # Invoices Summary
-    total_invoices = db.session.scalar(
-        sa.select(sa.func.count(Invoice.id))
-        .where(Invoice.user_id == current_user.id)
-    )
-    
-    pending_invoices = db.session.scalar(
-        sa.select(sa.func.count(Invoice.id))
-        .where(
-            sa.and_(
-                Invoice.user_id == current_user.id,
-                Invoice.status == InvoiceStatus.PENDING
-            )
-        )
-    )
-    
-    overdue_invoices = db.session.scalar(
-        sa.select(sa.func.count(Invoice.id))
-        .where(
-            sa.and_(
-                Invoice.user_id == current_user.id,
-                Invoice.status == InvoiceStatus.OVERDUE
-            )
-        )
-    )
-    
-    # Calculate total pending amount
-    total_pending_amount = db.session.scalar(
-        sa.select(sa.func.sum(Invoice.amount))
-        .where(
-            sa.and_(
-                Invoice.user_id == current_user.id,
-                Invoice.status.in_([InvoiceStatus.PENDING, InvoiceStatus.OVERDUE])
-            )
-        )
-    ) or 0
+    ))
     
     # Get recent projects (last 5)
-    recent_projects = db.session.scalars(
-        sa.select(Project)
-        .where(Project.user_id == current_user.id)
+    recent_projects = db.session.scalars(sa.lambda_stmt(
+        lambda: sa.select(Project)
+        .where(Project.user_id == user_id, Project.deleted_at.is_(None))
         .order_by(Project.start_date.desc())
         .limit(5)
-    ).all()
+    )).all()
     
     # Get upcoming deadlines (invoices due this week)
-    upcoming_invoices = db.session.scalars(
-        sa.select(Invoice)
+    upcoming_invoices = db.session.scalars(sa.lambda_stmt(
+        lambda: sa.select(Invoice)
         .where(
             sa.and_(
-                Invoice.user_id == current_user.id,
+                Invoice.user_id == user_id,
+                Invoice.deleted_at.is_(None),
                 Invoice.status == InvoiceStatus.PENDING,
                 Invoice.date <= week_from_now,
                 Invoice.date >= now
@@ -127,7 +123,7 @@ def dashboard():
         )
         .order_by(Invoice.date.asc())
         .limit(5)
-    ).all()
+    )).all()
     
     dashboard_data = {
         'clients': {
@@ -1,3 +1,5 @@
+from app.models.audit_models import AuditEvent  # noqa
 from app.models.auth_models import User, Role  # noqa
 from app.models.client_models import Client  # noqa
-from app.models.project_models import Project, Invoice  # noqa
+from app.models.project_models import (  # noqa
+    ArchivedInvoice, ArchivedInvoiceLine, Invoice, InvoiceLine, Project)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+from app import db
+
+
+class AuditEvent(db.Model):
+    '''
+    Audit history of logins, deletions and other account events.
+
+    Rows are only ever inserted, mostly in batches by ``app.utils.audit``,
+    and read newest first by id. ``user_id`` is not a foreign key, so the
+    history outlives the users it mentions.
+    '''
+    __tablename__ = 'audit_events'
+    __table_args__ = (
+        sa.Index('ix_audit_events_user_id_id', 'user_id', 'id'),
+        sa.Index('ix_audit_events_action_id', 'action', 'id'),
+    )
+    id: so.Mapped[int] = so.mapped_column(
+        sa.BigInteger().with_variant(sa.Integer, 'sqlite'), primary_key=True)
+    created_at: so.Mapped[datetime] = so.mapped_column(
+        sa.DateTime, nullable=False)
+    action: so.Mapped[str] = so.mapped_column(sa.String(40), nullable=False)
+    user_id: so.Mapped[Optional[int]] = so.mapped_column(sa.Integer)
+    # The row acted on, e.g. ('invoices', 12)
+    object_type: so.Mapped[Optional[str]] = so.mapped_column(sa.String(30))
+    object_id: so.Mapped[Optional[int]] = so.mapped_column(sa.Integer)
+    ip_address: so.Mapped[Optional[str]] = so.mapped_column(sa.String(45))
+    request_id: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64))
+    details: so.Mapped[Optional[dict]] = so.mapped_column(sa.JSON)
+
+    def __repr__(self) -> str:
+        return f'<AuditEvent {self.id}: {self.action}>'
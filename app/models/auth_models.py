@@ -8,6 +8,7 @@ from flask_login import UserMixin
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app import db, login
+from app.utils.money import DEFAULT_CURRENCY
 from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
@@ -28,6 +29,11 @@ class User(UserMixin, db.Model):
         sa.String(256), nullable=False)
     email_verified: so.Mapped[bool] = so.mapped_column(
         sa.Boolean, default=False)
+    # Every invoice of the account is in this currency, so its totals can
+    # be summed
+    currency: so.Mapped[str] = so.mapped_column(
+        sa.String(3), nullable=False, default=DEFAULT_CURRENCY,
+        server_default=DEFAULT_CURRENCY)
     created_at: so.Mapped[datetime] = so.mapped_column(
         sa.DateTime, default=datetime.now(tz=timezone.utc))
 
@@ -114,7 +120,11 @@ class User(UserMixin, db.Model):
 @login.user_loader
 def load_user(id: int) -> User:
     '''Load a user from the database'''
-    return db.session.get(User, int(id))
+    # Runs on every request: a lambda statement is built once and cached
+    user_id = int(id)
+    return db.session.scalars(
+        sa.lambda_stmt(lambda: sa.select(User).where(User.id == user_id))
+    ).first()
 
 
 class Role(db.Model):
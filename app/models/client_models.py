@@ -8,19 +8,31 @@ import sqlalchemy as sa
 import sqlalchemy.orm as so
 
 from app import db
+from app.models.mixins import (InvoiceSummaryMixin, SoftDeleteMixin,
+                               TimestampMixin, live_index, tombstone_index)
 
 # Import User only for type checking to avoid circular imports
 if TYPE_CHECKING:
     from app.models import User, Project, Invoice
 
 
-class Client(db.Model):
+class Client(SoftDeleteMixin, TimestampMixin, InvoiceSummaryMixin,
+             db.Model):
     '''Client model for the application'''
     __tablename__ = 'clients'
+    __table_args__ = (
+        live_index('ix_clients_user_id_live', 'user_id'),
+        live_index('ix_clients_user_id_outstanding_total_live',
+                   'user_id', 'outstanding_total'),
+        live_index('ix_clients_user_id_updated_at_live',
+                   'user_id', 'updated_at'),
+        # A deleted client frees its email, for a new client or its undo
+        live_index('ix_clients_email_live', 'email', unique=True),
+        tombstone_index('ix_clients_deleted_at'),
+    )
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     name: so.Mapped[str] = so.mapped_column(sa.String(100), index=True)
-    email: so.Mapped[str] = so.mapped_column(
-        sa.String(120), index=True, unique=True)
+    email: so.Mapped[str] = so.mapped_column(sa.String(120))
     phone: so.Mapped[str] = so.mapped_column(sa.String(20), nullable=True)
     address: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
 
@@ -31,11 +43,15 @@ class Client(db.Model):
         sa.ForeignKey('users.id'), index=True)
     user: so.Mapped['User'] = so.relationship(back_populates='clients')
 
+    # Children are removed by ON DELETE CASCADE in the database;
+    # passive_deletes stops the ORM from loading them just to delete them.
     projects: so.Mapped[list['Project']] = so.relationship(
         'Project', back_populates='client', cascade='all, delete-orphan',
+        passive_deletes=True,
     )
     invoices: so.Mapped[list['Invoice']] = so.relationship(
         'Invoice', back_populates='client', cascade='all, delete-orphan',
+        passive_deletes=True,
     )
 
     def __repr__(self) -> str:
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Optional
+
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+LIVE = sa.text('deleted_at IS NULL')
+TOMBSTONED = sa.text('deleted_at IS NOT NULL')
+
+
+class SoftDeleteMixin:
+    '''
+    Adds a ``deleted_at`` tombstone to a model.
+
+    Deleting a row only stamps ``deleted_at``; queries exclude tombstoned
+    rows with ``Model.live()`` and ``flask purge-deleted`` removes them for
+    good once the undo window has passed.
+    '''
+    deleted_at: so.Mapped[Optional[datetime]] = so.mapped_column(
+        sa.DateTime, nullable=True, default=None)
+
+    @property
+    def is_deleted(self) -> bool:
+        return self.deleted_at is not None
+
+    @classmethod
+    def live(cls):
+        '''Criterion matching the rows that are not soft-deleted.'''
+        return cls.deleted_at.is_(None)
+
+    @classmethod
+    def tombstone(cls, *criteria, deleted_at: datetime):
+        '''UPDATE statement soft-deleting the live rows matching criteria.'''
+        return (
+            sa.update(cls)
+            .where(cls.deleted_at.is_(None), *criteria)
+            .values(deleted_at=deleted_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def untombstone(cls, *criteria, deleted_at: datetime):
+        '''UPDATE statement restoring the rows deleted at ``deleted_at``.'''
+        return (
+            sa.update(cls)
+            .where(cls.deleted_at == deleted_at, *criteria)
+            .values(deleted_at=None)
+            .execution_options(synchronize_session=False)
+        )
+
+
+class InvoiceSummaryMixin:
+    '''
+    Adds running invoice totals to a model, maintained by
+    ``app.utils.summaries``.
+
+    The totals cover the invoices that are live or were soft-deleted
+    together with the row, so deleting and restoring the row itself does
+    not change them. Cancelled invoices are counted but not invoiced.
+    Amounts are in cents of the owner's currency (``User.currency``).
+    ``pending_count`` and ``overdue_count`` split the outstanding invoices
+    by status, for the dashboard.
+    '''
+    invoice_count: so.Mapped[int] = so.mapped_column(
+        sa.Integer, nullable=False, default=0, server_default='0')
+    invoiced_total: so.Mapped[int] = so.mapped_column(
+        sa.BigInteger, nullable=False, default=0, server_default='0')
+    paid_total: so.Mapped[int] = so.mapped_column(
+        sa.BigInteger, nullable=False, default=0, server_default='0')
+    outstanding_total: so.Mapped[int] = so.mapped_column(
+        sa.BigInteger, nullable=False, default=0, server_default='0')
+    pending_count: so.Mapped[int] = so.mapped_column(
+        sa.Integer, nullable=False, default=0, server_default='0')
+    overdue_count: so.Mapped[int] = so.mapped_column(
+        sa.Integer, nullable=False, default=0, server_default='0')
+
+def utcnow() -> datetime:
+    return datetime.now(tz=timezone.utc).replace(tzinfo=None)
+
+
+class TimestampMixin:
+    '''
+    Adds an ``updated_at`` column, set by every UPDATE of the row: ORM
+    flushes as well as bulk statements such as ``tombstone`` and the
+    summary updates. Together with a row count, the newest ``updated_at``
+    of a user's rows is the validator of the conditional GETs.
+    '''
+    updated_at: so.Mapped[datetime] = so.mapped_column(
+        sa.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+
+
+def live_index(name: str, *columns: str, unique: bool = False) -> sa.Index:
+    '''Partial index over the rows that are not soft-deleted.'''
+    return sa.Index(name, *columns, unique=unique, postgresql_where=LIVE,
+                    sqlite_where=LIVE)
+
+
+def tombstone_index(name: str) -> sa.Index:
+    '''Partial index over the soft-deleted rows, used by the purge.'''
+    return sa.Index(name, 'deleted_at', postgresql_where=TOMBSTONED)
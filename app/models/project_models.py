@@ -2,15 +2,23 @@ from app import db
 import sqlalchemy.orm as so
 import sqlalchemy as sa
 from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
 from enum import Enum
 from typing import TYPE_CHECKING
 
+from sqlalchemy.ext.hybrid import hybrid_property
+
+from app.models.mixins import (InvoiceSummaryMixin, SoftDeleteMixin,
+                               TimestampMixin, live_index, tombstone_index)
+from app.utils.money import DEFAULT_CURRENCY, Money
+
 # Import Client for type annotations only
 if TYPE_CHECKING:
     from app.models import Client, User
 
 
-class Project(db.Model):
+class Project(SoftDeleteMixin, TimestampMixin, InvoiceSummaryMixin,
+              db.Model):
     """
     Represents a project in the application.
     Attributes:
@@ -23,8 +31,20 @@ class Project(db.Model):
         the project.
         user_id (int): The unique identifier of the user associated with the
         project.
+        deleted_at (datetime, optional): When the project was soft-deleted.
+        invoice_count, invoiced_total, paid_total, outstanding_total,
+        pending_count, overdue_count: Running totals of the project's
+        invoices, in cents.
     """
     __tablename__ = 'projects'
+    __table_args__ = (
+        live_index('ix_projects_user_id_live', 'user_id'),
+        live_index('ix_projects_user_id_outstanding_total_live',
+                   'user_id', 'outstanding_total'),
+        live_index('ix_projects_user_id_updated_at_live',
+                   'user_id', 'updated_at'),
+        tombstone_index('ix_projects_deleted_at'),
+    )
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     title: so.Mapped[str] = so.mapped_column(
         sa.String(100), index=True)
@@ -34,7 +54,7 @@ class Project(db.Model):
     end_date: so.Mapped[datetime] = so.mapped_column(
         sa.DateTime, nullable=True)
     client_id: so.Mapped[int] = so.mapped_column(
-        sa.ForeignKey('clients.id'), index=True)
+        sa.ForeignKey('clients.id', ondelete='CASCADE'), index=True)
     user_id: so.Mapped[int] = so.mapped_column(
         sa.ForeignKey('users.id'), index=True)
     client: so.Mapped['Client'] = so.relationship(
@@ -42,7 +62,8 @@ class Project(db.Model):
     user: so.Mapped['User'] = so.relationship(
         'User', back_populates='projects')
     invoices: so.Mapped[list['Invoice']] = so.relationship(
-        'Invoice', back_populates='project', cascade='all, delete-orphan')
+        'Invoice', back_populates='project', cascade='all, delete-orphan',
+        passive_deletes=True)
     # FUTURE: Add extra information such as hourly or fix price etc.
 
 
@@ -65,7 +86,38 @@ class InvoiceStatus(Enum):
         return display_names.get(status, status.value.title())
 
 
-class Invoice(db.Model):
+class InvoiceAmountsMixin:
+    """
+    The amount columns shared by ``Invoice`` and ``ArchivedInvoice``.
+
+    ``amount_cents`` is the total; ``subtotal_cents`` and ``tax_cents`` are
+    maintained from the lines by ``app.utils.invoice_lines.update_totals``.
+    """
+    amount_cents: so.Mapped[int] = so.mapped_column(
+        sa.BigInteger, nullable=False)
+    currency: so.Mapped[str] = so.mapped_column(
+        sa.String(3), nullable=False, default=DEFAULT_CURRENCY,
+        server_default=DEFAULT_CURRENCY)
+    subtotal_cents: so.Mapped[int] = so.mapped_column(
+        sa.BigInteger, nullable=False, default=0, server_default='0')
+    tax_cents: so.Mapped[int] = so.mapped_column(
+        sa.BigInteger, nullable=False, default=0, server_default='0')
+
+    @so.declared_attr
+    def amount(cls) -> so.Mapped[Money]:
+        return so.composite('amount_cents', 'currency')
+
+    @property
+    def subtotal(self) -> Money:
+        return Money(self.subtotal_cents, self.currency)
+
+    @property
+    def tax(self) -> Money:
+        return Money(self.tax_cents, self.currency)
+
+
+class Invoice(SoftDeleteMixin, TimestampMixin, InvoiceAmountsMixin,
+              db.Model):
     """
     Represents an invoice in the application.
 
@@ -73,7 +125,10 @@ class Invoice(db.Model):
         id (int): The unique identifier of the invoice.
         title (str): The title of the invoice.
         description (str, optional): A detailed description of the invoice.
-        amount (float): The amount of the invoice.
+        amount (Money): The total of the invoice, stored as
+        ``amount_cents`` and ``currency``.
+        subtotal_cents (int): The sum of the line amounts before tax.
+        tax_cents (int): The sum of the line taxes.
         issue_date (datetime): The issue date and time of the invoice.
         due_date (datetime): The due date and time of the invoice.
         project_id (int): The unique identifier of the project associated with
@@ -87,11 +142,18 @@ class Invoice(db.Model):
         project (Project): The project associated with the invoice.
         client (Client): The client associated with the invoice.
         user (User): The user associated with the invoice.
+        lines (list[InvoiceLine]): The line items of the invoice.
+        deleted_at (datetime, optional): When the invoice was soft-deleted.
     """
     __tablename__ = 'invoices'
+    __table_args__ = (
+        live_index('ix_invoices_user_id_status_live', 'user_id', 'status'),
+        live_index('ix_invoices_user_id_updated_at_live',
+                   'user_id', 'updated_at'),
+        tombstone_index('ix_invoices_deleted_at'),
+    )
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     date: so.Mapped[datetime] = so.mapped_column(sa.DateTime, nullable=False)
-    amount: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False)
     description: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
     status: so.Mapped[InvoiceStatus] = so.mapped_column(
         sa.Enum(InvoiceStatus),
@@ -100,13 +162,134 @@ class Invoice(db.Model):
     )
 
     project_id: so.Mapped[int] = so.mapped_column(
-        sa.ForeignKey('projects.id'), index=True)
+        sa.ForeignKey('projects.id', ondelete='CASCADE'), index=True)
     project: so.Mapped[Project] = so.relationship(
         'Project', back_populates='invoices')
     user_id: so.Mapped[int] = so.mapped_column(
         sa.ForeignKey('users.id'), index=True)
     user = so.relationship('User', back_populates='invoices')
     client_id: so.Mapped[int] = so.mapped_column(
-        sa.ForeignKey('clients.id'), index=True)
+        sa.ForeignKey('clients.id', ondelete='CASCADE'), index=True)
     client: so.Mapped['Client'] = so.relationship(
         'Client', back_populates='invoices')
+    lines: so.Mapped[list['InvoiceLine']] = so.relationship(
+        'InvoiceLine', back_populates='invoice',
+        order_by='InvoiceLine.position', cascade='all, delete-orphan',
+        passive_deletes=True)
+    is_archived = False
+
+
+class InvoiceLineMixin:
+    """
+    The columns shared by ``InvoiceLine`` and ``ArchivedInvoiceLine``.
+
+    Attributes:
+        position (int): The order of the line on the invoice.
+        description (str): What is being billed.
+        quantity (Decimal): The number of units, e.g. hours.
+        unit_price_cents (int): The price of one unit, in cents of the
+        invoice currency.
+        tax_rate (Decimal): The tax rate in percent, e.g. ``8.25``.
+        subtotal_cents (int): ``quantity * unit_price_cents``, rounded to
+        whole cents. Also usable in SQL.
+        tax_cents (int): The tax on ``subtotal_cents``, rounded to whole
+        cents. Also usable in SQL.
+    """
+    position: so.Mapped[int] = so.mapped_column(
+        sa.Integer, nullable=False, default=0)
+    description: so.Mapped[str] = so.mapped_column(
+        sa.String(200), nullable=False)
+    quantity: so.Mapped[Decimal] = so.mapped_column(
+        sa.Numeric(10, 2), nullable=False, default=1)
+    unit_price_cents: so.Mapped[int] = so.mapped_column(
+        sa.BigInteger, nullable=False)
+    tax_rate: so.Mapped[Decimal] = so.mapped_column(
+        sa.Numeric(5, 2), nullable=False, default=0, server_default='0')
+
+    @property
+    def unit_price(self) -> Decimal:
+        """The unit price in major units, as edited in ``InvoiceForm``."""
+        return Money(self.unit_price_cents).amount
+
+    # Rounded per line, half away from zero like PostgreSQL's round(numeric)
+    @hybrid_property
+    def subtotal_cents(self) -> int:
+        return int((Decimal(self.quantity) * self.unit_price_cents)
+                   .quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    @subtotal_cents.inplace.expression
+    @classmethod
+    def _subtotal_cents_expression(cls):
+        return sa.func.round(cls.quantity * cls.unit_price_cents)
+
+    @hybrid_property
+    def tax_cents(self) -> int:
+        return int((self.subtotal_cents * Decimal(self.tax_rate) / 100)
+                   .quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    @tax_cents.inplace.expression
+    @classmethod
+    def _tax_cents_expression(cls):
+        return sa.func.round(cls.subtotal_cents * cls.tax_rate / 100)
+
+
+class InvoiceLine(InvoiceLineMixin, db.Model):
+    """
+    Represents a line item of an invoice.
+
+    Attributes:
+        id (int): The unique identifier of the line.
+        invoice_id (int): The unique identifier of the invoice the line
+        belongs to.
+        See ``InvoiceLineMixin`` for the other columns.
+    """
+    __tablename__ = 'invoice_lines'
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    invoice_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey('invoices.id', ondelete='CASCADE'), index=True)
+    invoice: so.Mapped[Invoice] = so.relationship(
+        'Invoice', back_populates='lines')
+
+
+class ArchivedInvoice(InvoiceAmountsMixin, db.Model):
+    """
+    A settled invoice moved out of ``invoices`` by ``flask
+    archive-invoices`` (see ``app.utils.archive``).
+
+    Keeps the id and every column of the invoice, so the invoice pages can
+    show it in place of the original. Archived invoices are read-only.
+
+    Attributes:
+        archived_at (datetime): When the invoice was archived.
+        See ``Invoice`` for the other attributes.
+    """
+    __tablename__ = 'invoices_archive'
+    id: so.Mapped[int] = so.mapped_column(
+        primary_key=True, autoincrement=False)
+    date: so.Mapped[datetime] = so.mapped_column(sa.DateTime, nullable=False)
+    description: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    status: so.Mapped[InvoiceStatus] = so.mapped_column(
+        sa.Enum(InvoiceStatus), nullable=False)
+    project_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey('projects.id', ondelete='CASCADE'), index=True)
+    client_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey('clients.id', ondelete='CASCADE'), index=True)
+    user_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey('users.id'), index=True)
+    archived_at: so.Mapped[datetime] = so.mapped_column(
+        sa.DateTime, nullable=False)
+    project: so.Mapped[Project] = so.relationship('Project')
+    client: so.Mapped['Client'] = so.relationship('Client')
+    lines: so.Mapped[list['ArchivedInvoiceLine']] = so.relationship(
+        'ArchivedInvoiceLine', order_by='ArchivedInvoiceLine.position',
+        passive_deletes=True)
+    is_archived = True
+
+
+class ArchivedInvoiceLine(InvoiceLineMixin, db.Model):
+    """A line of an ``ArchivedInvoice``; see ``InvoiceLineMixin``."""
+    __tablename__ = 'invoice_lines_archive'
+    id: so.Mapped[int] = so.mapped_column(
+        primary_key=True, autoincrement=False)
+    invoice_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey('invoices_archive.id', ondelete='CASCADE'), index=True)
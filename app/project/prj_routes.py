@@ -1,12 +1,21 @@
 from flask import flash, redirect, render_template, request, url_for, current_app, abort
-from app.utils.db import paginate_query, search_in_query
+from app.utils.db import (filter_by_balance, get_owned_or_404, paginate_query,
+                          scope_version, search_in_query, sort_query)
 from flask_login import current_user
+import sqlalchemy as sa
+import sqlalchemy.orm as so
 
 from app import db
-from app.models import Client, Project
+from app.models import Client, Invoice, Project
+from app.models.mixins import utcnow
+from app.models.project_models import InvoiceStatus
 from app.project import bp
 from app.project.prj_forms import ProjectForm
+from app.utils.audit import audit
+from app.utils.decorators import conditional
 from app.utils.logger import log_user_action, log_error
+from app.utils.soft_delete import flash_deleted, validate_restore
+from app.utils.summaries import apply_delta, summary_delta
 
 
 @bp.before_request
@@ -28,15 +37,36 @@ def before_request():
 
 
 # View all prj
+# Sort keys accepted by the project list ("-" prefix for descending)
+PROJECT_SORTS = {
+    'title': Project.title,
+    'start': Project.start_date,
+    'balance': Project.outstanding_total,
+    'invoiced': Project.invoiced_total,
+}
+
+
+def _projects_version():
+    return scope_version(
+        (Project, Project.user_id == current_user.id),
+        (Client, Client.user_id == current_user.id),
+    )
+
+
 @bp.route('/', methods=['GET'])
+@conditional(_projects_version)
 def view_all_projects():
     # Show a list of all the projects
+    query = search_in_query(
+        query=Project.query.join(Client).filter(
+            Project.live()).filter_by(user_id=current_user.id),
+        request=request,
+        fields=(Project.title, Project.description, Client.name))
+    query = filter_by_balance(query, request, Project)
+    query = sort_query(query, request, PROJECT_SORTS, default='-start')
     projects = paginate_query(
-        query=search_in_query(
-            query=Project.query.join(Client).filter_by(
-                user_id=current_user.id),
-            request=request,
-            fields=(Project.title, Project.description, Client.name)),
+        query=query.order_by(Project.id).options(
+            so.contains_eager(Project.client)),
         request=request
     )
     return render_template('project/index.html', projects=projects)
@@ -57,7 +87,7 @@ def create_project():
     # the user.
     form.client.choices = [
         (client.id, client.name) for client in Client.query.filter_by(
-            user_id=current_user.id).all()]
+            user_id=current_user.id, deleted_at=None).all()]
     # TODO: Instead of a drop down field for the client, use stringfield with
     # search and auto-complete and suggestion feature.
     if form.validate_on_submit():
@@ -78,20 +108,21 @@ def create_project():
 
 
 # Edit prj
-@bp.route('/update/<prj_id>', methods=['GET', 'POST'])
+@bp.route('/update/<int:prj_id>', methods=['GET', 'POST'])
 def edit_project(prj_id):
-    project = Project.query.get_or_404(prj_id)
+    project = get_owned_or_404(
+        Project, prj_id, so.joinedload(Project.client))
     form = ProjectForm(obj=project)
     form.client.choices = [
         (client.id, client.name) for client in Client.query.filter_by(
-            user_id=current_user.id).all()]
+            user_id=current_user.id, deleted_at=None).all()]
     if form.validate_on_submit():
+        project.title = form.title.data
+        project.description = form.description.data
+        project.start_date = form.start_date.data
+        project.end_date = form.end_date.data
         # Since client field is a select type, value it manually
         project.client_id = form.client.data
-        # Remove client from form so populate_obj() ignores it
-        del form._fields['client']
-        # Populate other fields
-        form.populate_obj(project)
         db.session.commit()
         flash('Project updated!', category='success')
         return redirect(url_for('project.view_project', prj_id=project.id))
@@ -102,28 +133,83 @@ def edit_project(prj_id):
     )
 
 
+# Number of invoices previewed on the project page
+RECENT_INVOICES = 5
+
+
+def _recent_invoices_summary(project_id):
+    """
+    Fetch the most recent invoices of a project together with the count and
+    totals of all its invoices.
+
+    The aggregates are window functions over the whole project, evaluated
+    before the LIMIT, so a single query returns both the preview rows and
+    the summary without loading every invoice.
+    """
+    outstanding = [InvoiceStatus.PENDING, InvoiceStatus.OVERDUE]
+    rows = db.session.execute(
+        sa.select(
+            Invoice,
+            sa.func.count().over().label('count'),
+            sa.func.sum(Invoice.amount_cents).over().label('total'),
+            sa.func.sum(sa.case(
+                (Invoice.status.in_(outstanding), Invoice.amount_cents),
+                else_=0
+            )).over().label('outstanding'),
+        )
+        .where(Invoice.project_id == project_id, Invoice.live())
+        .order_by(Invoice.date.desc(), Invoice.id.desc())
+        .limit(RECENT_INVOICES)
+    ).all()
+    summary = {
+        'count': rows[0].count if rows else 0,
+        'total': rows[0].total if rows else 0,
+        'outstanding': rows[0].outstanding if rows else 0,
+    }
+    return [row.Invoice for row in rows], summary
+
+
+def _project_version(prj_id):
+    client_id = (sa.select(Project.client_id)
+                 .where(Project.id == prj_id).scalar_subquery())
+    return scope_version(
+        (Project, Project.id == prj_id),
+        (Client, Client.id == client_id),
+        (Invoice, Invoice.project_id == prj_id),
+    )
+
+
 # View prj
-@bp.route('/<prj_id>', methods=['GET'])
+@bp.route('/<int:prj_id>', methods=['GET'])
+@conditional(_project_version)
 def view_project(prj_id):
-    project = Project.query.get_or_404(prj_id)
-    return render_template('project/view_project.html', project=project)
+    project = get_owned_or_404(
+        Project, prj_id, so.joinedload(Project.client))
+    recent_invoices, invoice_summary = _recent_invoices_summary(project.id)
+    return render_template(
+        'project/view_project.html',
+        project=project,
+        recent_invoices=recent_invoices,
+        invoice_summary=invoice_summary
+    )
 
 
 # Delete prj
-@bp.route('/delete/<prj_id>', methods=['DELETE'])
+@bp.route('/delete/<int:prj_id>', methods=['DELETE'])
 def delete_project(prj_id):
-    project = Project.query.get_or_404(prj_id)
-
-    # Check authorization
-    if project.user_id != current_user.id:
-        log_error('Unauthorized project deletion attempt', 
-                 user_id=current_user.id,
-                 project_id=prj_id,
-                 ip_address=request.remote_addr)
-        # Always return error page for unauthorized access
-        abort(403)
+    project = get_owned_or_404(
+        Project, prj_id, so.joinedload(Project.client))
 
     try:
+        # Tombstone the invoices with the same timestamp so that undoing
+        # the delete restores exactly the rows it hid.
+        deleted_at = utcnow()
+        invoices = db.session.execute(Invoice.tombstone(
+            Invoice.project_id == project.id, deleted_at=deleted_at))
+        project.deleted_at = deleted_at
+        # The client no longer sees the invoices hidden with the project
+        apply_delta(summary_delta(project, -1), client_id=project.client_id)
+
         # Log the deletion action
         log_user_action(
             'project_deleted',
@@ -131,17 +217,20 @@ def delete_project(prj_id):
             project_id=project.id,
             project_title=project.title,
             client_name=project.client.name,
+            invoices_deleted=invoices.rowcount,
             ip_address=request.remote_addr
         )
 
-        db.session.delete(project)
         db.session.commit()
+        audit('project_deleted', project, invoices_deleted=invoices.rowcount)
+        restore_url = url_for('project.restore_project', prj_id=project.id)
+        flash_deleted('Project deleted.', restore_url)
 
         # Check if it's an AJAX request
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return {'message': 'Project deleted successfully'}, 200
+            return {'message': 'Project deleted successfully',
+                    'restore_url': restore_url}, 200
         else:
-            flash('Project deleted successfully', 'success')
             return redirect(url_for('project.view_all_projects'))
 
     except Exception as e:
@@ -155,3 +244,30 @@ def delete_project(prj_id):
             return {'error': 'Failed to delete project'}, 500
         else:
             abort(500)
+
+
+@bp.route('/restore/<int:prj_id>', methods=['POST'])
+def restore_project(prj_id):
+    validate_restore()
+    project = get_owned_or_404(
+        Project, prj_id, so.joinedload(Project.client), include_deleted=True)
+
+    if project.is_deleted:
+        if project.client.is_deleted:
+            flash('Restore the client of this project first', 'warning')
+            return redirect(url_for('project.view_all_projects'))
+        deleted_at = project.deleted_at
+        db.session.execute(Invoice.untombstone(
+            Invoice.project_id == project.id, deleted_at=deleted_at))
+        project.deleted_at = None
+        apply_delta(summary_delta(project), client_id=project.client_id)
+        log_user_action(
+            'project_restored',
+            user_id=current_user.id,
+            project_id=project.id,
+            ip_address=request.remote_addr
+        )
+        db.session.commit()
+        audit('project_restored', project)
+        flash('Project restored', 'success')
+    return redirect(url_for('project.view_project', prj_id=project.id))
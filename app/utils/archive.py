@@ -0,0 +1,88 @@
+"""
+Cold storage for settled invoices.
+
+``flask archive-invoices`` moves PAID and CANCELLED invoices dated more than
+``INVOICE_ARCHIVE_AFTER_DAYS`` ago, with their lines, from ``invoices`` into
+``invoices_archive``, so the indexes and scans of the hot table only cover
+the invoices still being worked on. The invoice pages fall back to the
+archive, and archived invoices still count in the project and client totals.
+"""
+
+import time
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from app import db
+from app.models import (ArchivedInvoice, ArchivedInvoiceLine, Invoice,
+                        InvoiceLine)
+from app.models.mixins import utcnow
+from app.models.project_models import InvoiceStatus
+
+ARCHIVED_STATUSES = (InvoiceStatus.PAID, InvoiceStatus.CANCELLED)
+
+
+def _copy(source, target, criterion, **values):
+    """INSERT ... SELECT of the rows of ``source`` matching ``criterion``
+    into ``target``, column by column, with extra literal ``values``."""
+    names = [column.name for column in target.__table__.columns
+             if column.name not in values]
+    return sa.insert(target).from_select(
+        names + list(values),
+        sa.select(
+            *(source.__table__.c[name] for name in names),
+            *(sa.literal(value) for value in values.values())
+        ).where(criterion)
+    )
+
+
+def archive_invoices(cutoff: datetime, batch_size: int = 500,
+                     pause: float = 0.0) -> int:
+    """
+    Move the settled invoices dated before ``cutoff`` to the archive.
+
+    Each batch copies the invoices and their lines and deletes the
+    originals (their lines go with them) in one transaction, so an invoice
+    is always in exactly one of the two tables. Soft-deleted invoices are
+    left for ``flask purge-deleted``.
+
+    Args:
+        cutoff (datetime): Invoices with an earlier ``date`` are archived.
+        batch_size (int, optional): Invoices moved per transaction.
+            Defaults to 500.
+        pause (float, optional): Seconds to sleep between batches.
+            Defaults to 0.
+
+    Returns:
+        int: The number of invoices archived.
+    """
+    statuses = list(ARCHIVED_STATUSES)
+    batch = (
+        sa.select(Invoice.id)
+        .where(Invoice.live(), Invoice.status.in_(statuses),
+               Invoice.date < cutoff)
+        .order_by(Invoice.id)
+        .limit(batch_size)
+    )
+    total = 0
+    while True:
+        ids = db.session.scalars(batch).all()
+        if not ids:
+            return total
+        db.session.execute(_copy(
+            Invoice, ArchivedInvoice, Invoice.id.in_(ids),
+            archived_at=utcnow()))
+        db.session.execute(_copy(
+            InvoiceLine, ArchivedInvoiceLine,
+            InvoiceLine.invoice_id.in_(ids)))
+        db.session.execute(
+            sa.delete(Invoice)
+            .where(Invoice.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        total += len(ids)
+        if len(ids) < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,148 @@
+"""
+Fingerprinted static assets for the ClientEase application.
+
+At startup every file under ``app/static`` is hashed, and
+``url_for('static', filename='styles.css')`` builds a URL naming the
+content hash (``/static/styles.3f9c2a1b7d4e.css``). Those URLs change
+whenever the file does, so they are served with a one year, immutable
+``Cache-Control`` and browsers never revalidate them. Files are served from
+their precompressed ``.br``/``.gz`` sibling when the client accepts it; run
+``flask compress-static`` after changing the static files to create them.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Sibling suffix per Content-Encoding, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Files not worth precompressing
+COMPRESSED_SUFFIXES = ('.br', '.gz', '.png', '.jpg', '.jpeg', '.gif',
+                       '.webp', '.ico', '.woff', '.woff2', '.pdf', '.zip')
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _static_files(static_folder: str):
+    """Relative (``/``-separated) paths of the static files, without
+    precompressed siblings."""
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(('.br', '.gz')):
+                continue
+            path = os.path.relpath(os.path.join(root, name), static_folder)
+            yield path.replace(os.sep, '/')
+
+
+class AssetManifest:
+    """Maps static files to their fingerprinted names and back."""
+
+    def __init__(self, static_folder: str):
+        self.static_folder = static_folder
+        self.hashed = {}
+        self.files = {}
+        for filename in _static_files(static_folder):
+            path = os.path.join(static_folder, filename)
+            stem, ext = os.path.splitext(filename)
+            hashed = f'{stem}.{_file_hash(path)}{ext}'
+            self.hashed[filename] = hashed
+            self.files[hashed] = (filename, self._encodings(path))
+
+    @staticmethod
+    def _encodings(path: str) -> tuple:
+        # A sibling older than its file was compressed from a previous
+        # version, so it is ignored
+        mtime = os.path.getmtime(path)
+        return tuple(
+            encoding for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+            and os.path.getmtime(path + suffix) >= mtime)
+
+    def url_defaults(self, endpoint, values) -> None:
+        """Replace the filename of static URLs by the fingerprinted one."""
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = self.hashed.get(
+                values['filename'], values['filename'])
+
+    def send_static_file(self, filename):
+        """The static view: fingerprinted names are served with immutable
+        caching (precompressed when possible), others as usual."""
+        if filename not in self.files:
+            # Files added since startup, and links to the plain names
+            return send_from_directory(self.static_folder, filename)
+        filename, encodings = self.files[filename]
+        accepted = parse_accept_header(request.headers.get('Accept-Encoding'))
+        encoding = next((encoding for encoding in encodings
+                         if accepted.quality(encoding) > 0), None)
+        suffix = dict(ENCODINGS).get(encoding, '')
+        response = send_from_directory(
+            self.static_folder, filename + suffix,
+            mimetype=mimetypes.guess_type(filename)[0]
+            or 'application/octet-stream',
+            max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        if encodings:
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def compress_static_files(static_folder: str) -> list[str]:
+    """
+    Write ``.gz`` (and, with brotli installed, ``.br``) siblings of the
+    compressible static files that lack an up-to-date one.
+
+    Returns:
+        list[str]: The siblings written.
+    """
+    compressors = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        compressors.append(('.br', brotli.compress))
+    written = []
+    for filename in _static_files(static_folder):
+        if filename.lower().endswith(COMPRESSED_SUFFIXES):
+            continue
+        path = os.path.join(static_folder, filename)
+        mtime = os.path.getmtime(path)
+        data = None
+        for suffix, compress in compressors:
+            target = path + suffix
+            if (os.path.exists(target)
+                    and os.path.getmtime(target) >= mtime):
+                continue
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            with open(target, 'wb') as f:
+                f.write(compress(data))
+            written.append(filename + suffix)
+    return written
+
+
+def init_assets(app) -> None:
+    """Fingerprint the static files of ``app`` and serve them through
+    ``AssetManifest`` when ``STATIC_FINGERPRINTS`` is enabled."""
+    if not app.config['STATIC_FINGERPRINTS'] or not app.static_folder:
+        return
+    manifest = AssetManifest(app.static_folder)
+    app.url_defaults(manifest.url_defaults)
+    app.view_functions['static'] = manifest.send_static_file
+    app.extensions['asset_manifest'] = manifest
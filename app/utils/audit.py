@@ -0,0 +1,162 @@
+"""
+Audit history for the ClientEase application.
+
+``audit()`` records an event (a login, a deletion, ...) in the
+``audit_events`` table without slowing the request down: events are
+buffered in memory and a writer thread per worker process inserts them
+with one multi-row INSERT once ``AUDIT_BATCH_SIZE`` events are waiting or
+every ``AUDIT_FLUSH_INTERVAL_MS``. Buffered events are lost if the worker
+is killed, so critical events are instead inserted in the request's own
+transaction and committed (or rolled back) with it.
+"""
+
+import atexit
+import os
+import threading
+
+import sqlalchemy as sa
+from flask import g, has_request_context, request
+from flask_login import current_user
+
+from app import db
+from app.models import AuditEvent
+from app.models.mixins import utcnow
+
+# Events kept while the database is unreachable, per batch size
+MAX_PENDING_BATCHES = 10
+
+
+class AuditBuffer:
+    """Audit rows waiting for the writer thread of this process."""
+
+    def __init__(self, batch_size=100, interval_ms=1000):
+        self.batch_size = batch_size
+        self.interval_ms = interval_ms
+        self.app = None
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        # Events buffered before a fork are the parent's to write; a child
+        # keeping them would insert them twice. The child's first record()
+        # starts its own writer.
+        self._rows = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def configure(self, app) -> None:
+        """Read the buffer settings from the application config."""
+        self.app = app
+        self.batch_size = app.config['AUDIT_BATCH_SIZE']
+        self.interval_ms = app.config['AUDIT_FLUSH_INTERVAL_MS']
+
+    def add(self, row: dict) -> None:
+        """Queue one row; 0 as batch size inserts it right away."""
+        if not self.batch_size:
+            self._insert([row])
+            return
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.batch_size
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.interval_ms / 1000)
+            self._wakeup.clear()
+            self.flush()
+
+    def stop(self) -> None:
+        """Stop the writer thread once it has written the queued rows."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            thread.join()
+            self._stopping.clear()
+        self.flush()
+
+    def flush(self) -> int:
+        """Insert the queued rows; safe to call from any thread."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            self._insert(rows)
+        except Exception as e:
+            with self._lock:
+                # Retry with the next batch, keeping the newest rows
+                self._rows[:0] = rows
+                limit = max(self.batch_size, 1) * MAX_PENDING_BATCHES
+                dropped = len(self._rows) - limit
+                if dropped > 0:
+                    del self._rows[:dropped]
+            self.app.logger.error(
+                f'Failed to write {len(rows)} audit events: {e}',
+                extra={'audit_events_dropped': max(dropped, 0)})
+            return 0
+        return len(rows)
+
+    def _insert(self, rows: list[dict]) -> None:
+        size = self.batch_size or len(rows)
+        with self.app.app_context(), db.engine.begin() as connection:
+            for start in range(0, len(rows), size):
+                connection.execute(sa.insert(AuditEvent).values(
+                    rows[start:start + size]))
+
+
+def audit(action: str, target=None, critical: bool = False,
+          user_id: int | None = None, **details) -> None:
+    """
+    Record an audit event.
+
+    Call it once the change it describes is committed, unless ``critical``
+    is set: the event is then added to the current transaction, and the
+    caller's commit writes both.
+
+    Args:
+        action (str): What happened, e.g. ``"invoice_deleted"``.
+        target (Model | tuple, optional): The row acted on, or its table
+            name and id.
+        critical (bool, optional): Write the event in the request's
+            transaction instead of the buffer. Defaults to False.
+        user_id (int | None, optional): The acting user. Defaults to the
+            logged in user.
+        **details: JSON-serializable context stored with the event.
+    """
+    if target is None or isinstance(target, tuple):
+        object_type, object_id = target or (None, None)
+    else:
+        object_type, object_id = target.__tablename__, target.id
+    row = {
+        'created_at': utcnow(),
+        'action': action,
+        'user_id': user_id,
+        'object_type': object_type,
+        'object_id': object_id,
+        'ip_address': None,
+        'request_id': None,
+        'details': details or None,
+    }
+    if has_request_context():
+        if user_id is None and current_user.is_authenticated:
+            row['user_id'] = current_user.id
+        row['ip_address'] = request.remote_addr
+        row['request_id'] = (g.get('request_id') or '')[:64] or None
+    if critical:
+        db.session.execute(sa.insert(AuditEvent).values(row))
+    else:
+        audit_buffer.add(row)
+
+
+audit_buffer = AuditBuffer()
+atexit.register(audit_buffer.flush)
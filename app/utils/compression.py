@@ -0,0 +1,218 @@
+"""
+Response compression for the ClientEase application.
+
+``CompressionMiddleware`` wraps the WSGI application and compresses
+responses with brotli (when the ``brotli`` package is installed) or gzip,
+whichever the client accepts. Responses smaller than ``COMPRESS_MIN_SIZE``
+bytes, already encoded, or of an already compressed type (PDFs, images,
+archives) or one listed in ``COMPRESS_SKIP_TYPES`` are sent as they are.
+Streamed responses are compressed chunk by chunk and flushed after each
+chunk, so the client still receives them progressively.
+"""
+
+import zlib
+from itertools import chain
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Types that are already compressed; matched as prefixes
+SKIP_TYPES = (
+    'application/pdf', 'application/zip', 'application/gzip',
+    'application/x-gzip', 'application/octet-stream', 'image/', 'audio/',
+    'video/', 'font/woff',
+)
+
+
+class _Gzip:
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(
+            level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli:
+
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """WSGI middleware compressing responses with gzip or brotli."""
+
+    def __init__(self, wsgi_app, min_size=1024, gzip_level=6,
+                 brotli_quality=4, skip_types=()):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.skip_types = SKIP_TYPES + tuple(skip_types)
+
+    def negotiate(self, accept_encoding: str | None) -> str | None:
+        """Return the encoding to use for an ``Accept-Encoding`` header."""
+        accepted = parse_accept_header(accept_encoding)
+        if brotli is not None and accepted.quality('br') > 0:
+            return 'br'
+        if accepted.quality('gzip') > 0:
+            return 'gzip'
+        return None
+
+    def _compressor(self, encoding):
+        if encoding == 'br':
+            return _Brotli(self.brotli_quality)
+        return _Gzip(self.gzip_level)
+
+    def _compressible(self, environ, status, headers) -> bool:
+        code = int(status.split(None, 1)[0])
+        mimetype = headers.get('Content-Type', '').split(';')[0].strip()
+        return not (
+            code < 200 or code in (204, 206, 304)
+            or environ['REQUEST_METHOD'] == 'HEAD'
+            or 'Content-Encoding' in headers
+            or 'Content-Range' in headers
+            or 'no-transform' in headers.get('Cache-Control', '')
+            or not mimetype or mimetype.startswith(self.skip_types)
+        )
+
+    def __call__(self, environ, start_response):
+        response = []
+
+        def capture(status, headers, exc_info=None):
+            response[:] = [status, Headers(headers), exc_info]
+            # Nothing was sent yet, so an error page simply replaces it
+            return self._write_unsupported
+
+        app_iter = self.wsgi_app(environ, capture)
+        chunks = iter(app_iter)
+        head = []
+        try:
+            # start_response may be deferred until the first chunk
+            while not response:
+                head.append(next(chunks))
+        except StopIteration:
+            pass
+        except BaseException:
+            _close(app_iter)
+            raise
+        status, headers, exc_info = response
+
+        if not self._compressible(environ, status, headers):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return _Closing(chain(head, chunks), app_iter)
+        vary = headers.get('Vary')
+        if not vary:
+            headers['Vary'] = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower():
+            headers['Vary'] = f'{vary}, Accept-Encoding'
+        encoding = self.negotiate(environ.get('HTTP_ACCEPT_ENCODING'))
+        length = headers.get('Content-Length', type=int)
+        if encoding is None or (length is not None
+                                and length < self.min_size):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return _Closing(chain(head, chunks), app_iter)
+
+        # Read up to min_size bytes: short bodies are sent as they are, and
+        # bodies that end there are compressed in one go
+        size = sum(map(len, head))
+        try:
+            while size < self.min_size:
+                head.append(next(chunks))
+                size += len(head[-1])
+            finished = length is not None and size >= length
+        except StopIteration:
+            finished = True
+        except BaseException:
+            _close(app_iter)
+            raise
+        if finished and size < self.min_size:
+            _close(app_iter)
+            headers['Content-Length'] = str(size)
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return head
+
+        headers['Content-Encoding'] = encoding
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            # The compressed body is not byte-identical to the original
+            headers['ETag'] = f'W/{etag}'
+        compressor = self._compressor(encoding)
+        if finished:
+            _close(app_iter)
+            body = compressor.compress(b''.join(head)) + compressor.finish()
+            headers['Content-Length'] = str(len(body))
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return [body]
+
+        headers.pop('Content-Length', None)
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return _Closing(
+            self._stream(compressor, chain([b''.join(head)], chunks)),
+            app_iter)
+
+    @staticmethod
+    def _stream(compressor, chunks):
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+    @staticmethod
+    def _write_unsupported(data):
+        raise RuntimeError(
+            'CompressionMiddleware does not support the WSGI write() '
+            'callable')
+
+
+class _Closing:
+    """Iterates ``iterable`` and closes the application's iterator."""
+
+    def __init__(self, iterable, app_iter):
+        self._iterable = iterable
+        self._app_iter = app_iter
+
+    def __iter__(self):
+        return iter(self._iterable)
+
+    def close(self):
+        _close(self._app_iter)
+
+
+def _close(app_iter):
+    if hasattr(app_iter, 'close'):
+        app_iter.close()
+
+
+def init_compression(app) -> None:
+    """Wrap ``app.wsgi_app`` in a ``CompressionMiddleware`` configured from
+    the ``COMPRESS_*`` settings."""
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config['COMPRESS_MIN_SIZE'],
+        gzip_level=app.config['COMPRESS_GZIP_LEVEL'],
+        brotli_quality=app.config['COMPRESS_BROTLI_QUALITY'],
+        skip_types=app.config['COMPRESS_SKIP_TYPES'],
+    )
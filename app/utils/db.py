@@ -1,12 +1,123 @@
+import sqlalchemy as sa
+from app import db
 from app.models import Client
+from app.utils.audit import audit
+from app.utils.logger import log_security_event
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import Query
-from flask import Request
+from flask import Request, abort, request
+from flask_login import current_user
 from sqlalchemy import or_
 
 
 def get_client_by_name(client_name: str, session: Session):
-    return session.query(Client).filter(Client.name == client_name).first()
+    return session.query(Client).filter(
+        Client.name == client_name, Client.live()).first()
+
+
+def _owned_criteria(model, ident, include_deleted):
+    criteria = [model.id == ident]
+    if not include_deleted and hasattr(model, 'deleted_at'):
+        criteria.append(model.deleted_at.is_(None))
+    return criteria
+
+
+def get_owned(model, ident, *options, include_deleted: bool = False):
+    """
+    Fetches a row owned by the current user, or None; see
+    ``get_owned_or_404``.
+    """
+    user_id = current_user.id
+    # Built as a lambda statement: SQLAlchemy caches it per model and
+    # options, so hot lookups skip rebuilding the expression tree and its
+    # cache key on every request
+    stmt = sa.lambda_stmt(lambda: sa.select(model).where(
+        model.id == ident, model.user_id == user_id))
+    if not include_deleted and hasattr(model, 'deleted_at'):
+        stmt += lambda s: s.where(model.deleted_at.is_(None))
+    if options:
+        stmt += lambda s: s.options(*options)
+    return db.session.scalars(stmt).first()
+
+
+def get_owned_or_404(model, ident, *options, include_deleted: bool = False,
+                     fallback=None):
+    """
+    Fetches a row owned by the current user, together with the relations
+    the route needs, in a single query.
+
+    The SELECT is filtered by primary key and ``user_id`` so that the
+    ownership check needs no lazy load of the parent. Only when nothing
+    matches is a second, cheap query for the row's id issued to tell a
+    missing row (404) from one owned by another user (403, logged as a
+    security event).
+
+    Args:
+        model (Model): The mapped class to fetch (must have ``id`` and
+            ``user_id`` columns).
+        ident (int | str): The primary key value.
+        *options: Loader options applied to the query, e.g.
+            ``so.joinedload(Invoice.client)``.
+        include_deleted (bool, optional): Whether soft-deleted rows are
+            returned as well. Defaults to False.
+        fallback (Callable, optional): Called when no row matches, before
+            the id query; a row it returns is used instead, e.g. one looked
+            up in an archive table with ``get_owned``.
+
+    Returns:
+        Model: The matching instance.
+    """
+    obj = get_owned(model, ident, *options, include_deleted=include_deleted)
+    if obj is None and fallback is not None:
+        obj = fallback()
+    if obj is not None:
+        return obj
+
+    # The id as stored, rather than the value taken from the request
+    found = db.session.scalar(sa.select(model.id).where(
+        *_owned_criteria(model, ident, include_deleted)))
+    if found is not None:
+        log_security_event(
+            f'unauthorized_{model.__tablename__}_access',
+            user_id=current_user.id,
+            ip_address=request.remote_addr,
+            resource_id=found,
+            endpoint=request.endpoint
+        )
+        audit(f'unauthorized_{model.__tablename__}_access',
+              (model.__tablename__, found))
+        abort(403)
+    abort(404)
+
+
+def scope_version(*scopes) -> tuple:
+    """
+    Summarizes sets of rows so that any change to them changes the result,
+    for use as the validator of ``decorators.conditional``.
+
+    Each scope is a model and the criteria selecting its rows. For each, the
+    number of live rows (catching deletions) and their newest
+    ``updated_at`` (catching inserts and updates) are computed in a single
+    SELECT; with the ``(user_id, updated_at)`` indexes this costs an index
+    range scan rather than loading and rendering the rows.
+
+    Args:
+        *scopes (tuple): ``(Model, *criteria)`` tuples; the model needs
+            ``deleted_at`` and ``updated_at`` columns.
+
+    Returns:
+        tuple: The count and newest ``updated_at`` of every scope.
+    """
+    columns = []
+    for model, *criteria in scopes:
+        where = (model.live(), *criteria)
+        columns += [
+            sa.select(sa.func.count()).select_from(model).where(*where)
+            .scalar_subquery(),
+            sa.select(sa.func.max(model.updated_at)).where(*where)
+            .scalar_subquery(),
+        ]
+    return tuple(db.session.execute(sa.select(*columns)).one())
 
 
 def paginate_query(
@@ -39,6 +150,71 @@ def paginate_query(
     return query.paginate(page=page, per_page=per_page, error_out=error_out)
 
 
+class LazyPage:
+    """
+    A ``paginate_query`` result that runs its queries on first use.
+
+    Templates can receive it in place of the pagination object: when the
+    block using it is served from the fragment cache, the page is never
+    fetched.
+    """
+
+    def __init__(self, query, request: Request, **kwargs):
+        self._args = (query, request)
+        self._kwargs = kwargs
+        self._page = None
+
+    def _load(self):
+        if self._page is None:
+            self._page = paginate_query(*self._args, **self._kwargs)
+        return self._page
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __iter__(self):
+        return iter(self._load())
+
+
+def lazy_paginate(query, request: Request, **kwargs) -> LazyPage:
+    """Same as ``paginate_query``, deferred until the page is used."""
+    return LazyPage(query, request, **kwargs)
+
+
+def keyset_page(stmt, key, after=None, per_page: int = 50,
+                descending: bool = True):
+    """
+    Fetches one page of a SELECT ordered by a unique column, starting after
+    a given value of that column.
+
+    Unlike ``paginate_query``, no OFFSET or COUNT is run: every page is an
+    index range scan on ``key``, so deep pages cost the same as the first
+    and rows inserted meanwhile do not shift the pages.
+
+    Args:
+        stmt (Select): The SELECT of a single entity, filters applied.
+        key (Column): A unique, indexed column such as ``Model.id``.
+        after (Any, optional): The ``key`` value returned with the previous
+            page. Defaults to None, for the first page.
+        per_page (int, optional): Maximum rows per page. Defaults to 50.
+        descending (bool, optional): Whether to page from the highest key
+            down. Defaults to True.
+
+    Returns:
+        tuple[list, Any]: The rows, and the ``after`` value of the next
+            page or None if this is the last one.
+    """
+    if after is not None:
+        stmt = stmt.where(key < after if descending else key > after)
+    stmt = stmt.order_by(key.desc() if descending else key.asc())
+    # One extra row tells whether there is a next page
+    rows = db.session.scalars(stmt.limit(per_page + 1)).all()
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    return rows, getattr(rows[-1], key.key)
+
+
 def search_in_query(
     query: Query,
     request: Request,
@@ -65,6 +241,40 @@ def search_in_query(
     return query
 
 
+def sort_query(query, request: Request, columns: dict, default: str):
+    """
+    Orders a query by the column named in the "sort" request argument.
+
+    Args:
+        query (Query): The SQLAlchemy query object to order.
+        request (Request): The HTTP request object containing query parameters.
+        columns (dict): Allowed sort keys mapped to columns.
+        default (str): The sort key used when the argument is missing or
+            unknown. Prefix a key with "-" to sort in descending order.
+
+    Returns:
+        Query: The ordered query object.
+    """
+    key = request.args.get('sort', default)
+    if key.lstrip('-') not in columns:
+        key = default
+    column = columns[key.lstrip('-')]
+    return query.order_by(column.desc() if key.startswith('-') else column)
+
+
+def filter_by_balance(query, request: Request, model):
+    """
+    Filters a query on the "balance" request argument: "outstanding" keeps
+    rows with unpaid invoices, "settled" keeps the others.
+    """
+    balance = request.args.get('balance')
+    if balance == 'outstanding':
+        query = query.filter(model.outstanding_total > 0)
+    elif balance == 'settled':
+        query = query.filter(model.outstanding_total <= 0)
+    return query
+
+
 def apply_filters_to_query(query, model, filters):
     """
     Dynamically applies filters to a SQLAlchemy query.
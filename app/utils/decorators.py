@@ -1,7 +1,8 @@
 # Description: This file contains decorators for the application.
 import functools
+import hashlib
 
-from flask import abort
+from flask import abort, current_app, g, make_response, request, session
 from flask_login import current_user
 
 
@@ -28,3 +29,49 @@ def admin_only(view_function):
             return
         return view_function(*args, **kwargs)
     return wrapper
+
+
+def conditional(validator):
+    """
+    Decorator answering conditional GETs of a view with 304 Not Modified.
+
+    ``validator`` is called with the view's arguments and returns a cheap
+    summary of the data the page shows, typically ``scope_version()``
+    counts and newest ``updated_at`` values. The ETag is a hash of it, the
+    user, the full path (page, filters and sort are part of it) and
+    ``ETAG_SALT``. When it matches the client's ``If-None-Match``, the view
+    is not called at all; otherwise the rendered page is tagged with it.
+    Requests with flashed messages pending are always rendered, so the
+    messages are shown. The ETag is also stored as ``g.page_version``, the
+    key of the page's ``{% cache %}`` fragments.
+
+    Args:
+        validator (function): Called as ``validator(*args, **kwargs)``.
+
+    Returns:
+        function: The decorator.
+    """
+    def decorator(view_function):
+        @functools.wraps(view_function)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_function(*args, **kwargs)
+            state = (current_app.config['ETAG_SALT'], current_user.get_id(),
+                     request.full_path, validator(*args, **kwargs))
+            etag = hashlib.sha1(repr(state).encode()).hexdigest()
+            g.page_version = etag
+            if '_flashes' in session:
+                return view_function(*args, **kwargs)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view_function(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            # Cached by the browser only, and revalidated on every use
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
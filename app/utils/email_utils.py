@@ -17,17 +17,35 @@ class EmailClient:
     
     def __init__(self):
         self.api_key = os.environ.get('BREVO_API_KEY')
+        self._api_instance = None
+        self._pid = None
         if not self.api_key:
-            logger.error("BREVO_API_KEY environment variable not set")
-            # TODO: Handle this error
-            return
-            
-            
-        configuration = sib_api_v3_sdk.Configuration()
-        configuration.api_key['api-key'] = self.api_key
-        self.api_client = sib_api_v3_sdk.ApiClient(configuration)
-        self.api_instance = sib_api_v3_sdk.TransactionalEmailsApi(self.api_client)
-        logger.info("EmailClient initialized successfully")
+            logger.error(
+                "BREVO_API_KEY environment variable not set; emails will "
+                "not be sent")
+
+    @property
+    def api_instance(self):
+        """
+        Brevo API instance, created lazily once per process.
+
+        The ApiClient owns a urllib3 connection pool (and a thread pool once
+        async requests are made) that must not be shared across a fork, so
+        it is built on first use and rebuilt whenever the PID changes, e.g.
+        in gunicorn workers forked from a preloaded master. None when no API
+        key is configured.
+        """
+        if not self.api_key:
+            return None
+        if self._api_instance is None or self._pid != os.getpid():
+            configuration = sib_api_v3_sdk.Configuration()
+            configuration.api_key['api-key'] = self.api_key
+            self.api_client = sib_api_v3_sdk.ApiClient(configuration)
+            self._api_instance = sib_api_v3_sdk.TransactionalEmailsApi(
+                self.api_client)
+            self._pid = os.getpid()
+            logger.info("EmailClient initialized successfully")
+        return self._api_instance
     
     def _validate_emails(self, to_emails):
         """Validate email addresses"""
@@ -116,6 +134,10 @@ class EmailClient:
             bool: True if email was queued/sent successfully, False otherwise
         """
         logger.info(f"Preparing to send email to: {to_emails}, subject: {subject}")
+
+        if self.api_instance is None:
+            logger.error("Email not sent: BREVO_API_KEY is not set")
+            return False
         
         # Validate email addresses
         validated_emails = self._validate_emails(to_emails)
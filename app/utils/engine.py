@@ -0,0 +1,191 @@
+"""
+SQLAlchemy engine helpers for the ClientEase application.
+Configures the connection pool and keeps it safe to use across forked worker
+processes and behind PgBouncer.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that logs how long each checkout waited for a connection.
+
+    Only the wait for a free slot is measured: opening a new connection
+    and the pre-ping are left out, so slow connects are not reported as
+    pool contention.
+    """
+
+    # Set from DB_POOL_WAIT_LOG_MS by configure_engine_options()
+    wait_log_threshold_ms = 100
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; time the outer call
+        outer = not getattr(_checkout, 'active', False)
+        if outer:
+            _checkout.active = True
+            _checkout.connecting = 0.0
+            start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if outer:
+                _checkout.active = False
+                self._log_wait(
+                    (time.perf_counter() - start - _checkout.connecting)
+                    * 1000)
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            _checkout.connecting = getattr(_checkout, 'connecting', 0.0) + (
+                time.perf_counter() - start)
+
+    def _log_wait(self, waited_ms: float) -> None:
+        if waited_ms >= self.wait_log_threshold_ms:
+            logger.warning(
+                f"Waited {waited_ms:.1f} ms for a database connection "
+                f"({self.status()})"
+            )
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Waited {waited_ms:.1f} ms for a database connection")
+
+
+# Per-thread state of the checkout being timed
+_checkout = threading.local()
+
+
+# SQLAlchemy names pool loggers after the pool class. Keep this subclass as
+# quiet as the stock ``sqlalchemy.pool`` loggers when the app logs at DEBUG.
+logging.getLogger(f'{__name__}.{TimedQueuePool.__name__}').setLevel(
+    logging.WARNING)
+
+
+def configure_engine_options(app) -> None:
+    """
+    Complete ``SQLALCHEMY_ENGINE_OPTIONS`` before the engine is created.
+
+    PostgreSQL engines, including the ones configured in
+    ``SQLALCHEMY_BINDS``, get a pool that logs checkout wait times. Other
+    databases (SQLite in the tests) keep SQLAlchemy's defaults.
+
+    Args:
+        app (Flask): The application being configured.
+    """
+    TimedQueuePool.wait_log_threshold_ms = app.config.get(
+        'DB_POOL_WAIT_LOG_MS', 100)
+
+    if str(app.config['SQLALCHEMY_DATABASE_URI']).startswith('postgresql'):
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        options.setdefault('poolclass', TimedQueuePool)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    binds = {}
+    for key, options in (app.config.get('SQLALCHEMY_BINDS') or {}).items():
+        if isinstance(options, dict):
+            options = dict(options)
+            if str(options.get('url')).startswith('postgresql'):
+                options.setdefault('poolclass', TimedQueuePool)
+        binds[key] = options
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def install_statement_timeout(engine: Engine, timeout_ms: int) -> None:
+    """
+    Apply ``statement_timeout`` to every transaction with ``SET LOCAL``.
+
+    Used behind PgBouncer in transaction mode, where a timeout set for the
+    whole session (e.g. via the ``options`` startup parameter) would either
+    be rejected by the pooler or leak to other clients sharing the server
+    connection. ``SET LOCAL`` only lasts until the end of the transaction.
+
+    Args:
+        engine (Engine): The engine to configure.
+        timeout_ms (int): The statement timeout in milliseconds.
+    """
+    @sa.event.listens_for(engine, 'begin')
+    def _set_local_timeout(conn):
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(f'SET LOCAL statement_timeout = {int(timeout_ms)}')
+        finally:
+            cursor.close()
+
+
+def install_fork_guard(engine: Engine) -> None:
+    """
+    Invalidate pooled connections that were opened in another process.
+
+    A DBAPI connection must never be shared between a parent process and its
+    forked children. Each connection is tagged with the PID that opened it
+    and is discarded on checkout if the PID no longer matches, so a pool
+    inherited through ``fork()`` quietly reconnects instead of corrupting
+    the parent's socket.
+
+    Args:
+        engine (Engine): The engine whose pool should be guarded.
+    """
+    @sa.event.listens_for(engine, 'connect')
+    def _record_pid(dbapi_connection, connection_record):
+        connection_record.info['pid'] = os.getpid()
+
+    @sa.event.listens_for(engine, 'checkout')
+    def _check_pid(dbapi_connection, connection_record, connection_proxy):
+        pid = os.getpid()
+        if connection_record.info.get('pid') != pid:
+            connection_record.dbapi_connection = None
+            connection_proxy.dbapi_connection = None
+            raise sa.exc.DisconnectionError(
+                f"Connection record belongs to pid "
+                f"{connection_record.info.get('pid')}, attempting to check "
+                f"out in pid {pid}"
+            )
+
+
+def enable_sqlite_foreign_keys(engine: Engine) -> None:
+    """
+    Turn on foreign key enforcement for every SQLite connection.
+
+    SQLite ignores ``FOREIGN KEY`` clauses, including ``ON DELETE CASCADE``,
+    unless ``PRAGMA foreign_keys`` is enabled on each connection. The test
+    suite runs on SQLite and relies on the same cascades as PostgreSQL.
+
+    Args:
+        engine (Engine): A SQLite engine.
+    """
+    @sa.event.listens_for(engine, 'connect')
+    def _enable_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute('PRAGMA foreign_keys=ON')
+        finally:
+            cursor.close()
+
+
+def dispose_engines(db, close: bool = True) -> None:
+    """
+    Dispose the connection pools of every engine registered on ``db``.
+
+    Must be called inside an application context.
+
+    Args:
+        db (SQLAlchemy): The Flask-SQLAlchemy extension instance.
+        close (bool, optional): Whether to close the pooled connections.
+            Pass False in a freshly forked child so the parent's sockets are
+            left untouched and only the child's pool references are dropped.
+            Defaults to True.
+    """
+    for engine in db.engines.values():
+        engine.dispose(close=close)
@@ -0,0 +1,92 @@
+"""
+Rendered fragment cache for the ClientEase application.
+
+Templates wrap expensive blocks, such as the tables of the list pages, in
+
+    {% cache 'invoice-list' %} ... {% endcache %}
+
+and the rendered HTML is kept in a per-worker LRU store bounded to
+``FRAGMENT_CACHE_MAX_BYTES``. A fragment is keyed by its name and the page
+version that ``decorators.conditional`` computes for the request: the user,
+the full path (page, filters and sort) and the count and newest
+``updated_at`` of the rows shown. Every write moves ``updated_at``, so it
+changes the version in all workers and stale fragments simply age out.
+Pages without a version are rendered as usual. Views pass their queries
+lazily (``lazy_paginate()``), so a cached fragment skips the query too.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+from flask import g, has_request_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+class FragmentCache:
+    """Thread-safe LRU store of rendered fragments, bounded in bytes."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, app) -> None:
+        """Read the cache settings from the application config."""
+        self.max_bytes = app.config['FRAGMENT_CACHE_MAX_BYTES']
+        self.clear()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= sys.getsizeof(self._entries.pop(key))
+            self._entries[key] = value
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= sys.getsizeof(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class FragmentCacheExtension(Extension):
+    """The ``{% cache name %}...{% endcache %}`` template tag."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        name = parser.parse_expression()
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render', [name]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, name, caller):
+        version = g.get('page_version') if has_request_context() else None
+        if version is None or not fragment_cache.max_bytes:
+            return caller()
+        key = (name, version)
+        value = fragment_cache.get(key)
+        if value is None:
+            value = caller()
+            fragment_cache.set(key, value)
+        return value
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,120 @@
+"""
+Invoice line items and the totals derived from them.
+
+An invoice's ``subtotal_cents``, ``tax_cents`` and ``amount_cents`` (the
+total) are stored on the invoice and recomputed from its lines by a single
+aggregate UPDATE whenever the lines change. Everything that shows or sums
+invoice totals (the PDF, the dashboard, the lists and the project and client
+summaries) reads those columns instead of aggregating the lines again.
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+from app.models import Invoice, InvoiceLine
+from app.utils.money import Money
+
+
+def line_rows(invoice_id: int, entries) -> list[dict]:
+    """
+    Turn the ``lines`` data of an ``InvoiceForm`` into insertable rows.
+
+    Args:
+        invoice_id (int): The invoice the lines belong to.
+        entries (list[dict]): ``form.lines.data``.
+
+    Returns:
+        list[dict]: One row per line, numbered in form order.
+    """
+    return [
+        {
+            'invoice_id': invoice_id,
+            'position': position,
+            'description': entry['description'],
+            'quantity': entry['quantity'],
+            'unit_price_cents': Money.from_decimal(entry['unit_price']).cents,
+            'tax_rate': entry['tax_rate'] or 0,
+        }
+        for position, entry in enumerate(entries)
+    ]
+
+
+def line_totals(rows) -> tuple[int, int]:
+    """
+    Return the subtotal and tax of an invoice from its ``line_rows``, rounded
+    per line like ``update_totals``, for invoices inserted in bulk with
+    their totals.
+    """
+    lines = [InvoiceLine(**row) for row in rows]
+    return (sum(line.subtotal_cents for line in lines),
+            sum(line.tax_cents for line in lines))
+
+
+def add_lines(invoice: Invoice, entries) -> None:
+    """
+    Add lines to ``invoice`` with one multi-row INSERT and recompute its
+    totals. ``invoice`` must have been flushed so it has an id.
+
+    Args:
+        invoice (Invoice): The invoice to update.
+        entries (list[dict]): ``form.lines.data``.
+
+    Raises:
+        ValueError: If ``entries`` is empty.
+    """
+    if not entries:
+        raise ValueError('An invoice needs at least one line')
+    db.session.execute(
+        sa.insert(InvoiceLine).values(line_rows(invoice.id, entries)))
+    db.session.expire(invoice, ['lines'])
+    update_totals(invoice)
+
+
+def replace_lines(invoice: Invoice, entries) -> None:
+    """Replace the lines of ``invoice`` and recompute its totals."""
+    db.session.execute(
+        sa.delete(InvoiceLine)
+        .where(InvoiceLine.invoice_id == invoice.id)
+        .execution_options(synchronize_session=False)
+    )
+    add_lines(invoice, entries)
+
+
+def update_totals(invoice: Invoice) -> None:
+    """
+    Recompute the subtotal, tax and total of ``invoice`` from its lines in
+    one aggregate UPDATE, and refresh the loaded instance from RETURNING.
+    The invoice must have at least one line.
+
+    Args:
+        invoice (Invoice): The invoice to update.
+    """
+    subtotal = sa.func.sum(InvoiceLine.subtotal_cents)
+    tax = sa.func.sum(InvoiceLine.tax_cents)
+    totals = (
+        sa.select(
+            InvoiceLine.invoice_id,
+            sa.cast(subtotal, sa.BigInteger).label('subtotal'),
+            sa.cast(tax, sa.BigInteger).label('tax'),
+        )
+        .where(InvoiceLine.invoice_id == invoice.id)
+        .group_by(InvoiceLine.invoice_id)
+        .subquery()
+    )
+    row = db.session.execute(
+        sa.update(Invoice)
+        .where(Invoice.id == totals.c.invoice_id)
+        .values(
+            subtotal_cents=totals.c.subtotal,
+            tax_cents=totals.c.tax,
+            amount_cents=totals.c.subtotal + totals.c.tax,
+        )
+        .returning(Invoice.subtotal_cents, Invoice.tax_cents,
+                   Invoice.amount_cents)
+        .execution_options(synchronize_session=False)
+    ).one()
+    for column, value in row._asdict().items():
+        set_committed_value(invoice, column, value)
+    set_committed_value(
+        invoice, 'amount', Money(row.amount_cents, invoice.currency))
@@ -0,0 +1,132 @@
+"""
+Non-blocking logging for the ClientEase application.
+
+Request threads only put log records on a bounded in-memory queue; a
+listener thread per worker process hands them to the console and file
+handlers, so slow disks and log rotations never stall a request. When the
+queue is full, records are dropped and counted instead of blocking, and the
+listener reports the count as a warning. The listener is restarted in forked
+workers and drains the queue when the process exits.
+"""
+
+import atexit
+import copy
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_log_queues = []
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking on a full queue."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge the arguments now, as they may change after the call, but
+        # leave the formatting (and the traceback) to the listener thread
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Called with the handler lock held, so the count is exact
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+
+    def __init__(self, source, *handlers):
+        super().__init__(source.queue, *handlers, respect_handler_level=True)
+        self.source = source
+        self.reported = source.dropped
+
+    def handle(self, record):
+        dropped = self.source.dropped
+        if dropped > self.reported:
+            super().handle(logging.makeLogRecord({
+                'name': record.name,
+                'levelno': logging.WARNING,
+                'levelname': 'WARNING',
+                'msg': f'Log queue full: dropped {dropped - self.reported} '
+                       f'records ({dropped} since start)',
+                'log_records_dropped': dropped,
+            }))
+            self.reported = dropped
+        super().handle(record)
+
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail to stop when the queue is full
+        self.queue.put(self._sentinel)
+
+
+class LogQueue:
+    """A queue handler for ``logger`` and the listener feeding ``handlers``."""
+
+    def __init__(self, logger, handlers, maxsize):
+        self.handlers = handlers
+        self.maxsize = maxsize
+        self.handler = DroppingQueueHandler(queue.Queue(maxsize))
+        self.listener = None
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(self.handler)
+
+    def start(self) -> None:
+        self.listener = _Listener(self.handler, *self.handlers)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Write out the queued records and stop the listener thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _restart_after_fork(self) -> None:
+        if self.listener is None:
+            return
+        # Swap the queue rather than drain it: the parent's listener may
+        # have held its mutex at the moment of the fork
+        self.handler.queue = queue.Queue(self.maxsize)
+        self.handler.dropped = 0
+        self.start()
+
+
+def install_log_queue(logger, handlers, maxsize) -> LogQueue:
+    """
+    Route the records of ``logger`` to ``handlers`` through a queue.
+
+    Args:
+        logger (Logger): The logger, usually ``app.logger``.
+        handlers (list[Handler]): The handlers doing the actual I/O. They
+            are removed from ``logger`` if attached.
+        maxsize (int): Records the queue holds before new ones are dropped.
+
+    Returns:
+        LogQueue: The started queue.
+    """
+    log_queue = LogQueue(logger, handlers, maxsize)
+    log_queue.start()
+    _log_queues.append(log_queue)
+    os.register_at_fork(after_in_child=log_queue._restart_after_fork)
+    return log_queue
+
+
+def stop_log_queues() -> None:
+    """Flush every log queue of this process; safe to call repeatedly."""
+    for log_queue in _log_queues:
+        log_queue.stop()
+
+
+atexit.register(stop_log_queues)
@@ -1,40 +1,160 @@
 """
 Logging utilities for the ClientEase application.
 Provides consistent logging functions and error handling.
+
+Context passed to the helpers travels on the log record (``extra``) and is
+written by the formatters: ``JsonFormatter`` emits one JSON object per
+record for log pipelines, ``TextFormatter`` appends the context to the
+usual text line. Every record logged while handling a request also carries
+its request id, user id, endpoint and elapsed time. The helpers check the
+level first, so disabled levels cost no formatting.
 """
 
-from flask import current_app
+import json
 import logging
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import current_app, g, has_request_context, request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Attributes every LogRecord has; anything else was passed as context
+RECORD_ATTRIBUTES = frozenset(
+    logging.makeLogRecord({}).__dict__) | {'message', 'asctime'}
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+
+def _dumps(payload: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(
+            payload, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(payload, default=str, separators=(',', ':'))
+
+
+def record_context(record) -> dict:
+    """Return the context (``extra``) fields of a log record."""
+    return {key: value for key, value in record.__dict__.items()
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_')}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record and its context as a single-line JSON object."""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(
+                record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'location': f'{record.filename}:{record.lineno}',
+        }
+        payload.update(record_context(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exception'] = record.exc_text
+        return _dumps(payload)
+
+
+class TextFormatter(logging.Formatter):
+    """``LOG_FORMAT`` text lines, followed by the record's context."""
+
+    def format(self, record):
+        line = super().format(record)
+        context = record_context(record)
+        if context:
+            line = f'{line} | {_dumps(context)}'
+        return line
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id, user_id, endpoint and duration_ms to records logged
+    while handling a request, without overriding explicit context."""
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id')
+        if not hasattr(record, 'endpoint'):
+            record.endpoint = request.endpoint
+        if not hasattr(record, 'user_id'):
+            # Only use a user Flask-Login already loaded; loading one here
+            # would run a query from inside logging
+            user = g.get('_login_user')
+            if user is not None and user.is_authenticated:
+                record.user_id = user.get_id()
+        started = g.get('request_started')
+        if started is not None and not hasattr(record, 'duration_ms'):
+            record.duration_ms = round(
+                (time.perf_counter() - started) * 1000, 2)
+        return True
+
+
+def init_request_logging(app) -> None:
+    """
+    Tag each request with an id and add the request context to every
+    record handled by ``app.logger``'s handlers.
+
+    The id is taken from the ``X-Request-ID`` header when a proxy set one,
+    and echoed in the response.
+
+    Args:
+        app (Flask): The application, with its log handlers installed.
+    """
+    context_filter = RequestContextFilter()
+    for handler in app.logger.handlers:
+        handler.addFilter(context_filter)
+
+    @app.before_request
+    def _start_request_log_context():
+        g.request_started = time.perf_counter()
+        g.request_id = (request.headers.get(REQUEST_ID_HEADER)
+                        or uuid.uuid4().hex)
+
+    @app.after_request
+    def _add_request_id_header(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+
+def _log(level, message, context, **kwargs):
+    logger = current_app.logger
+    if logger.isEnabledFor(level):
+        # Context keys may not shadow LogRecord attributes such as "name"
+        extra = {(f'ctx_{key}' if key in RECORD_ATTRIBUTES else key): value
+                 for key, value in context.items()}
+        logger.log(level, message, extra=extra, stacklevel=3, **kwargs)
 
 
 def log_info(message, **kwargs):
     """Log an info message with optional context."""
-    if kwargs:
-        message = f"{message} | Context: {kwargs}"
-    current_app.logger.info(message)
+    _log(logging.INFO, message, kwargs)
 
 
 def log_warning(message, **kwargs):
     """Log a warning message with optional context."""
-    if kwargs:
-        message = f"{message} | Context: {kwargs}"
-    current_app.logger.warning(message)
+    _log(logging.WARNING, message, kwargs)
 
 
 def log_error(message, error=None, **kwargs):
     """Log an error message with optional exception and context."""
-    if error:
-        message = f"{message} | Error: {str(error)}"
-    if kwargs:
-        message = f"{message} | Context: {kwargs}"
-    current_app.logger.error(message, exc_info=error is not None)
+    if error is not None:
+        kwargs['error'] = str(error)
+    _log(logging.ERROR, message, kwargs, exc_info=error)
 
 
 def log_debug(message, **kwargs):
     """Log a debug message with optional context."""
-    if kwargs:
-        message = f"{message} | Context: {kwargs}"
-    current_app.logger.debug(message)
+    _log(logging.DEBUG, message, kwargs)
 
 
 def log_user_action(action, user_id=None, **kwargs):
@@ -43,7 +163,7 @@ def log_user_action(action, user_id=None, **kwargs):
     if user_id:
         context['user_id'] = user_id
     context.update(kwargs)
-    current_app.logger.info(f"User action: {action}", extra=context)
+    _log(logging.INFO, f"User action: {action}", context)
 
 
 def log_security_event(event, user_id=None, ip_address=None, **kwargs):
@@ -54,4 +174,4 @@ def log_security_event(event, user_id=None, ip_address=None, **kwargs):
     if ip_address:
         context['ip_address'] = ip_address
     context.update(kwargs)
-    current_app.logger.warning(f"Security event: {event}", extra=context)
+    _log(logging.WARNING, f"Security event: {event}", context)
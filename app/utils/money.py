@@ -0,0 +1,80 @@
+"""
+Money value type for the ClientEase application.
+
+Amounts are stored as an integer number of minor units (cents) plus an
+ISO 4217 currency code, so sums computed in SQL or Python are exact. Only
+currencies with two decimal places are supported.
+"""
+
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+
+DEFAULT_CURRENCY = 'USD'
+CURRENCIES = ('USD', 'EUR', 'GBP', 'CAD', 'AUD')
+SYMBOLS = {'USD': '$', 'EUR': '€', 'GBP': '£'}
+CENT = Decimal('0.01')
+
+
+@dataclass(frozen=True)
+class Money:
+    """An exact amount of money in cents of ``currency``."""
+    cents: int
+    currency: str = DEFAULT_CURRENCY
+
+    @classmethod
+    def from_decimal(cls, amount, currency: str = DEFAULT_CURRENCY):
+        """
+        Build a Money from a decimal amount of major units.
+
+        Args:
+            amount (Decimal | int | str): The amount, e.g. ``Decimal('12.5')``.
+                Floats are rejected because they are already inexact.
+            currency (str, optional): The currency code. Defaults to USD.
+
+        Returns:
+            Money: The amount rounded half-up to whole cents.
+        """
+        if isinstance(amount, float):
+            raise TypeError('Use Decimal or str amounts, not float')
+        cents = Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP) * 100
+        return cls(int(cents), currency)
+
+    @property
+    def amount(self) -> Decimal:
+        """The amount in major units, e.g. ``Decimal('12.50')``."""
+        return (Decimal(self.cents) / 100).quantize(CENT)
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        if other.currency != self.currency:
+            raise ValueError(
+                f'Cannot add {other.currency} to {self.currency}')
+        return Money(self.cents + other.cents, self.currency)
+
+    def __str__(self) -> str:
+        return format_money(self.cents, self.currency)
+
+
+def format_money(value, currency: str = DEFAULT_CURRENCY) -> str:
+    """
+    Format a Money, or an integer number of cents, for display.
+
+    Registered as the ``money`` template filter.
+
+    Args:
+        value (Money | int | None): The amount to format.
+        currency (str, optional): The currency of a plain cents value.
+            Defaults to USD.
+
+    Returns:
+        str: E.g. ``$1,234.50`` or ``1,234.50 CAD``.
+    """
+    if isinstance(value, Money):
+        value, currency = value.cents, value.currency
+    amount = (Decimal(value or 0) / 100).quantize(CENT)
+    sign = '-' if amount < 0 else ''
+    symbol = SYMBOLS.get(currency)
+    if symbol:
+        return f'{sign}{symbol}{abs(amount):,}'
+    return f'{sign}{abs(amount):,} {currency}'
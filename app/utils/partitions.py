@@ -0,0 +1,290 @@
+"""
+Monthly range partitioning of the invoices table (PostgreSQL only).
+
+Partitioning is opt-in: ``flask partitions convert`` turns ``invoices``
+into a table partitioned by the month of its ``date``, at any schema
+revision. Queries that filter on a date range then only scan the matching
+partitions, and vacuum and index maintenance work on one month at a time.
+
+A partitioned table's primary key must include the partition key, so it
+becomes ``(id, date)`` and ``invoice_lines.invoice_id`` can no longer be a
+foreign key; a trigger deletes the lines of deleted invoices instead.
+
+Once converted, ``flask partitions create`` must run regularly (e.g. monthly
+from cron) to create the partitions ahead of time; invoices outside every
+monthly partition land in ``invoices_default``. ``flask partitions detach``
+detaches old partitions so they can be archived or dropped.
+"""
+
+from datetime import date
+
+import sqlalchemy as sa
+
+PARENT = 'invoices'
+DEFAULT_PARTITION = 'invoices_default'
+PREFIX = 'invoices_p'
+# The table holding the rows while they are copied
+OLD = 'invoices_old'
+LINES_FOREIGN_KEY = 'invoice_lines_invoice_id_fkey'
+DELETE_LINES_FUNCTION = """
+CREATE OR REPLACE FUNCTION invoices_delete_lines() RETURNS trigger AS $$
+BEGIN
+    -- Moving an invoice to another partition (changing its date) is a
+    -- delete followed by an insert, so check it is really gone
+    IF NOT EXISTS (SELECT 1 FROM invoices WHERE id = OLD.id) THEN
+        DELETE FROM invoice_lines WHERE invoice_id = OLD.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def month_start(day) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """E.g. ``invoices_p2026_10`` for October 2026."""
+    return f'{PREFIX}{month:%Y_%m}'
+
+
+def partition_month(name: str) -> date | None:
+    """The month a partition named by ``partition_name`` holds, or None."""
+    if not name.startswith(PREFIX):
+        return None
+    try:
+        year, month = name[len(PREFIX):].split('_')
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def is_partitioned(connection) -> bool:
+    """Whether ``invoices`` has been converted to a partitioned table."""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass(:parent))"
+    ), {'parent': PARENT}).scalar()
+
+
+def list_partitions(connection) -> list[str]:
+    """The names of the partitions currently attached to ``invoices``."""
+    return connection.execute(sa.text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:parent) "
+        "ORDER BY child.relname"
+    ), {'parent': PARENT}).scalars().all()
+
+
+def create_partitions(connection, first: date, last: date) -> list[str]:
+    """
+    Create the monthly partitions from ``first`` to ``last``, inclusive,
+    that do not exist yet.
+
+    Creating a partition fails if ``invoices_default`` already holds rows
+    for its month; create partitions ahead of time to keep it empty.
+
+    Args:
+        connection (Connection): A connection in autocommit mode, so each
+            partition is created in its own short transaction.
+        first (date): A day in the first month.
+        last (date): A day in the last month.
+
+    Returns:
+        list[str]: The names of the partitions created.
+    """
+    existing = set(list_partitions(connection))
+    created = []
+    month = month_start(first)
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            connection.execute(sa.text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT} "
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            ))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(connection, before: date, drop=False,
+                      lock_timeout_ms: int = 5000) -> list[str]:
+    """
+    Detach the monthly partitions holding only invoices dated before the
+    month of ``before``.
+
+    ``DETACH PARTITION ... CONCURRENTLY`` is refused while the table has a
+    default partition, which the conversion always creates, so each
+    partition is detached with a plain ``DETACH``. That takes an ACCESS
+    EXCLUSIVE lock on ``invoices`` and briefly blocks its queries: run it
+    off-peak. ``lock_timeout_ms`` makes a detach waiting behind a long
+    query fail instead of stalling every query queued behind it. Detached
+    invoices no longer count in ``flask reconcile-summaries``.
+
+    Args:
+        connection (Connection): A connection in autocommit mode, so each
+            partition is detached in its own short transaction.
+        before (date): Partitions for months before this one are detached.
+        drop (bool, optional): Also drop the detached partitions and the
+            lines of their invoices. Defaults to False.
+        lock_timeout_ms (int, optional): How long each detach may wait
+            for its lock. Defaults to 5000.
+
+    Returns:
+        list[str]: The names of the partitions detached.
+    """
+    cutoff = month_start(before)
+    detached = []
+    connection.execute(sa.text(f"SET lock_timeout = {int(lock_timeout_ms)}"))
+    try:
+        for name in list_partitions(connection):
+            month = partition_month(name)
+            if month is None or month >= cutoff:
+                continue
+            connection.execute(sa.text(
+                f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+            if drop:
+                connection.execute(sa.text(
+                    f"DELETE FROM invoice_lines "
+                    f"WHERE invoice_id IN (SELECT id FROM {name})"))
+                connection.execute(sa.text(f"DROP TABLE {name}"))
+            detached.append(name)
+    finally:
+        connection.execute(sa.text("RESET lock_timeout"))
+    return detached
+
+
+def _execute(connection, statement: str):
+    return connection.execute(sa.text(statement))
+
+
+def _replace_table(connection, partition_clause: str, primary_key: str):
+    """
+    Move ``invoices`` aside and create an empty table with its columns.
+
+    Returns:
+        tuple[list, list]: The CREATE INDEX statements and the foreign key
+            definitions of ``invoices``, read from the catalog so that
+            every index is recreated, whichever migration added it.
+    """
+    indexes = connection.execute(sa.text(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = :parent "
+        "AND indexname <> :pkey"
+    ), {'parent': PARENT, 'pkey': f'{PARENT}_pkey'}).all()
+    foreign_keys = connection.execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:parent) AND contype = 'f'"
+    ), {'parent': PARENT}).all()
+
+    _execute(connection, f"ALTER TABLE {PARENT} RENAME TO {OLD}")
+    _execute(connection, f"ALTER TABLE {OLD} "
+                         f"RENAME CONSTRAINT {PARENT}_pkey TO {OLD}_pkey")
+    # Free the index names for the new table
+    for name, _ in indexes:
+        _execute(connection, f"DROP INDEX {name}")
+    _execute(connection,
+             f"CREATE TABLE {PARENT} (LIKE {OLD} INCLUDING DEFAULTS "
+             f"INCLUDING CONSTRAINTS){partition_clause}")
+    _execute(connection, f"ALTER TABLE {PARENT} ADD PRIMARY KEY "
+                         f"({primary_key})")
+    # The id sequence would otherwise be dropped with the old table
+    _execute(connection, f"ALTER SEQUENCE {PARENT}_id_seq "
+                         f"OWNED BY {PARENT}.id")
+    # A partitioned table's indexes are defined ON ONLY the parent
+    return ([definition.replace(' ON ONLY ', ' ON ', 1)
+             for _, definition in indexes], foreign_keys)
+
+
+def _copy_rows(connection, indexes, foreign_keys) -> None:
+    """Fill the new table, then index it, which is faster than indexing
+    as the rows arrive."""
+    _execute(connection, f"INSERT INTO {PARENT} SELECT * FROM {OLD}")
+    for definition in indexes:
+        _execute(connection, definition)
+    for name, definition in foreign_keys:
+        _execute(connection,
+                 f"ALTER TABLE {PARENT} ADD CONSTRAINT {name} {definition}")
+
+
+def partition_table(connection, today: date, months_ahead: int = 3
+                    ) -> list[str]:
+    """
+    Convert ``invoices`` into a table partitioned by month of ``date``.
+
+    Every invoice is copied while an exclusive lock is held, so run it in
+    a maintenance window. Monthly partitions are created from the oldest
+    invoice up to ``months_ahead`` months past ``today``, plus
+    ``invoices_default``.
+
+    Args:
+        connection (Connection): A connection inside a transaction, so a
+            failed conversion leaves the table as it was.
+        today (date): A day in the current month.
+        months_ahead (int, optional): Months of partitions created ahead.
+            Defaults to 3.
+
+    Returns:
+        list[str]: The names of the monthly partitions created, or an
+            empty list if ``invoices`` was already partitioned.
+    """
+    if is_partitioned(connection):
+        return []
+    indexes, foreign_keys = _replace_table(
+        connection, ' PARTITION BY RANGE (date)', 'id, date')
+
+    current = month_start(today)
+    first = connection.execute(sa.text(
+        f"SELECT date_trunc('month', min(date))::date FROM {OLD}"
+    )).scalar()
+    created = create_partitions(
+        connection, min(first or current, current),
+        add_months(current, months_ahead))
+    _execute(connection,
+             f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} "
+             f"DEFAULT")
+    _copy_rows(connection, indexes, foreign_keys)
+
+    _execute(connection,
+             f"ALTER TABLE invoice_lines DROP CONSTRAINT {LINES_FOREIGN_KEY}")
+    _execute(connection, f"DROP TABLE {OLD}")
+    _execute(connection, DELETE_LINES_FUNCTION)
+    _execute(connection,
+             f"CREATE TRIGGER invoices_delete_lines AFTER DELETE ON {PARENT} "
+             f"FOR EACH ROW EXECUTE FUNCTION invoices_delete_lines()")
+    return created
+
+
+def unpartition_table(connection) -> None:
+    """
+    Turn a partitioned ``invoices`` back into a plain table, dropping the
+    lines of invoices whose partition was detached.
+
+    Args:
+        connection (Connection): A connection inside a transaction.
+    """
+    if not is_partitioned(connection):
+        return
+    _execute(connection, f"DROP TRIGGER invoices_delete_lines ON {PARENT}")
+    _execute(connection, "DROP FUNCTION invoices_delete_lines()")
+    indexes, foreign_keys = _replace_table(connection, '', 'id')
+    _copy_rows(connection, indexes, foreign_keys)
+    _execute(connection,
+             f"DELETE FROM invoice_lines WHERE NOT EXISTS (SELECT 1 FROM "
+             f"{PARENT} WHERE {PARENT}.id = invoice_lines.invoice_id)")
+    _execute(connection,
+             f"ALTER TABLE invoice_lines ADD CONSTRAINT {LINES_FOREIGN_KEY} "
+             f"FOREIGN KEY (invoice_id) REFERENCES {PARENT} (id) "
+             f"ON DELETE CASCADE")
+    # Drops the partitions with it
+    _execute(connection, f"DROP TABLE {OLD}")
@@ -1,14 +1,17 @@
 from reportlab.lib import colors
 from io import BytesIO
+from xml.sax.saxutils import escape
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import (Paragraph, SimpleDocTemplate, Spacer, Table,
                                 TableStyle)
 
+from app.utils.money import Money
+
 
 def generate_invoice(
     freelancer, client, client_address, project_name, project_description,
-    invoice_date, invoice_number, status, total_amount,
+    invoice_date, invoice_number, status, lines, subtotal, tax, total_amount,
 ):
     """
     Generate a PDF invoice.
@@ -29,19 +32,21 @@ def generate_invoice(
             invoice_date (str): The date the invoice is issued.
             invoice_number (str): A unique identifier for the invoice.
             status (str): The status of the invoice (e.g., "Paid", "Unpaid").
-            total_amount (float): The total amount to be paid for the project.
+            lines (list[InvoiceLine]): The line items of the invoice.
+            subtotal (Money): The sum of the lines before tax.
+            tax (Money): The sum of the line taxes.
+            total_amount (Money): The total amount to be paid for the project.
 
         Returns:
             bytes: The binary content of the generated PDF invoice.
 
         Notes:
             - The function uses the `reportlab` library to generate the PDF.
-            - The invoice includes a table summarizing the project details
-              and total amount.
+            - The invoice includes a table of the line items followed by
+              the subtotal, tax and total, as stored on the invoice.
             - Payment methods are hardcoded as placeholders and should be
               updated as needed.
-            - Future enhancements may include tax calculations or additional
-              styling.
+            - Future enhancements may include additional styling.
 
         Raises:
             ValueError: If any required argument is missing or invalid.
@@ -76,14 +81,29 @@ def generate_invoice(
     elements.append(Paragraph(f"<b>Status:</b> {status}", styles["Normal"]))
     elements.append(Spacer(1, 12))
 
-    # Invoice Items Table
-    data = [["Project", "Description", "Total Amount"]]
-    data.append([project_name, project_description, f"${total_amount:.2f}"])
-
-    # FUTURE: Add the tax calculation here
+    # Project Information
+    elements.append(Paragraph(f"<b>Project:</b> {project_name}",
+                              styles["Normal"]))
+    if project_description:
+        elements.append(Paragraph(escape(project_description), styles["Normal"]))
+    elements.append(Spacer(1, 12))
 
-    # Total Row
-    data.append(["", "", "<b>Total:</b>", f"<b>${total_amount:.2f}</b>"])
+    # Invoice Items Table
+    currency = total_amount.currency
+    data = [["Description", "Quantity", "Unit Price", "Tax", "Amount"]]
+    for line in lines:
+        data.append([
+            Paragraph(escape(line.description), styles["Normal"]),
+            f"{line.quantity:g}",
+            str(Money(line.unit_price_cents, currency)),
+            f"{line.tax_rate:g}%",
+            str(Money(line.subtotal_cents, currency)),
+        ])
+
+    # Total Rows
+    data.append(["", "", "", "Subtotal:", str(subtotal)])
+    data.append(["", "", "", "Tax:", str(tax)])
+    data.append(["", "", "", "Total:", str(total_amount)])
 
     # Table Styling
     table = Table(data)
@@ -94,6 +114,7 @@ def generate_invoice(
         ("GRID", (0, 0), (-1, -1), 1, colors.black),
         ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
         ("FONTNAME", (-2, -1), (-1, -1), "Helvetica-Bold"),
+        ("SPAN", (0, -3), (2, -1)),
     ]))
 
     elements.append(table)
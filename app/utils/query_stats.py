@@ -0,0 +1,158 @@
+"""
+Per-request database instrumentation for the ClientEase application.
+
+Every SQL statement executed while handling a request is counted and timed
+through SQLAlchemy cursor events. At the end of the request the totals are
+emitted as a ``Server-Timing`` header and a structured log record, likely
+N+1 patterns (lazy relationship loads and statements repeated within one
+request) are logged as warnings, and per-endpoint query budgets are checked.
+Slow statements are also handed to the slow query log.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import (current_app, g, has_app_context, has_request_context,
+                   request)
+from sqlalchemy.engine import Engine
+
+from app.utils.slow_queries import slow_query_recorder
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when an endpoint runs more queries than its budget allows."""
+
+
+class QueryStats:
+    """Statement counters collected for a single request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.lazy_loads = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[_WHITESPACE.sub(' ', statement).strip()] += 1
+
+    def repeated(self, threshold: int) -> dict:
+        """Return the statement shapes executed at least ``threshold`` times."""
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+
+def current_query_stats():
+    """Return the stats of the request being handled, or None."""
+    if has_app_context():
+        return g.get('_query_stats')
+    return None
+
+
+@sa.event.listens_for(Engine, 'before_cursor_execute')
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+@sa.event.listens_for(Engine, 'after_cursor_execute')
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = current_query_stats()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    slow_query_recorder.record(
+        statement,
+        elapsed * 1000,
+        request.endpoint if has_request_context() else None
+    )
+
+
+@sa.event.listens_for(so.Session, 'do_orm_execute')
+def _record_lazy_load(orm_execute_state):
+    stats = current_query_stats()
+    if stats is None or not orm_execute_state.is_select:
+        return
+    parent = orm_execute_state.lazy_loaded_from
+    if parent is not None:
+        target = orm_execute_state.bind_mapper
+        stats.lazy_loads[
+            f'{parent.class_.__name__} -> '
+            f'{target.class_.__name__ if target else "?"}'
+        ] += 1
+
+
+def init_query_stats(app) -> None:
+    """
+    Collect query statistics for every request handled by ``app``.
+
+    Controlled by the ``QUERY_STATS_ENABLED`` setting. Endpoints listed in
+    ``QUERY_BUDGETS`` log a warning when they exceed their statement budget,
+    or raise QueryBudgetExceeded when ``QUERY_BUDGET_ENFORCE`` is set (as it
+    is in the tests).
+
+    Args:
+        app (Flask): The application to instrument.
+    """
+    if not app.config.get('QUERY_STATS_ENABLED', True):
+        return
+
+    @app.before_request
+    def _start_query_stats():
+        g._query_stats = QueryStats()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.pop('_query_stats', None)
+        if stats is None:
+            return response
+
+        duration_ms = stats.duration * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={duration_ms:.2f};desc="{stats.count} queries"'
+        )
+
+        logger = current_app.logger
+        endpoint = request.endpoint
+        repeated = stats.repeated(app.config['QUERY_REPEAT_THRESHOLD'])
+        if repeated or stats.lazy_loads:
+            logger.warning(
+                f'Possible N+1 queries in {endpoint}: '
+                f'{len(repeated)} repeated statement(s), '
+                f'lazy loads {dict(stats.lazy_loads)}',
+                extra={
+                    'endpoint': endpoint,
+                    'db_repeated': repeated,
+                    'db_lazy_loads': dict(stats.lazy_loads),
+                }
+            )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f'{endpoint}: {stats.count} queries in {duration_ms:.2f} ms',
+                extra={
+                    'endpoint': endpoint,
+                    'db_queries': stats.count,
+                    'db_time_ms': round(duration_ms, 2),
+                }
+            )
+
+        budget = app.config['QUERY_BUDGETS'].get(endpoint)
+        if budget is not None and stats.count > budget:
+            message = (
+                f'{endpoint} ran {stats.count} queries, '
+                f'budget is {budget}'
+            )
+            if app.config['QUERY_BUDGET_ENFORCE']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
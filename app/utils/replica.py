@@ -0,0 +1,56 @@
+"""
+Read-replica routing for the ClientEase application.
+
+When a ``replica`` bind is configured, ``db.session`` sends queries issued
+while handling safe HTTP methods to the replica and everything else to the
+primary. A request that has written stays on the primary for the rest of the
+request, and the user stays on the primary for
+``REPLICA_READ_YOUR_WRITES_SECONDS`` after a commit so they always see their
+own changes despite replication lag.
+"""
+
+import time
+
+import sqlalchemy as sa
+from flask import current_app, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+# Flask session key holding the timestamp until which reads use the primary
+READ_YOUR_WRITES_KEY = '_primary_until'
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that routes safe reads to the replica."""
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._read_from_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(
+            mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _read_from_replica(self, clause) -> bool:
+        if REPLICA_BIND not in self._db.engines:
+            return False
+        if self._flushing or isinstance(clause, sa.UpdateBase):
+            self._wrote = True
+        if self._wrote:
+            return False
+        if not has_request_context() or request.method not in SAFE_METHODS:
+            return False
+        return session.get(READ_YOUR_WRITES_KEY, 0) < time.time()
+
+
+@sa.event.listens_for(RoutingSession, 'after_commit')
+def _start_read_your_writes_window(db_session):
+    """Pin the user to the primary for a while after they commit a write."""
+    if not db_session._wrote or not has_request_context():
+        return
+    window = current_app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 0)
+    if REPLICA_BIND in db_session._db.engines and window:
+        session[READ_YOUR_WRITES_KEY] = time.time() + window
@@ -0,0 +1,215 @@
+"""
+Slow query log for the ClientEase application.
+
+Statements slower than ``SLOW_QUERY_THRESHOLD_MS`` are fingerprinted (literals
+and bound parameters replaced by ``?``) and aggregated per fingerprint and
+endpoint in a bounded in-memory table. Each worker keeps its own table and
+a background thread periodically writes it to ``SLOW_QUERY_DUMP_DIR``, off
+the request threads, so the ``flask slow-queries`` command can merge the
+tables of all workers. A worker removes its file when it exits, and files
+no longer refreshed (a worker that was killed) are skipped and removed, so
+the merged table covers the running workers only.
+"""
+
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+import time
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r'%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?')
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.I)
+_VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+# Seconds between two dumps of a worker's table
+DUMP_INTERVAL = 60
+# A dump not refreshed for this long belongs to a worker that is gone
+STALE_AFTER = 3 * DUMP_INTERVAL
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a SQL statement so that executions differing only in their
+    literal values or bound parameters share the same fingerprint.
+
+    Args:
+        statement (str): The SQL statement as sent to the database.
+
+    Returns:
+        str: The statement with comments removed, literals and parameters
+            replaced by ``?``, value lists collapsed to ``(...)`` and
+            whitespace collapsed.
+    """
+    statement = _COMMENT.sub(' ', statement)
+    statement = _STRING.sub('?', statement)
+    statement = _PARAM.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _VALUE_LIST.sub('(...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+class SlowQueryRecorder:
+    """Bounded top-K table of slow statements per fingerprint and endpoint."""
+
+    def __init__(self, threshold_ms=200.0, top_k=100, dump_dir=None,
+                 dump_interval=DUMP_INTERVAL):
+        self.threshold_ms = threshold_ms
+        self.top_k = top_k
+        self.dump_dir = dump_dir
+        self.dump_interval = dump_interval
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        # A forked worker starts with an empty table: keeping the master's
+        # entries would count them once per worker in the merged dumps
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def configure(self, app) -> None:
+        """Read the recorder settings from the application config."""
+        self.threshold_ms = app.config['SLOW_QUERY_THRESHOLD_MS']
+        self.top_k = app.config['SLOW_QUERY_TOP_K']
+        self.dump_dir = app.config.get('SLOW_QUERY_DUMP_DIR')
+        if self.dump_dir:
+            os.makedirs(self.dump_dir, exist_ok=True)
+
+    def record(self, statement: str, duration_ms: float,
+               endpoint: str | None = None) -> None:
+        """Add one execution to the table if it was slow enough."""
+        if self.threshold_ms is None or duration_ms < self.threshold_ms:
+            return
+        key = (fingerprint(statement), endpoint or '-')
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.top_k:
+                    # Make room by evicting the least expensive fingerprint
+                    cheapest = min(self._entries,
+                                   key=lambda k: self._entries[k]['total_ms'])
+                    if self._entries[cheapest]['total_ms'] > duration_ms:
+                        return
+                    del self._entries[cheapest]
+                entry = self._entries[key] = {
+                    'fingerprint': key[0],
+                    'endpoint': key[1],
+                    'calls': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                }
+            entry['calls'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            if self.dump_dir and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='slow-query-dump', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.dump_interval)
+            self.dump()
+
+    def top(self, sort='total_ms', limit=None) -> list[dict]:
+        """Return the table sorted by ``total_ms``, ``mean_ms`` or ``calls``."""
+        with self._lock:
+            rows = [dict(entry) for entry in self._entries.values()]
+        return _sorted_rows(rows, sort, limit)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _dump_path(self) -> str:
+        return os.path.join(self.dump_dir, f'slow_queries-{os.getpid()}.json')
+
+    def dump(self) -> None:
+        """Write this process's table to ``<dump_dir>/slow_queries-<pid>.json``."""
+        if not self.dump_dir:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            rows = [dict(entry) for entry in self._entries.values()]
+        if not rows:
+            return
+        path = self._dump_path()
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(rows, f)
+        os.replace(tmp_path, path)
+
+    def close(self) -> None:
+        """Stop dumping and remove this process's file, at process exit.
+
+        A dump already being written may still land; ``load_dumps`` skips
+        it once it is stale.
+        """
+        with self._lock:
+            self._closed = True
+        if self.dump_dir:
+            try:
+                os.remove(self._dump_path())
+            except FileNotFoundError:
+                pass
+
+
+def load_dumps(dump_dir: str, sort='total_ms', limit=None,
+               stale_after=STALE_AFTER) -> list[dict]:
+    """
+    Merge the tables dumped by every running worker into one sorted table.
+
+    Args:
+        dump_dir (str): The directory the workers dump their tables to.
+        sort (str, optional): ``total_ms``, ``mean_ms`` or ``calls``.
+        limit (int | None, optional): Maximum number of rows to return.
+        stale_after (float | None, optional): Files not written for this
+            many seconds are removed instead of merged. Defaults to
+            ``STALE_AFTER``; None merges every file.
+
+    Returns:
+        list[dict]: Rows with fingerprint, endpoint, calls, total_ms,
+            mean_ms and max_ms.
+    """
+    merged = {}
+    now = time.time()
+    for path in glob.glob(os.path.join(dump_dir, 'slow_queries-*.json')):
+        try:
+            if (stale_after is not None
+                    and now - os.path.getmtime(path) > stale_after):
+                os.remove(path)
+                continue
+            with open(path) as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for row in rows:
+            key = (row['fingerprint'], row['endpoint'])
+            entry = merged.setdefault(key, {
+                'fingerprint': row['fingerprint'],
+                'endpoint': row['endpoint'],
+                'calls': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+            })
+            entry['calls'] += row['calls']
+            entry['total_ms'] += row['total_ms']
+            entry['max_ms'] = max(entry['max_ms'], row['max_ms'])
+    return _sorted_rows(list(merged.values()), sort, limit)
+
+
+def _sorted_rows(rows, sort, limit):
+    for row in rows:
+        row['mean_ms'] = row['total_ms'] / row['calls']
+    rows.sort(key=lambda row: row[sort], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+slow_query_recorder = SlowQueryRecorder()
+atexit.register(slow_query_recorder.close)
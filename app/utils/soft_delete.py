@@ -0,0 +1,78 @@
+"""
+Soft-delete helpers for the ClientEase application.
+
+Delete routes only stamp ``deleted_at`` (see ``SoftDeleteMixin``) and flash
+an undo button. Tombstoned rows are removed for good by ``flask
+purge-deleted`` once ``SOFT_DELETE_GRACE_DAYS`` have passed, in small
+batches so the purge never holds long locks on the tables the request
+workers read.
+"""
+
+import time
+from datetime import datetime
+
+import sqlalchemy as sa
+from flask import abort, flash, render_template
+from flask_wtf import FlaskForm
+from markupsafe import Markup
+
+from app import db
+
+
+class RestoreForm(FlaskForm):
+    """The undo button: an empty form carrying the CSRF token."""
+
+
+def flash_deleted(message: str, restore_url: str) -> None:
+    """Flash a success message with an undo button posting to restore_url."""
+    flash(Markup(render_template(
+        '_undo_delete.html', message=message, restore_url=restore_url,
+        form=RestoreForm()
+    )), 'success')
+
+
+def validate_restore() -> None:
+    """Abort with 400 unless the undo button posted a valid CSRF token."""
+    if not RestoreForm().validate_on_submit():
+        abort(400)
+
+
+def purge_deleted(model, cutoff: datetime, batch_size: int = 500,
+                  pause: float = 0.0) -> int:
+    """
+    Hard-delete the rows of ``model`` soft-deleted before ``cutoff``.
+
+    Each batch is its own DELETE and transaction, so locks are held only
+    for ``batch_size`` rows at a time.
+
+    Args:
+        model (Model): A mapped class using ``SoftDeleteMixin``.
+        cutoff (datetime): Rows with an earlier ``deleted_at`` are removed.
+        batch_size (int, optional): Rows deleted per transaction.
+            Defaults to 500.
+        pause (float, optional): Seconds to sleep between batches.
+            Defaults to 0.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    batch = (
+        sa.select(model.id)
+        .where(model.deleted_at < cutoff)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    stmt = (
+        sa.delete(model)
+        .where(model.id.in_(batch))
+        .execution_options(synchronize_session=False)
+    )
+    total = 0
+    while True:
+        deleted = db.session.execute(stmt).rowcount
+        db.session.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,157 @@
+"""
+Denormalized invoice totals on projects and clients.
+
+``Project`` and ``Client`` carry ``invoice_count``, ``invoiced_total``,
+``paid_total``, ``outstanding_total``, ``pending_count`` and
+``overdue_count`` (see ``InvoiceSummaryMixin``) so the list pages can sort
+and filter by balance, and the dashboard count invoices, without
+aggregating the invoices table. Routes that create, edit, delete or restore invoices apply
+the change as an atomic ``col = col + delta`` UPDATE inside their own
+transaction; ``flask reconcile-summaries`` recomputes the totals from the
+invoices, archived ones included, to repair any drift.
+"""
+
+import sqlalchemy as sa
+
+from app import db
+from app.models import ArchivedInvoice, Client, Invoice, Project
+from app.models.project_models import InvoiceStatus
+
+SUMMARY_COLUMNS = (
+    'invoice_count', 'invoiced_total', 'paid_total', 'outstanding_total',
+    'pending_count', 'overdue_count')
+OUTSTANDING = (InvoiceStatus.PENDING, InvoiceStatus.OVERDUE)
+
+
+def invoice_delta(amount_cents: int, status, sign: int = 1) -> dict:
+    """
+    Return how much an invoice contributes to each summary column.
+
+    Args:
+        amount_cents (int): The invoice amount in cents.
+        status (InvoiceStatus | str): The invoice status, or its value.
+        sign (int, optional): 1 to add the invoice, -1 to remove it.
+            Defaults to 1.
+
+    Returns:
+        dict: Summary column name to delta.
+    """
+    status = InvoiceStatus(status)
+    amount = (amount_cents or 0) * sign
+    return {
+        'invoice_count': sign,
+        'invoiced_total': 0 if status is InvoiceStatus.CANCELLED else amount,
+        'paid_total': amount if status is InvoiceStatus.PAID else 0,
+        'outstanding_total': amount if status in OUTSTANDING else 0,
+        'pending_count': sign if status is InvoiceStatus.PENDING else 0,
+        'overdue_count': sign if status is InvoiceStatus.OVERDUE else 0,
+    }
+
+
+def summary_delta(row, sign: int = 1) -> dict:
+    """Return the totals of ``row`` as a delta, e.g. to move a project's
+    invoices in or out of its client's totals."""
+    return {column: getattr(row, column) * sign for column in SUMMARY_COLUMNS}
+
+
+def combine(*deltas: dict) -> dict:
+    return {column: sum(delta[column] for delta in deltas)
+            for column in SUMMARY_COLUMNS}
+
+
+def apply_delta(delta: dict, project_id=None, client_id=None) -> None:
+    """
+    Add ``delta`` to the totals of a project and/or client.
+
+    The project is always updated before the client so that concurrent
+    transactions lock the rows in the same order.
+    """
+    values = {column: value for column, value in delta.items() if value}
+    if not values:
+        return
+    for model, ident in ((Project, project_id), (Client, client_id)):
+        if ident is None:
+            continue
+        db.session.execute(
+            sa.update(model)
+            .where(model.id == ident)
+            .values({getattr(model, column): getattr(model, column) + value
+                     for column, value in values.items()})
+            .execution_options(synchronize_session=False)
+        )
+
+
+def apply_deltas(changes) -> None:
+    """
+    Add the deltas of many invoices to their projects and clients, with one
+    UPDATE per project and client.
+
+    Args:
+        changes (Iterable[tuple]): ``(delta, project_id, client_id)`` per
+            invoice.
+    """
+    projects, clients = {}, {}
+    for delta, project_id, client_id in changes:
+        for totals, ident in ((projects, project_id), (clients, client_id)):
+            totals[ident] = combine(
+                totals.get(ident, dict.fromkeys(SUMMARY_COLUMNS, 0)), delta)
+    # Projects before clients, each in id order, as in apply_delta
+    for project_id in sorted(projects):
+        apply_delta(projects[project_id], project_id=project_id)
+    for client_id in sorted(clients):
+        apply_delta(clients[client_id], client_id=client_id)
+
+
+def reconcile(model, foreign_key) -> int:
+    """
+    Recompute the totals of every row of ``model`` from its invoices,
+    including the archived ones.
+
+    Args:
+        model (Model): ``Project`` or ``Client``.
+        foreign_key (Column): The invoice column referencing ``model``.
+
+    Returns:
+        int: The number of rows updated.
+    """
+    outstanding = list(OUTSTANDING)
+
+    def totals(invoices, *criteria):
+        def aggregate(expression):
+            return (
+                sa.select(sa.func.coalesce(expression, 0))
+                .where(getattr(invoices, foreign_key.key) == model.id,
+                       *criteria)
+                .scalar_subquery()
+            )
+
+        def amount_if(criterion):
+            return sa.func.sum(
+                sa.case((criterion, invoices.amount_cents), else_=0))
+
+        def count_if(criterion):
+            return sa.func.sum(sa.case((criterion, 1), else_=0))
+
+        return {
+            'invoice_count': aggregate(sa.func.count(invoices.id)),
+            'invoiced_total': aggregate(
+                amount_if(invoices.status != InvoiceStatus.CANCELLED)),
+            'paid_total': aggregate(
+                amount_if(invoices.status == InvoiceStatus.PAID)),
+            'outstanding_total': aggregate(
+                amount_if(invoices.status.in_(outstanding))),
+            'pending_count': aggregate(
+                count_if(invoices.status == InvoiceStatus.PENDING)),
+            'overdue_count': aggregate(
+                count_if(invoices.status == InvoiceStatus.OVERDUE)),
+        }
+
+    hot = totals(Invoice, sa.or_(Invoice.deleted_at.is_(None),
+                                 Invoice.deleted_at == model.deleted_at))
+    archived = totals(ArchivedInvoice)
+    return db.session.execute(
+        sa.update(model)
+        .values({column: hot[column] + archived[column]
+                 for column in SUMMARY_COLUMNS})
+        .execution_options(synchronize_session=False)
+    ).rowcount
@@ -0,0 +1,39 @@
+"""
+Compiled template cache for the ClientEase application.
+
+Jinja compiles a template to Python source and then to bytecode the first
+time it is used, which makes the first requests of every fresh worker slow.
+With ``TEMPLATE_CACHE_DIR`` set, the bytecode is stored in that directory
+and shared by all workers and restarts; entries are keyed by the template
+source checksum, so an edited template is simply compiled again. Run
+``flask precompile-templates`` during the build to fill it, and the
+gunicorn master loads every template before forking so workers start with
+them in memory.
+"""
+
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_template_cache(app) -> None:
+    """Store the compiled templates of ``app`` in ``TEMPLATE_CACHE_DIR``."""
+    cache_dir = app.config.get('TEMPLATE_CACHE_DIR')
+    if not cache_dir:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+
+def precompile_templates(app) -> list[str]:
+    """
+    Load every template of ``app``, compiling those missing from the
+    bytecode cache.
+
+    Returns:
+        list[str]: The names of the templates loaded.
+    """
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
@@ -0,0 +1,136 @@
+"""
+Benchmark the Python-side cost of building the hot statements of a request.
+
+Compares the statements issued by a dashboard request (nine counters, two
+lists), ``load_user`` and one ownership lookup, built as plain ``select()``
+constructs versus cached lambda statements. Each variant builds the
+statements and generates their cache keys, which is the work SQLAlchemy
+repeats on every execution before it can reuse the compiled SQL. No database
+round trips are included.
+
+Usage:
+    python benchmarks/statement_construction.py [--requests N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# config.py validates DATABASE_URL at import time; no connection is made here
+os.environ.setdefault('DATABASE_URL', 'postgresql://localhost/benchmark')
+
+import sqlalchemy as sa  # noqa: E402
+
+from app.models import Client, Invoice, Project, User  # noqa: E402
+from app.models.project_models import InvoiceStatus  # noqa: E402
+
+
+def _dates():
+    now = datetime.now(tz=timezone.utc)
+    return now, now + timedelta(days=7), now - timedelta(days=30)
+
+
+def plain_request(user_id, invoice_id):
+    now, week_from_now, month_ago = _dates()
+    outstanding = [InvoiceStatus.PENDING, InvoiceStatus.OVERDUE]
+    return [
+        sa.select(User).where(User.id == user_id),
+        sa.select(sa.func.count(Client.id)).where(Client.user_id == user_id),
+        sa.select(sa.func.count(Client.id)).where(sa.and_(
+            Client.user_id == user_id, Client.created_at >= month_ago)),
+        sa.select(sa.func.count(Project.id)).where(
+            Project.user_id == user_id),
+        sa.select(sa.func.count(Project.id)).where(sa.and_(
+            Project.user_id == user_id, Project.end_date.is_(None))),
+        sa.select(sa.func.count(Project.id)).where(sa.and_(
+            Project.user_id == user_id, Project.end_date.isnot(None),
+            Project.end_date <= week_from_now, Project.end_date >= now)),
+        sa.select(sa.func.count(Invoice.id)).where(
+            Invoice.user_id == user_id),
+        sa.select(sa.func.count(Invoice.id)).where(sa.and_(
+            Invoice.user_id == user_id,
+            Invoice.status == InvoiceStatus.PENDING)),
+        sa.select(sa.func.count(Invoice.id)).where(sa.and_(
+            Invoice.user_id == user_id,
+            Invoice.status == InvoiceStatus.OVERDUE)),
+        sa.select(sa.func.sum(Invoice.amount_cents)).where(sa.and_(
+            Invoice.user_id == user_id, Invoice.status.in_(outstanding))),
+        sa.select(Project).where(Project.user_id == user_id)
+        .order_by(Project.start_date.desc()).limit(5),
+        sa.select(Invoice).where(sa.and_(
+            Invoice.user_id == user_id,
+            Invoice.status == InvoiceStatus.PENDING,
+            Invoice.date <= week_from_now, Invoice.date >= now))
+        .order_by(Invoice.date.asc()).limit(5),
+        sa.select(Invoice).where(Invoice.id == invoice_id),
+    ]
+
+
+def lambda_request(user_id, invoice_id):
+    now, week_from_now, month_ago = _dates()
+    outstanding = [InvoiceStatus.PENDING, InvoiceStatus.OVERDUE]
+    model = Invoice
+    return [
+        sa.lambda_stmt(lambda: sa.select(User).where(User.id == user_id)),
+        sa.lambda_stmt(lambda: sa.select(sa.func.count(Client.id)).where(
+            Client.user_id == user_id)),
+        sa.lambda_stmt(lambda: sa.select(sa.func.count(Client.id)).where(
+            sa.and_(Client.user_id == user_id,
+                    Client.created_at >= month_ago))),
+        sa.lambda_stmt(lambda: sa.select(sa.func.count(Project.id)).where(
+            Project.user_id == user_id)),
+        sa.lambda_stmt(lambda: sa.select(sa.func.count(Project.id)).where(
+            sa.and_(Project.user_id == user_id,
+                    Project.end_date.is_(None)))),
+        sa.lambda_stmt(lambda: sa.select(sa.func.count(Project.id)).where(
+            sa.and_(Project.user_id == user_id, Project.end_date.isnot(None),
+                    Project.end_date <= week_from_now,
+                    Project.end_date >= now))),
+        sa.lambda_stmt(lambda: sa.select(sa.func.count(Invoice.id)).where(
+            Invoice.user_id == user_id)),
+        sa.lambda_stmt(lambda: sa.select(sa.func.count(Invoice.id)).where(
+            sa.and_(Invoice.user_id == user_id,
+                    Invoice.status == InvoiceStatus.PENDING))),
+        sa.lambda_stmt(lambda: sa.select(sa.func.count(Invoice.id)).where(
+            sa.and_(Invoice.user_id == user_id,
+                    Invoice.status == InvoiceStatus.OVERDUE))),
+        sa.lambda_stmt(lambda: sa.select(
+            sa.func.sum(Invoice.amount_cents)).where(
+            sa.and_(Invoice.user_id == user_id,
+                    Invoice.status.in_(outstanding)))),
+        sa.lambda_stmt(lambda: sa.select(Project)
+                       .where(Project.user_id == user_id)
+                       .order_by(Project.start_date.desc()).limit(5)),
+        sa.lambda_stmt(lambda: sa.select(Invoice).where(sa.and_(
+            Invoice.user_id == user_id,
+            Invoice.status == InvoiceStatus.PENDING,
+            Invoice.date <= week_from_now, Invoice.date >= now))
+            .order_by(Invoice.date.asc()).limit(5)),
+        sa.lambda_stmt(lambda: sa.select(model).where(model.id == invoice_id)),
+    ]
+
+
+def build(factory, user_id=1, invoice_id=1):
+    for statement in factory(user_id, invoice_id):
+        statement._generate_cache_key()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    sa.orm.configure_mappers()
+    for name, factory in (('plain select()', plain_request),
+                          ('lambda_stmt()', lambda_request)):
+        build(factory)  # warm up the lambda cache
+        seconds = timeit.timeit(
+            lambda: build(factory), number=args.requests)
+        print(f'{name:16s} {seconds / args.requests * 1e6:8.1f} us/request')
+
+
+if __name__ == '__main__':
+    main()
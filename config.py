@@ -1,5 +1,6 @@
 import os
 import logging
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -22,8 +23,10 @@ class Config:
     if db_url.startswith('postgres://'):
         db_url = db_url.replace('postgres://', 'postgresql://', 1)
     
-    # Validate that it's a PostgreSQL connection
-    if not db_url.startswith('postgresql://'):
+    # Validate that it's a PostgreSQL connection, through psycopg2 (the
+    # default) or psycopg 3
+    if not db_url.startswith(('postgresql://', 'postgresql+psycopg2://',
+                              'postgresql+psycopg://')):
         raise ValueError(
             "Only PostgreSQL database connections are supported. "
             f"Provided URL: {db_url[:20]}..."
@@ -32,6 +35,49 @@ class Config:
     SQLALCHEMY_DATABASE_URI = db_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection Pool Configuration
+    # PGBOUNCER: '' (direct connection), 'session' or 'transaction'. In
+    # transaction mode the server connection changes between transactions,
+    # so no session-level state (startup options, SET, prepared statements)
+    # may be relied upon.
+    PGBOUNCER = os.getenv('PGBOUNCER', '').lower()
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))
+    # Checkouts waiting longer than this are logged as warnings
+    DB_POOL_WAIT_LOG_MS = int(os.getenv('DB_POOL_WAIT_LOG_MS', 100))
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.getenv(
+            'DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        'connect_args': {
+            'application_name': os.getenv(
+                'DB_APPLICATION_NAME', 'client-ease'),
+        },
+    }
+    if PGBOUNCER == 'transaction':
+        # psycopg 3 prepares statements server-side after a few executions
+        if db_url.startswith('postgresql+psycopg://'):
+            SQLALCHEMY_ENGINE_OPTIONS['connect_args']['prepare_threshold'] = (
+                None)
+    elif DB_STATEMENT_TIMEOUT_MS:
+        SQLALCHEMY_ENGINE_OPTIONS['connect_args']['options'] = (
+            f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}')
+
+    # Read Replica Configuration
+    # Optional hot standby that serves reads from GET/HEAD/OPTIONS requests.
+    # After committing a write, a user reads from the primary for
+    # REPLICA_READ_YOUR_WRITES_SECONDS to hide replication lag.
+    replica_url = os.getenv('REPLICA_DATABASE_URL')
+    if replica_url and replica_url.startswith('postgres://'):
+        replica_url = replica_url.replace('postgres://', 'postgresql://', 1)
+    SQLALCHEMY_BINDS = {
+        'replica': {'url': replica_url, **SQLALCHEMY_ENGINE_OPTIONS},
+    } if replica_url else {}
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(
+        os.getenv('REPLICA_READ_YOUR_WRITES_SECONDS', 5))
+
     SALTS = {
         'reset_password': os.getenv('SECURITY_PASSWORD_SALT'),
         'verify_email': os.getenv('EMAIL_VERIFICATION_SALT')
@@ -51,6 +97,85 @@ class Config:
     REMEMBER_COOKIE_HTTPONLY = True  # Prevent JavaScript access
     REMEMBER_COOKIE_SAMESITE = 'Lax'  # CSRF protection
     
+    # Query Instrumentation
+    QUERY_STATS_ENABLED = os.getenv(
+        'QUERY_STATS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    # Statements repeated this many times in one request are flagged as N+1
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 3))
+    # Maximum number of statements per request (including loading the user
+    # and the conditional GET validator)
+    QUERY_BUDGETS = {
+        'main.dashboard': 13,
+        'invoice.get_invoices': 4,
+        'client.index': 4,
+        'client.view_client': 7,
+        'project.view_project': 4,
+    }
+    # Raise instead of logging a warning when a budget is exceeded
+    QUERY_BUDGET_ENFORCE = False
+
+    # Slow Query Log
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+    # Number of (fingerprint, endpoint) pairs kept per worker
+    SLOW_QUERY_TOP_K = int(os.getenv('SLOW_QUERY_TOP_K', 100))
+    # Workers write their tables here for the `flask slow-queries` command
+    SLOW_QUERY_DUMP_DIR = os.path.join(base_dir, 'logs', 'slow_queries')
+
+    # Soft Delete
+    # Deleted rows can be restored for this many days before
+    # `flask purge-deleted` removes them
+    SOFT_DELETE_GRACE_DAYS = int(os.getenv('SOFT_DELETE_GRACE_DAYS', 30))
+
+    # Invoice Archive
+    # `flask archive-invoices` moves paid and cancelled invoices older than
+    # this many days to the invoices_archive table
+    INVOICE_ARCHIVE_AFTER_DAYS = int(
+        os.getenv('INVOICE_ARCHIVE_AFTER_DAYS', 365))
+
+    # JSON API
+    API_PER_PAGE = 50
+    API_MAX_PER_PAGE = 200
+    # Rows accepted by one bulk create or update request
+    API_MAX_BULK_ROWS = 500
+
+    # Static Files
+    # Serve static files at content-hashed URLs, cached for a year
+    STATIC_FINGERPRINTS = True
+
+    # Templates
+    # Compiled templates are stored here, shared by the workers and filled
+    # at build time by `flask precompile-templates`; empty disables it
+    TEMPLATE_CACHE_DIR = os.getenv(
+        'TEMPLATE_CACHE_DIR', os.path.join(base_dir, '.jinja_cache'))
+
+    # Conditional GETs
+    # Part of every page ETag, so pages cached by browsers are re-rendered
+    # after a deploy. Defaults to the start time; set it to the release
+    # (e.g. the git commit) to share ETags between servers and restarts.
+    ETAG_SALT = os.getenv('ETAG_SALT') or str(time.time())
+    # Memory for the rendered list tables of each worker; 0 disables the
+    # fragment cache
+    FRAGMENT_CACHE_MAX_BYTES = int(
+        os.getenv('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+    # Response Compression
+    # Responses smaller than this many bytes are sent uncompressed
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = 6
+    # Used instead of gzip when the brotli package is installed
+    COMPRESS_BROTLI_QUALITY = 4
+    # Types sent uncompressed besides the already compressed ones (PDFs,
+    # images, archives), matched as prefixes
+    COMPRESS_SKIP_TYPES = ()
+
+    # Audit Events
+    # Events are inserted in batches of this size, or after the interval
+    # if fewer are waiting. 0 inserts each event as it is recorded.
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 100))
+    AUDIT_FLUSH_INTERVAL_MS = int(os.getenv('AUDIT_FLUSH_INTERVAL_MS', 1000))
+    # Events per page of the admin audit log
+    AUDIT_EVENTS_PER_PAGE = 50
+
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FORMAT = (
@@ -58,6 +183,12 @@ class Config:
         '%(filename)s:%(lineno)d - %(message)s'
     )
     LOG_FILE = os.path.join(base_dir, 'logs', 'app.log')
+    # One JSON object per record, including its context, for log pipelines;
+    # otherwise LOG_FORMAT lines followed by the context
+    LOG_JSON = os.getenv('LOG_JSON', 'true').lower() in ('1', 'true', 'yes')
+    # Records buffered for the background log writer; further records are
+    # dropped (and counted) while it is full. 0 logs synchronously.
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
     
     # Create logs directory if it doesn't exist
     os.makedirs(os.path.join(base_dir, 'logs'), exist_ok=True)
@@ -65,10 +196,19 @@ class Config:
 
 class TestConfig(Config):
     TESTING = True
+    SECRET_KEY = os.getenv('SECRET_KEY', 'test-secret-key')
     SQLALCHEMY_DATABASE_URI = 'sqlite:///memory:'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLALCHEMY_BINDS = {}
     WTF_CSRF_ENABLED = False
     LOG_LEVEL = 'DEBUG'  # More verbose logging for tests
+    LOG_QUEUE_SIZE = 0  # Log synchronously, without a thread per app
+    LOG_JSON = False
+    AUDIT_BATCH_SIZE = 0  # Write audit events without a writer thread
+    QUERY_BUDGET_ENFORCE = True
+    SLOW_QUERY_DUMP_DIR = None
+    TEMPLATE_CACHE_DIR = None
     
     # Disable secure cookies for testing
     SESSION_COOKIE_SECURE = False
@@ -77,7 +217,11 @@ class TestConfig(Config):
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    # Static files change without a restart while developing
+    STATIC_FINGERPRINTS = False
     LOG_LEVEL = 'DEBUG'
+    LOG_JSON = os.getenv(
+        'LOG_JSON', 'false').lower() in ('1', 'true', 'yes')
     
     # Allow insecure cookies for local development (HTTP)
     SESSION_COOKIE_SECURE = False
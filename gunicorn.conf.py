@@ -0,0 +1,119 @@
+"""
+Gunicorn configuration for ClientEase.
+
+The application is imported once in the master (``preload_app``) and the
+workers are forked from it, so the app, its templates and imported modules
+are shared copy-on-write instead of being rebuilt by every worker; every
+template is loaded in ``when_ready`` for the same reason. Anything
+that holds sockets or threads (the SQLAlchemy pools, the email client) is
+reset in ``post_fork``; queued log records and audit events are written
+out in ``worker_exit``, which also removes the worker's slow query dump.
+
+Worker and thread counts are derived from the CPUs and memory actually
+available to the container and can be overridden with environment
+variables:
+
+- ``WEB_CONCURRENCY``: number of worker processes.
+- ``GUNICORN_THREADS``: threads per worker.
+- ``GUNICORN_WORKER_MEMORY_MB``: expected resident memory per worker, used
+  to cap the worker count (default 150).
+- ``GUNICORN_PRELOAD``: set to ``0`` to disable preloading.
+"""
+
+import math
+import os
+
+
+def _cpu_count():
+    """Return the number of CPUs this process may run on."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    # Respect a cgroup v2 CPU quota such as "200000 100000" (2 CPUs)
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            count = min(count, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(count, 1)
+
+
+def _memory_mb():
+    """Return the memory available to this container in megabytes."""
+    limits = []
+    for path in ('/sys/fs/cgroup/memory.max',
+                 '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value != 'max':
+                limits.append(int(value))
+        except (OSError, ValueError):
+            pass
+    try:
+        limits.append(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES'))
+    except (AttributeError, ValueError, OSError):
+        pass
+    # cgroup v1 reports a huge sentinel value when unlimited, so the
+    # physical memory figure wins in that case.
+    return min(limits) // (1024 * 1024) if limits else None
+
+
+def _worker_count(cpus, memory_mb):
+    if os.getenv('WEB_CONCURRENCY'):
+        return max(int(os.environ['WEB_CONCURRENCY']), 1)
+    workers = 2 * cpus + 1
+    if memory_mb:
+        per_worker = int(os.getenv('GUNICORN_WORKER_MEMORY_MB', 150))
+        workers = min(workers, memory_mb // per_worker)
+    return max(workers, 1)
+
+
+_cpus = _cpu_count()
+_target_concurrency = 2 * _cpus + 1
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') != '0'
+workers = _worker_count(_cpus, _memory_mb())
+# When memory caps the worker count, make up the difference with threads
+threads = int(os.getenv(
+    'GUNICORN_THREADS', max(math.ceil(_target_concurrency / workers), 1)))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+
+def when_ready(server):
+    """Load every template in the master, so forked workers start with
+    them compiled."""
+    if not preload_app:
+        return
+    from app.utils.template_cache import precompile_templates
+
+    precompile_templates(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    """Drop the connection pools inherited from the master."""
+    if not preload_app:
+        return
+    from app import db
+    from app.utils.engine import dispose_engines
+
+    flask_app = worker.app.wsgi()
+    with flask_app.app_context():
+        dispose_engines(db, close=False)
+
+
+def worker_exit(server, worker):
+    """Write out the audit events and log records still queued in the
+    worker, and remove its slow query dump so it is no longer merged."""
+    from app.utils.audit import audit_buffer
+    from app.utils.log_queue import stop_log_queues
+    from app.utils.slow_queries import slow_query_recorder
+
+    audit_buffer.stop()
+    slow_query_recorder.close()
+    stop_log_queues()
@@ -0,0 +1,103 @@
+"""Invoices archive
+
+Revision ID: 3b9d52e8f6a0
+Revises: e4a1d07b9c52
+Create Date: 2026-10-19 19:05:37.215904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d52e8f6a0'
+down_revision = 'e4a1d07b9c52'
+branch_labels = None
+depends_on = None
+
+# Reuse the type created with the invoices table
+INVOICE_STATUS = postgresql.ENUM(
+    'PENDING', 'PAID', 'OVERDUE', 'CANCELLED', name='invoicestatus',
+    create_type=False)
+
+
+def upgrade():
+    op.create_table(
+        'invoices_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('status', INVOICE_STATUS, nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('client_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.Column('amount_cents', sa.BigInteger(), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False,
+                  server_default='USD'),
+        sa.Column('subtotal_cents', sa.BigInteger(), nullable=False,
+                  server_default='0'),
+        sa.Column('tax_cents', sa.BigInteger(), nullable=False,
+                  server_default='0'),
+        sa.ForeignKeyConstraint(['client_id'], ['clients.id'],
+                                ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'],
+                                ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('invoices_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_invoices_archive_client_id'),
+                              ['client_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_invoices_archive_project_id'),
+                              ['project_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_invoices_archive_user_id'),
+                              ['user_id'], unique=False)
+
+    op.create_table(
+        'invoice_lines_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('invoice_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('description', sa.String(length=200), nullable=False),
+        sa.Column('quantity', sa.Numeric(precision=10, scale=2),
+                  nullable=False),
+        sa.Column('unit_price_cents', sa.BigInteger(), nullable=False),
+        sa.Column('tax_rate', sa.Numeric(precision=5, scale=2),
+                  nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['invoice_id'], ['invoices_archive.id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('invoice_lines_archive',
+                              schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_invoice_lines_archive_invoice_id'),
+            ['invoice_id'], unique=False)
+
+
+def downgrade():
+    # Move archived invoices back rather than losing them
+    invoice_columns = ('id, date, description, status, project_id, '
+                       'client_id, user_id, amount_cents, currency, '
+                       'subtotal_cents, tax_cents')
+    line_columns = ('id, invoice_id, position, description, quantity, '
+                    'unit_price_cents, tax_rate')
+    op.execute(f"INSERT INTO invoices ({invoice_columns}) "
+               f"SELECT {invoice_columns} FROM invoices_archive")
+    op.execute(f"INSERT INTO invoice_lines ({line_columns}) "
+               f"SELECT {line_columns} FROM invoice_lines_archive")
+
+    with op.batch_alter_table('invoice_lines_archive',
+                              schema=None) as batch_op:
+        batch_op.drop_index(
+            batch_op.f('ix_invoice_lines_archive_invoice_id'))
+
+    op.drop_table('invoice_lines_archive')
+    with op.batch_alter_table('invoices_archive', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_invoices_archive_user_id'))
+        batch_op.drop_index(batch_op.f('ix_invoices_archive_project_id'))
+        batch_op.drop_index(batch_op.f('ix_invoices_archive_client_id'))
+
+    op.drop_table('invoices_archive')
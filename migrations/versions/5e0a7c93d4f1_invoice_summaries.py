@@ -0,0 +1,66 @@
+"""Invoice summaries on projects and clients
+
+Revision ID: 5e0a7c93d4f1
+Revises: d81f4b2c6e39
+Create Date: 2026-10-19 11:48:53.620417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0a7c93d4f1'
+down_revision = 'd81f4b2c6e39'
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text('deleted_at IS NULL')
+PARENTS = (('projects', 'project_id'), ('clients', 'client_id'))
+
+
+def upgrade():
+    for table, _ in PARENTS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(
+                'invoice_count', sa.Integer(), nullable=False,
+                server_default='0'))
+            for column in ('invoiced_total', 'paid_total',
+                           'outstanding_total'):
+                batch_op.add_column(sa.Column(
+                    column, sa.Float(), nullable=False, server_default='0'))
+            batch_op.create_index(
+                f'ix_{table}_user_id_outstanding_total_live',
+                ['user_id', 'outstanding_total'], unique=False,
+                postgresql_where=LIVE)
+
+    # Backfill; same definition as app.utils.summaries.reconcile
+    for table, foreign_key in PARENTS:
+        invoices = (
+            f"FROM invoices WHERE invoices.{foreign_key} = {table}.id "
+            f"AND (invoices.deleted_at IS NULL "
+            f"OR invoices.deleted_at = {table}.deleted_at)"
+        )
+        op.execute(
+            f"UPDATE {table} SET "
+            f"invoice_count = (SELECT count(invoices.id) {invoices}), "
+            f"invoiced_total = (SELECT coalesce(sum(CASE WHEN "
+            f"invoices.status != 'CANCELLED' THEN invoices.amount ELSE 0 "
+            f"END), 0) {invoices}), "
+            f"paid_total = (SELECT coalesce(sum(CASE WHEN "
+            f"invoices.status = 'PAID' THEN invoices.amount ELSE 0 "
+            f"END), 0) {invoices}), "
+            f"outstanding_total = (SELECT coalesce(sum(CASE WHEN "
+            f"invoices.status IN ('PENDING', 'OVERDUE') THEN invoices.amount "
+            f"ELSE 0 END), 0) {invoices})"
+        )
+
+
+def downgrade():
+    for table, _ in PARENTS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_user_id_outstanding_total_live')
+            batch_op.drop_column('outstanding_total')
+            batch_op.drop_column('paid_total')
+            batch_op.drop_column('invoiced_total')
+            batch_op.drop_column('invoice_count')
@@ -0,0 +1,46 @@
+"""Audit events
+
+Revision ID: 8c4f2a7e1d93
+Revises: 3b9d52e8f6a0
+Create Date: 2026-10-19 20:41:08.517302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f2a7e1d93'
+down_revision = '3b9d52e8f6a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'audit_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'),
+                  nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('action', sa.String(length=40), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('object_type', sa.String(length=30), nullable=True),
+        sa.Column('object_id', sa.Integer(), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('request_id', sa.String(length=64), nullable=True),
+        sa.Column('details', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('audit_events', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_events_user_id_id',
+                              ['user_id', 'id'], unique=False)
+        batch_op.create_index('ix_audit_events_action_id',
+                              ['action', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_events_action_id')
+        batch_op.drop_index('ix_audit_events_user_id_id')
+
+    op.drop_table('audit_events')
@@ -0,0 +1,112 @@
+"""Invoice amounts in cents
+
+Revision ID: 9b47e2d1c085
+Revises: 5e0a7c93d4f1
+Create Date: 2026-10-19 12:31:06.118542
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b47e2d1c085'
+down_revision = '5e0a7c93d4f1'
+branch_labels = None
+depends_on = None
+
+# Rows converted per transaction, so the backfill never locks the whole
+# invoices table
+BATCH_SIZE = 5000
+SUMMARY_TOTALS = ('invoiced_total', 'paid_total', 'outstanding_total')
+PARENTS = (('projects', 'project_id'), ('clients', 'client_id'))
+
+
+def _to_cents(column):
+    if op.get_bind().dialect.name == 'postgresql':
+        # Go through NUMERIC so 0.29 becomes 29, not 28.999999999999996
+        return f'CAST(round(CAST({column} AS NUMERIC) * 100) AS BIGINT)'
+    return f'CAST(round({column} * 100) AS INTEGER)'
+
+
+def _run_in_batches(statement):
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while bind.execute(sa.text(statement)).rowcount:
+            pass
+
+
+def _recompute_summaries():
+    # Same definition as app.utils.summaries.reconcile
+    for table, foreign_key in PARENTS:
+        invoices = (
+            f"FROM invoices WHERE invoices.{foreign_key} = {table}.id "
+            f"AND (invoices.deleted_at IS NULL "
+            f"OR invoices.deleted_at = {table}.deleted_at)"
+        )
+
+        def total(condition):
+            return (
+                f"(SELECT coalesce(sum(CASE WHEN {condition} "
+                f"THEN invoices.amount_cents ELSE 0 END), 0) {invoices})"
+            )
+
+        invoiced = total("invoices.status != 'CANCELLED'")
+        paid = total("invoices.status = 'PAID'")
+        outstanding = total("invoices.status IN ('PENDING', 'OVERDUE')")
+        op.execute(
+            f"UPDATE {table} SET invoiced_total = {invoiced}, "
+            f"paid_total = {paid}, outstanding_total = {outstanding}"
+        )
+
+
+def upgrade():
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('amount_cents', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column(
+            'currency', sa.String(length=3), nullable=False,
+            server_default='USD'))
+
+    _run_in_batches(
+        f"UPDATE invoices SET amount_cents = {_to_cents('amount')} "
+        f"WHERE id IN (SELECT id FROM invoices WHERE amount_cents IS NULL "
+        f"LIMIT {BATCH_SIZE})"
+    )
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.alter_column('amount_cents', nullable=False)
+        batch_op.drop_column('amount')
+
+    for table, _ in PARENTS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in SUMMARY_TOTALS:
+                batch_op.alter_column(
+                    column, type_=sa.BigInteger(), existing_nullable=False,
+                    existing_server_default='0',
+                    postgresql_using=_to_cents(column))
+    # Rebuild the totals from the exact amounts rather than keeping the
+    # rounded float sums
+    _recompute_summaries()
+
+
+def downgrade():
+    for table, _ in PARENTS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in SUMMARY_TOTALS:
+                batch_op.alter_column(
+                    column, type_=sa.Float(), existing_nullable=False,
+                    existing_server_default='0',
+                    postgresql_using=f'{column} / 100.0')
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('amount', sa.Float(), nullable=True))
+    _run_in_batches(
+        f"UPDATE invoices SET amount = amount_cents / 100.0 "
+        f"WHERE id IN (SELECT id FROM invoices WHERE amount IS NULL "
+        f"LIMIT {BATCH_SIZE})"
+    )
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.alter_column('amount', nullable=False)
+        batch_op.drop_column('currency')
+        batch_op.drop_column('amount_cents')
@@ -0,0 +1,39 @@
+"""Cascade deletes in the database
+
+Revision ID: a3c9e51f7b20
+Revises: 6fc32bf85409
+Create Date: 2026-10-19 10:12:44.518203
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e51f7b20'
+down_revision = '6fc32bf85409'
+branch_labels = None
+depends_on = None
+
+
+# (table, constraint name, local column, referred table)
+FOREIGN_KEYS = [
+    ('projects', 'projects_client_id_fkey', 'client_id', 'clients'),
+    ('invoices', 'invoices_project_id_fkey', 'project_id', 'projects'),
+    ('invoices', 'invoices_client_id_fkey', 'client_id', 'clients'),
+]
+
+
+def _recreate_foreign_keys(ondelete):
+    for table, name, column, referred in FOREIGN_KEYS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(
+                name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _recreate_foreign_keys(ondelete='CASCADE')
+
+
+def downgrade():
+    _recreate_foreign_keys(ondelete=None)
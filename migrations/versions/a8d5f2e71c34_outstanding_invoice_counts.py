@@ -0,0 +1,48 @@
+"""Outstanding invoice counts on projects and clients
+
+Revision ID: a8d5f2e71c34
+Revises: c7e2a9f41b06
+Create Date: 2026-10-20 14:02:37.518926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d5f2e71c34'
+down_revision = 'c7e2a9f41b06'
+branch_labels = None
+depends_on = None
+
+PARENTS = (('projects', 'project_id'), ('clients', 'client_id'))
+COUNTS = (('pending_count', 'PENDING'), ('overdue_count', 'OVERDUE'))
+
+
+def upgrade():
+    for table, _ in PARENTS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, _ in COUNTS:
+                batch_op.add_column(sa.Column(
+                    column, sa.Integer(), nullable=False,
+                    server_default='0'))
+
+    # Backfill; same definition as app.utils.summaries.reconcile. Archived
+    # invoices are settled, so only the hot table is counted.
+    for table, foreign_key in PARENTS:
+        invoices = (
+            f"FROM invoices WHERE invoices.{foreign_key} = {table}.id "
+            f"AND (invoices.deleted_at IS NULL "
+            f"OR invoices.deleted_at = {table}.deleted_at)"
+        )
+        op.execute(f"UPDATE {table} SET " + ", ".join(
+            f"{column} = (SELECT count(invoices.id) {invoices} "
+            f"AND invoices.status = '{status}')"
+            for column, status in COUNTS))
+
+
+def downgrade():
+    for table, _ in PARENTS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, _ in reversed(COUNTS):
+                batch_op.drop_column(column)
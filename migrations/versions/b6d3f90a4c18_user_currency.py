@@ -0,0 +1,48 @@
+"""User currency
+
+Revision ID: b6d3f90a4c18
+Revises: f1c83e5a9d27
+Create Date: 2026-10-19 22:40:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d3f90a4c18'
+down_revision = 'f1c83e5a9d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column(
+            'currency', sa.String(length=3), nullable=False,
+            server_default='USD'))
+
+    # Accounts whose invoices all share a currency keep it. Accounts that
+    # mixed currencies stay on USD; their summary totals were already
+    # wrong and their old invoices keep their own currency.
+    op.execute(sa.text("""
+        UPDATE users SET currency = COALESCE((
+            SELECT MIN(currency) FROM (
+                SELECT currency FROM invoices WHERE user_id = users.id
+                UNION ALL
+                SELECT currency FROM invoices_archive
+                WHERE user_id = users.id
+            ) AS used
+            HAVING COUNT(DISTINCT currency) = 1
+        ), 'USD')
+        WHERE EXISTS (
+            SELECT 1 FROM invoices WHERE user_id = users.id
+            UNION ALL
+            SELECT 1 FROM invoices_archive WHERE user_id = users.id
+        )
+    """))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('currency')
@@ -0,0 +1,84 @@
+"""Invoice line items
+
+Revision ID: c2f86a41e7d3
+Revises: 9b47e2d1c085
+Create Date: 2026-10-19 17:58:12.402716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f86a41e7d3'
+down_revision = '9b47e2d1c085'
+branch_labels = None
+depends_on = None
+
+# Invoices converted per transaction, so the backfill never locks the whole
+# invoices table
+BATCH_SIZE = 5000
+
+
+def _run_in_batches(statement):
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while bind.execute(sa.text(statement)).rowcount:
+            pass
+
+
+def upgrade():
+    op.create_table(
+        'invoice_lines',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('invoice_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('description', sa.String(length=200), nullable=False),
+        sa.Column('quantity', sa.Numeric(precision=10, scale=2),
+                  nullable=False),
+        sa.Column('unit_price_cents', sa.BigInteger(), nullable=False),
+        sa.Column('tax_rate', sa.Numeric(precision=5, scale=2),
+                  nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['invoice_id'], ['invoices.id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('invoice_lines', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_invoice_lines_invoice_id'),
+                              ['invoice_id'], unique=False)
+
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.add_column(sa.Column(
+            'subtotal_cents', sa.BigInteger(), nullable=False,
+            server_default='0'))
+        batch_op.add_column(sa.Column(
+            'tax_cents', sa.BigInteger(), nullable=False,
+            server_default='0'))
+
+    # Every existing invoice becomes a single untaxed line for its amount
+    _run_in_batches(
+        f"INSERT INTO invoice_lines (invoice_id, position, description, "
+        f"quantity, unit_price_cents, tax_rate) "
+        f"SELECT id, 0, coalesce(nullif(substr(description, 1, 200), ''), "
+        f"'Services'), 1, amount_cents, 0 FROM invoices "
+        f"WHERE NOT EXISTS (SELECT 1 FROM invoice_lines "
+        f"WHERE invoice_lines.invoice_id = invoices.id) "
+        f"ORDER BY id LIMIT {BATCH_SIZE}"
+    )
+    _run_in_batches(
+        f"UPDATE invoices SET subtotal_cents = amount_cents "
+        f"WHERE id IN (SELECT id FROM invoices "
+        f"WHERE subtotal_cents <> amount_cents LIMIT {BATCH_SIZE})"
+    )
+
+
+def downgrade():
+    # amount_cents already holds each invoice's total
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_column('tax_cents')
+        batch_op.drop_column('subtotal_cents')
+
+    with op.batch_alter_table('invoice_lines', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_invoice_lines_invoice_id'))
+
+    op.drop_table('invoice_lines')
@@ -0,0 +1,35 @@
+"""Client email unique among live clients
+
+Revision ID: c7e2a9f41b06
+Revises: b6d3f90a4c18
+Create Date: 2026-10-20 09:14:51.602377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a9f41b06'
+down_revision = 'b6d3f90a4c18'
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text('deleted_at IS NULL')
+
+
+def upgrade():
+    # Soft-deleted clients no longer hold on to their email until purged
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_index('ix_clients_email')
+        batch_op.create_index(
+            'ix_clients_email_live', ['email'], unique=True,
+            postgresql_where=LIVE, sqlite_where=LIVE)
+
+
+def downgrade():
+    # Fails while a deleted client shares its email with another client;
+    # purge or rename those first
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_index('ix_clients_email_live')
+        batch_op.create_index('ix_clients_email', ['email'], unique=True)
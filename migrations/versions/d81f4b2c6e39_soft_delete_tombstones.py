@@ -0,0 +1,56 @@
+"""Soft delete tombstones
+
+Revision ID: d81f4b2c6e39
+Revises: a3c9e51f7b20
+Create Date: 2026-10-19 11:02:17.904311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f4b2c6e39'
+down_revision = 'a3c9e51f7b20'
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text('deleted_at IS NULL')
+TOMBSTONED = sa.text('deleted_at IS NOT NULL')
+
+
+def upgrade():
+    for table in ('clients', 'projects', 'invoices'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column('deleted_at', sa.DateTime(), nullable=True))
+            batch_op.create_index(
+                f'ix_{table}_deleted_at', ['deleted_at'], unique=False,
+                postgresql_where=TOMBSTONED)
+
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_clients_user_id_live', ['user_id'], unique=False,
+            postgresql_where=LIVE)
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_projects_user_id_live', ['user_id'], unique=False,
+            postgresql_where=LIVE)
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_invoices_user_id_status_live', ['user_id', 'status'],
+            unique=False, postgresql_where=LIVE)
+
+
+def downgrade():
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_index('ix_invoices_user_id_status_live')
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index('ix_projects_user_id_live')
+    with op.batch_alter_table('clients', schema=None) as batch_op:
+        batch_op.drop_index('ix_clients_user_id_live')
+
+    for table in ('invoices', 'projects', 'clients'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_deleted_at')
+            batch_op.drop_column('deleted_at')
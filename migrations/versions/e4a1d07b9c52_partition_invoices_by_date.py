@@ -0,0 +1,51 @@
+"""Optionally partition invoices by date
+
+Opt-in and PostgreSQL only. Prefer ``flask partitions convert``, which
+converts ``invoices`` at any revision; ``flask db upgrade -x
+partition_invoices=true`` still converts it here, for deployments that
+relied on it. Without the flag this revision changes nothing.
+
+Downgrading past this revision turns a partitioned ``invoices`` back into a
+plain table, whichever way it was converted.
+
+Revision ID: e4a1d07b9c52
+Revises: c2f86a41e7d3
+Create Date: 2026-10-19 18:20:44.903318
+
+"""
+from datetime import date
+
+from alembic import context, op
+
+from app.utils.partitions import partition_table, unpartition_table
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a1d07b9c52'
+down_revision = 'c2f86a41e7d3'
+branch_labels = None
+depends_on = None
+
+# Partitions created past the current month; `flask partitions create`
+# keeps extending them
+MONTHS_AHEAD = 3
+
+
+def _opted_in():
+    flag = context.get_x_argument(as_dictionary=True).get(
+        'partition_invoices', '')
+    return flag.lower() in ('1', 'true', 'yes')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not _opted_in():
+        return
+    partition_table(bind, date.today(), MONTHS_AHEAD)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    unpartition_table(bind)
@@ -0,0 +1,46 @@
+"""Updated at timestamps
+
+Revision ID: f1c83e5a9d27
+Revises: 8c4f2a7e1d93
+Create Date: 2026-10-19 21:26:43.180559
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c83e5a9d27'
+down_revision = '8c4f2a7e1d93'
+branch_labels = None
+depends_on = None
+
+LIVE = sa.text('deleted_at IS NULL')
+TABLES = ('clients', 'projects', 'invoices')
+
+
+def _utcnow():
+    # Timestamps are naive UTC. The expression is not volatile, so
+    # PostgreSQL fills the existing rows without rewriting the tables.
+    if op.get_bind().dialect.name == 'postgresql':
+        return sa.text("timezone('utc', now())")
+    return sa.text('CURRENT_TIMESTAMP')
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(
+                'updated_at', sa.DateTime(), nullable=False,
+                server_default=_utcnow()))
+            batch_op.create_index(
+                f'ix_{table}_user_id_updated_at_live',
+                ['user_id', 'updated_at'], unique=False,
+                postgresql_where=LIVE)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_user_id_updated_at_live')
+            batch_op.drop_column('updated_at')
@@ -1,6 +1,8 @@
 import pytest
 
 from app import create_app, db
+from app.commands import seed_db
+from app.models import User
 from config import TestConfig
 
 
@@ -9,6 +11,8 @@ def app():
     app = create_app(config_class=TestConfig)
     with app.app_context():
         db.create_all()
+        # Users reference a role, which SQLite now enforces
+        app.test_cli_runner().invoke(seed_db)
         yield app
         db.session.remove()
         db.drop_all()
@@ -17,3 +21,25 @@ def app():
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture()
+def user(app):
+    user = User(
+        first_name='Jane',
+        last_name='Doe',
+        email='jane.doe@example.com',
+        email_verified=True,
+    )
+    user.set_password('Password123')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture()
+def auth_client(client, user):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
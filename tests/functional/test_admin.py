@@ -0,0 +1,39 @@
+import sqlalchemy as sa
+
+from app import db
+from app.models import AuditEvent, Client
+from app.utils.audit import audit
+
+
+def test_audit_log_pages_newest_first(app, auth_client, user):
+    """
+    GIVEN an admin and audit events, one of them from deleting a client
+    WHEN the audit log is paged through
+    THEN each page holds the next older events, with an "Older" link
+        until the last page
+    """
+    client = Client(name='Acme', email='acme@example.com', user_id=user.id)
+    db.session.add(client)
+    user.role_id = 1
+    db.session.commit()
+    auth_client.delete(f'/client/{client.id}/delete')
+    deleted = db.session.scalars(sa.select(AuditEvent)).one()
+    assert (deleted.action, deleted.user_id) == ('client_deleted', user.id)
+    assert (deleted.object_type, deleted.object_id) == ('clients', client.id)
+    with app.test_request_context():
+        for n in range(4):
+            audit('test_event', n=n)
+    app.config['AUDIT_EVENTS_PER_PAGE'] = 2
+
+    pages, url = [], '/admin/audit'
+    while url:
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        pages.append([n for n in range(4) if f'{{"n": {n}}}' in html]
+                     + (['deleted'] if 'client_deleted' in html else []))
+        url = None
+        if 'Older' in html:
+            url = '/admin/audit?after=' + html.split('after=')[1].split('"')[0]
+
+    assert pages == [[2, 3], [0, 1], ['deleted']]
@@ -0,0 +1,117 @@
+from datetime import datetime
+
+from app import db
+from app.models import Client, Invoice, Project, User
+from app.utils.summaries import SUMMARY_COLUMNS, reconcile
+
+
+def _clients(auth_client, *names):
+    response = auth_client.post('/api/v1/clients', json=[
+        {'name': name, 'email': f'{name.lower()}@example.com'}
+        for name in names])
+    assert response.status_code == 201
+    return [row['id'] for row in response.json['data']]
+
+
+def test_clients_are_created_and_paged_with_sparse_fields(auth_client):
+    """
+    GIVEN three clients created with one bulk request
+    WHEN they are listed two at a time with only their names
+    THEN the pages follow the cursor and hold only the requested fields
+    """
+    ids = _clients(auth_client, 'Acme', 'Globex', 'Initech')
+
+    first = auth_client.get('/api/v1/clients?fields=name&per_page=2').json
+    second = auth_client.get(
+        f'/api/v1/clients?fields=name&per_page=2&after={first["after"]}').json
+
+    assert first['data'] == [{'id': ids[2], 'name': 'Initech'},
+                             {'id': ids[1], 'name': 'Globex'}]
+    assert second == {'data': [{'id': ids[0], 'name': 'Acme'}],
+                      'after': None}
+    response = auth_client.get('/api/v1/clients?fields=password')
+    assert response.status_code == 400
+
+
+def test_bulk_writes_are_validated(auth_client, user):
+    """
+    GIVEN bulk requests with an invalid row, a form post, another user's
+        client or a duplicate email
+    WHEN they are sent
+    THEN nothing is written and each gets a JSON error
+    """
+    invalid = auth_client.post('/api/v1/clients', json=[
+        {'name': 'Acme', 'email': 'acme@example.com'},
+        {'name': 'Globex', 'email': 'not an email'}])
+    assert invalid.status_code == 422
+    assert list(invalid.json['errors']) == ['1']
+
+    form = auth_client.post('/api/v1/clients', data={'name': 'Acme'})
+    assert form.status_code == 415
+
+    owner = User(first_name='John', last_name='Roe',
+                 email='john.roe@example.com', email_verified=True)
+    owner.set_password('Password123')
+    other = Client(name='Other', email='other@example.com', user=owner)
+    db.session.add(other)
+    db.session.commit()
+    missing = auth_client.patch('/api/v1/clients', json=[
+        {'id': other.id, 'name': 'Mine'}])
+    assert missing.status_code == 404
+
+    duplicate = auth_client.post('/api/v1/clients', json=[
+        {'name': 'Copy', 'email': 'Other@example.com'},
+        {'name': 'Acme', 'email': 'acme@example.com'},
+        {'name': 'Acme Ltd', 'email': 'acme@example.com'}])
+    assert duplicate.status_code == 422
+    assert duplicate.json['errors'] == {
+        '0': {'email': ['Another client already uses this email.']},
+        '2': {'email': ['Another row uses this email.']}}
+    assert Client.query.count() == 1
+
+
+def test_bulk_invoices_maintain_summaries(auth_client, user):
+    """
+    GIVEN a project
+    WHEN invoices are created and then paid through the bulk endpoints
+    THEN the totals come from the lines, and the project and client totals
+        match a full reconcile
+    """
+    [client_id] = _clients(auth_client, 'Acme')
+    project = Project(title='Site', client_id=client_id, user_id=user.id,
+                      start_date=datetime(2024, 1, 1))
+    db.session.add(project)
+    db.session.commit()
+
+    created = auth_client.post('/api/v1/invoices', json=[
+        {'project_id': project.id, 'date': '2024-02-01',
+         'status': 'pending', 'lines': [
+             {'description': 'Work', 'quantity': '2', 'unit_price': '50',
+              'tax_rate': '10'}]},
+        {'project_id': project.id, 'date': '2024-02-02',
+         'status': 'pending', 'lines': [
+             {'description': 'Fix', 'quantity': 1, 'unit_price': 40}]},
+    ])
+    assert created.status_code == 201
+    ids = [row['id'] for row in created.json['data']]
+    assert db.session.get(Invoice, ids[0]).amount_cents == 11000
+
+    paid = auth_client.patch('/api/v1/invoices', json=[
+        {'id': ids[1], 'status': 'paid'}])
+    assert paid.status_code == 200
+    invoice = auth_client.get(
+        f'/api/v1/invoices/{ids[1]}?fields=status,amount_cents').json
+    assert invoice['data'] == {'id': ids[1], 'status': 'paid',
+                               'amount_cents': 4000}
+
+    db.session.expire_all()
+    project = db.session.get(Project, project.id)
+    totals = {column: getattr(project, column)
+              for column in SUMMARY_COLUMNS}
+    assert totals == {'invoice_count': 2, 'invoiced_total': 15000,
+                      'paid_total': 4000, 'outstanding_total': 11000,
+                      'pending_count': 1, 'overdue_count': 0}
+    reconcile(Project, Invoice.project_id)
+    db.session.expire_all()
+    assert {column: getattr(db.session.get(Project, project.id), column)
+            for column in SUMMARY_COLUMNS} == totals
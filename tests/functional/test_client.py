@@ -0,0 +1,231 @@
+import re
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from app import db
+from app.commands import purge_deleted_rows
+from app.models import Client, Invoice, Project, User
+from app.models.project_models import InvoiceStatus
+from app.utils.money import Money
+
+
+def _live(model):
+    return db.session.scalar(
+        sa.select(sa.func.count(model.id)).where(model.live()))
+
+
+def _client_with_invoices(user):
+    client = Client(name='Acme', email='acme@example.com', user_id=user.id)
+    project = Project(title='Site', client=client, user_id=user.id,
+                      start_date=datetime(2024, 1, 1))
+    db.session.add_all([client, project] + [
+        Invoice(date=datetime(2024, 1, day), amount=Money(1000), project=project,
+                client=client, user_id=user.id, status=InvoiceStatus.PENDING)
+        for day in (1, 2)
+    ])
+    db.session.commit()
+    client_id = client.id
+    db.session.expunge_all()
+    return client_id
+
+
+def test_delete_and_restore_client(auth_client, user):
+    """
+    GIVEN a client with a project and invoices
+    WHEN the client is deleted and then restored
+    THEN its projects and invoices are hidden and come back with it
+    """
+    client_id = _client_with_invoices(user)
+
+    response = auth_client.delete(
+        f'/client/{client_id}/delete',
+        headers={'X-Requested-With': 'XMLHttpRequest'})
+    assert response.status_code == 200
+    assert (_live(Client), _live(Project), _live(Invoice)) == (0, 0, 0)
+    assert auth_client.get(f'/client/{client_id}').status_code == 404
+
+    response = auth_client.post(response.json['restore_url'])
+    assert response.status_code == 302
+    assert (_live(Client), _live(Project), _live(Invoice)) == (1, 1, 2)
+
+
+def test_purge_deleted_cascades(app, auth_client, user):
+    """
+    GIVEN a soft-deleted client
+    WHEN purge-deleted runs with no grace period
+    THEN the client, its projects and its invoices are removed
+    """
+    client_id = _client_with_invoices(user)
+    auth_client.delete(f'/client/{client_id}/delete')
+
+    result = app.test_cli_runner().invoke(
+        purge_deleted_rows, ['--older-than-days', '0', '--batch-size', '1',
+                             '--pause', '0'])
+
+    assert result.exit_code == 0, result.output
+    assert db.session.scalar(sa.select(sa.func.count(Invoice.id))) == 0
+    assert db.session.scalar(sa.select(sa.func.count(Client.id))) == 0
+
+
+def test_other_users_client_is_forbidden(auth_client, user):
+    """
+    GIVEN a client owned by another user
+    WHEN the current user opens or edits it
+    THEN the response is 403, and 404 for a client that does not exist
+        or an id that is not a number
+    """
+    other = User(first_name='John', last_name='Roe',
+                 email='john.roe@example.com', email_verified=True)
+    other.set_password('Password123')
+    db.session.add(other)
+    db.session.commit()
+    client_id = _client_with_invoices(other)
+
+    assert auth_client.get(f'/client/{client_id}').status_code == 403
+    assert auth_client.get(f'/client/{client_id}/edit').status_code == 403
+    assert auth_client.get('/client/999').status_code == 404
+    assert auth_client.get('/client/abc').status_code == 404
+
+
+def _query_count(response):
+    timing = response.headers['Server-Timing']
+    return int(timing.split('desc="')[1].split()[0])
+
+
+def test_client_list_is_served_from_fragment_cache(auth_client, user):
+    """
+    GIVEN a client list that has been rendered once
+    WHEN it is requested again without an ETag
+    THEN the list is served from the fragment cache without its queries
+    AND a change to a client renders the list again
+    """
+    client_id = _client_with_invoices(user)
+    first = auth_client.get('/client/')
+    second = auth_client.get('/client/')
+    assert second.data == first.data
+    assert _query_count(second) < _query_count(first)
+
+    client = db.session.get(Client, client_id)
+    client.name = 'Acme Ltd'
+    db.session.commit()
+    changed = auth_client.get('/client/')
+    assert b'Acme Ltd' in changed.data
+
+
+def test_client_invoice_pages(auth_client, user):
+    """
+    GIVEN a client with twelve invoices
+    WHEN its invoices are requested as JSON, page by page
+    THEN each page lists the newest invoices first, ten at a time
+    AND carries the paging fields used by "Load more"
+    """
+    user_id = user.id
+    client_id = _client_with_invoices(user)
+    client = db.session.get(Client, client_id)
+    db.session.add_all([
+        Invoice(date=datetime(2024, 2, day), amount=Money(500),
+                project=client.projects[0], client=client, user_id=user_id,
+                status=InvoiceStatus.PENDING)
+        for day in range(1, 11)
+    ])
+    db.session.commit()
+
+    first = auth_client.get(f'/client/{client_id}/invoices').json
+    assert (first['page'], first['pages'], first['total']) == (1, 2, 12)
+    assert first['has_next'] is True
+    assert len(first['items']) == 10
+    assert first['items'][0]['date'] == '2024-02-10T00:00:00'
+    assert set(first['items'][0]) == {'id', 'date', 'amount', 'status', 'url'}
+
+    second = auth_client.get(f'/client/{client_id}/invoices?page=2').json
+    assert second['has_next'] is False
+    assert [item['date'] for item in second['items']] == [
+        '2024-01-02T00:00:00', '2024-01-01T00:00:00']
+
+
+def test_client_project_page(auth_client, user):
+    """
+    GIVEN a client with a project, and a client of another user
+    WHEN their projects are requested as JSON
+    THEN the own client's project is listed with its dates and URL
+    AND the other user's client is forbidden
+    """
+    user_id = user.id
+    other = User(first_name='John', last_name='Roe',
+                 email='john.roe@example.com', email_verified=True)
+    other.set_password('Password123')
+    db.session.add(other)
+    db.session.commit()
+    other_client_id = _client_with_invoices(other)
+    client = Client(name='Globex', email='globex@example.com',
+                    user_id=user_id)
+    db.session.add_all([client, Project(
+        title='Site', client=client, user_id=user_id,
+        start_date=datetime(2024, 1, 1))])
+    db.session.commit()
+    client_id = client.id
+
+    page = auth_client.get(f'/client/{client_id}/projects').json
+    assert page['total'] == 1
+    assert page['has_next'] is False
+    project = page['items'][0]
+    assert (project['title'], project['start_date'], project['end_date']) == (
+        'Site', '2024-01-01T00:00:00', None)
+    assert project['url'] == f"/project/{project['id']}"
+
+    response = auth_client.get(f'/client/{other_client_id}/projects')
+    assert response.status_code == 403
+    response = auth_client.get(f'/client/{other_client_id}/invoices')
+    assert response.status_code == 403
+
+
+def test_restore_requires_csrf_token(app, auth_client, user):
+    """
+    GIVEN CSRF protection and a deleted client
+    WHEN the undo button's form is posted without its token, then with it
+    THEN the first post is rejected and the second restores the client
+    """
+    app.config['WTF_CSRF_ENABLED'] = True
+    client_id = _client_with_invoices(user)
+    response = auth_client.delete(
+        f'/client/{client_id}/delete',
+        headers={'X-Requested-With': 'XMLHttpRequest'})
+    restore_url = response.json['restore_url']
+
+    assert auth_client.post(restore_url).status_code == 400
+    assert _live(Client) == 0
+
+    page = auth_client.get('/client/').get_data(as_text=True)
+    token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"',
+                      page).group(1)
+    response = auth_client.post(restore_url, data={'csrf_token': token})
+    assert response.status_code == 302
+    assert _live(Client) == 1
+
+
+def test_deleted_client_frees_its_email(auth_client, user):
+    """
+    GIVEN a deleted client
+    WHEN a new client is added with its email, another one with the same
+        email is attempted, and the deleted client is restored
+    THEN the new client is added and the duplicate gets a form error
+    AND the restore is refused while the email is in use
+    """
+    client_id = _client_with_invoices(user)
+    response = auth_client.delete(
+        f'/client/{client_id}/delete',
+        headers={'X-Requested-With': 'XMLHttpRequest'})
+    restore_url = response.json['restore_url']
+
+    data = {'name': 'Acme 2', 'email': 'ACME@example.com'}
+    assert auth_client.post('/client/add', data=data).status_code == 302
+    response = auth_client.post('/client/add', data=data)
+    assert response.status_code == 200
+    assert b'Another client already uses this email.' in response.data
+    assert _live(Client) == 1
+
+    response = auth_client.post(restore_url, follow_redirects=True)
+    assert b'Another client now uses the email of this client' in (
+        response.data)
+    assert db.session.get(Client, client_id).is_deleted
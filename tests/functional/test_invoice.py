@@ -0,0 +1,169 @@
+from datetime import datetime
+
+from app import db
+from app.models import ArchivedInvoice, Client, Invoice, InvoiceLine, Project
+from app.utils.archive import archive_invoices
+from app.utils.summaries import SUMMARY_COLUMNS, reconcile
+
+
+def _line(index, description, quantity, unit_price, tax_rate=''):
+    prefix = f'lines-{index}-'
+    return {prefix + 'description': description,
+            prefix + 'quantity': quantity,
+            prefix + 'unit_price': unit_price,
+            prefix + 'tax_rate': tax_rate}
+
+
+def _project(user):
+    client = Client(name='Acme', email='acme@example.com', user_id=user.id)
+    project = Project(title='Site', client=client, user_id=user.id,
+                      start_date=datetime(2024, 1, 1))
+    db.session.add_all([client, project])
+    db.session.commit()
+    return client, project
+
+
+def _totals(row):
+    db.session.refresh(row)
+    return {column: getattr(row, column) for column in SUMMARY_COLUMNS}
+
+
+def test_invoice_changes_maintain_summaries(auth_client, user):
+    """
+    GIVEN a project
+    WHEN invoices are created, edited and deleted through the routes
+    THEN the project and client totals follow, and match a full reconcile
+    """
+    client, project = _project(user)
+
+    for amount, status in (('100', 'pending'), ('40', 'paid')):
+        response = auth_client.post(
+            f'/invoice/create?project_id={project.id}',
+            data={'date': '2024-02-01', 'status': status,
+                  **_line(0, 'Work', '1', amount)})
+        assert response.status_code == 302
+    assert _totals(project) == {
+        'invoice_count': 2, 'invoiced_total': 14000, 'paid_total': 4000,
+        'outstanding_total': 10000, 'pending_count': 1, 'overdue_count': 0}
+
+    pending = Invoice.query.filter_by(amount_cents=10000).one()
+    auth_client.put(f'/invoice/edit/{pending.id}', data={
+        'date': '2024-02-01', 'status': 'paid',
+        **_line(0, 'Work', '2', '30')})
+    paid = Invoice.query.filter_by(amount_cents=4000).one()
+    auth_client.delete(f'/invoice/{paid.id}')
+
+    expected = {'invoice_count': 1, 'invoiced_total': 6000,
+                'paid_total': 6000, 'outstanding_total': 0,
+                'pending_count': 0, 'overdue_count': 0}
+    assert _totals(project) == expected
+    assert _totals(client) == expected
+
+    reconcile(Project, Invoice.project_id)
+    reconcile(Client, Invoice.client_id)
+    assert _totals(project) == expected
+    assert _totals(client) == expected
+
+
+def test_invoice_lines_compute_totals(auth_client, user):
+    """
+    GIVEN a project of an account invoicing in euros
+    WHEN an invoice is created with several lines and then edited
+    THEN its lines are stored and its subtotal, tax and total are computed
+        from them, rounding each line to whole cents
+    AND the invoice is in the account's currency, whatever is posted
+    AND the project totals use the invoice total
+    """
+    user.currency = 'EUR'
+    db.session.commit()
+    _, project = _project(user)
+
+    response = auth_client.post(
+        f'/invoice/create?project_id={project.id}',
+        data={'date': '2024-02-01', 'status': 'pending',
+              **_line(0, 'Design', '1.5', '33.33', '8.25'),
+              **_line(1, 'Hosting', '2', '10')})
+    assert response.status_code == 302
+
+    invoice = Invoice.query.one()
+    assert [line.description for line in invoice.lines] == [
+        'Design', 'Hosting']
+    # 1.5 * 33.33 = 49.995 -> 50.00; 8.25% of 50.00 = 4.125 -> 4.13
+    assert (invoice.subtotal_cents, invoice.tax_cents,
+            invoice.amount_cents) == (7000, 413, 7413)
+    assert str(invoice.amount) == '€74.13'
+    assert _totals(project)['outstanding_total'] == 7413
+
+    auth_client.put(f'/invoice/edit/{invoice.id}', data={
+        'date': '2024-02-01', 'status': 'pending', 'currency': 'USD',
+        **_line(0, 'Hosting', '1', '10')})
+    db.session.refresh(invoice)
+    assert invoice.currency == 'EUR'
+    assert InvoiceLine.query.count() == 1
+    assert (invoice.subtotal_cents, invoice.tax_cents,
+            invoice.amount_cents) == (1000, 0, 1000)
+    assert _totals(project)['outstanding_total'] == 1000
+
+
+def test_archive_settled_invoices(auth_client, user):
+    """
+    GIVEN old paid and pending invoices and a recent paid one
+    WHEN settled invoices older than the cutoff are archived
+    THEN only the old paid invoice moves, with its lines
+    AND it can still be viewed and downloaded, but not edited
+    AND the project totals still count it after a reconcile
+    """
+    _, project = _project(user)
+    for day, status in (('2020-01-01', 'paid'), ('2020-01-02', 'pending'),
+                        ('2024-02-01', 'paid')):
+        auth_client.post(
+            f'/invoice/create?project_id={project.id}',
+            data={'date': day, 'status': status,
+                  **_line(0, 'Work', '1', '10'), **_line(1, 'Fee', '1', '5')})
+    before = _totals(project)
+
+    assert archive_invoices(datetime(2021, 1, 1), batch_size=1) == 1
+
+    archived = ArchivedInvoice.query.one()
+    assert archived.date == datetime(2020, 1, 1)
+    assert [line.description for line in archived.lines] == ['Work', 'Fee']
+    assert archived.amount_cents == 1500
+    assert Invoice.query.count() == 2
+    assert InvoiceLine.query.count() == 4
+
+    response = auth_client.get(f'/invoice/{archived.id}')
+    assert response.status_code == 200
+    assert b'Archived' in response.data
+    assert auth_client.get(
+        f'/invoice/{archived.id}/download').status_code == 200
+    assert auth_client.get(
+        f'/invoice/edit/{archived.id}').status_code == 404
+
+    reconcile(Project, Invoice.project_id)
+    assert _totals(project) == before
+
+
+def test_invoice_list_answers_conditional_get(auth_client, user):
+    """
+    GIVEN an invoice list the browser has already loaded
+    WHEN it is requested again with its ETag
+    THEN the response is 304 until an invoice or its client changes
+    AND pages showing flashed messages are always rendered
+    """
+    client, project = _project(user)
+    auth_client.post(f'/invoice/create?project_id={project.id}',
+                     data={'date': '2024-02-01', 'status': 'pending',
+                           **_line(0, 'Work', '1', '100')})
+    flashed = auth_client.get('/invoice/')
+    assert flashed.status_code == 200 and 'ETag' not in flashed.headers
+
+    etag = auth_client.get('/invoice/').headers['ETag']
+    cached = auth_client.get('/invoice/', headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.data == b''
+    assert 'no-cache' in cached.headers['Cache-Control']
+
+    client.name = 'Acme Ltd'
+    db.session.commit()
+    changed = auth_client.get('/invoice/', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and b'Acme Ltd' in changed.data
+    assert changed.headers['ETag'] != etag
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import Client, Invoice, Project
+from app.models.project_models import InvoiceStatus
+from app.utils.money import Money
+from app.utils.query_stats import QueryBudgetExceeded
+from app.utils.summaries import apply_deltas, invoice_delta
+
+
+def test_dashboard_reports_query_stats(auth_client):
+    """
+    GIVEN a logged-in user
+    WHEN the dashboard is requested
+    THEN the response carries the database time and query count in its
+        Server-Timing header
+    """
+    response = auth_client.get('/dashboard')
+    assert response.status_code == 200
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert 'queries' in response.headers['Server-Timing']
+
+
+def test_query_budget_enforced(app, auth_client):
+    """
+    GIVEN a query budget of one query for the dashboard
+    WHEN the dashboard, which needs more, is requested
+    THEN the request fails with QueryBudgetExceeded
+    """
+    app.config['QUERY_BUDGETS'] = {'main.dashboard': 1}
+    with pytest.raises(QueryBudgetExceeded):
+        auth_client.get('/dashboard')
+
+
+def test_dashboard_counts_from_summaries(app, auth_client, user):
+    """
+    GIVEN invoices in each status, one of them deleted
+    WHEN the dashboard is requested
+    THEN its invoice counters come from the client totals, without
+        reading the invoices table
+    """
+    client = Client(name='Acme', email='acme@example.com', user_id=user.id)
+    project = Project(title='Site', client=client, user_id=user.id,
+                      start_date=datetime(2024, 1, 1))
+    invoices = [
+        Invoice(date=datetime(2024, 1, 1), amount=Money(amount),
+                status=status, project=project, client=client,
+                user_id=user.id)
+        for amount, status in ((100, InvoiceStatus.PENDING),
+                               (40, InvoiceStatus.PENDING),
+                               (25, InvoiceStatus.OVERDUE),
+                               (60, InvoiceStatus.PAID))]
+    invoices[1].deleted_at = datetime(2024, 2, 1)
+    db.session.add_all([client, project, *invoices])
+    db.session.flush()
+    apply_deltas((invoice_delta(invoice.amount_cents, invoice.status),
+                  project.id, client.id)
+                 for invoice in invoices if invoice.deleted_at is None)
+    db.session.commit()
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db.event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = auth_client.get('/dashboard')
+    finally:
+        db.event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    assert '1 overdue' in html
+    assert '$1.25' in html
+    aggregates = ('count(invoices.id)', 'sum(invoices.amount_cents)')
+    assert not any(aggregate in statement for statement in statements
+                   for aggregate in aggregates)
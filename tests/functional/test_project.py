@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from app import db
+from app.models import Client, Invoice, Project
+from app.models.project_models import InvoiceStatus
+from app.project.prj_routes import RECENT_INVOICES, _recent_invoices_summary
+from app.utils.money import Money
+
+
+def test_recent_invoices_summary_matches_aggregate(app, user):
+    """
+    GIVEN a project with more invoices than the preview shows, in several
+        statuses, one of them deleted, and an invoice of another project
+    WHEN the recent invoices summary is computed
+    THEN the preview holds the newest live invoices
+    AND the window totals equal a plain aggregate over the project
+    """
+    client = Client(name='Acme', email='acme@example.com', user_id=user.id)
+    project, other = (
+        Project(title=title, client=client, user_id=user.id,
+                start_date=datetime(2024, 1, 1))
+        for title in ('Site', 'App'))
+    statuses = [InvoiceStatus.PENDING, InvoiceStatus.PAID,
+                InvoiceStatus.OVERDUE, InvoiceStatus.CANCELLED]
+    invoices = [
+        Invoice(date=datetime(2024, 1, day), amount=Money(100 * day),
+                status=statuses[day % len(statuses)], project=project,
+                client=client, user_id=user.id)
+        for day in range(1, 9)
+    ]
+    invoices[-1].deleted_at = datetime(2024, 2, 1)
+    db.session.add_all([client, project, other, *invoices, Invoice(
+        date=datetime(2024, 1, 1), amount=Money(999),
+        status=InvoiceStatus.PENDING, project=other, client=client,
+        user_id=user.id)])
+    db.session.commit()
+
+    recent, summary = _recent_invoices_summary(project.id)
+
+    assert [invoice.date.day for invoice in recent] == list(
+        range(7, 7 - RECENT_INVOICES, -1))
+    outstanding = [InvoiceStatus.PENDING, InvoiceStatus.OVERDUE]
+    expected = db.session.execute(
+        sa.select(
+            sa.func.count(),
+            sa.func.sum(Invoice.amount_cents),
+            sa.func.sum(sa.case(
+                (Invoice.status.in_(outstanding), Invoice.amount_cents),
+                else_=0)),
+        )
+        .where(Invoice.project_id == project.id, Invoice.live())
+    ).one()
+    assert (summary['count'], summary['total'],
+            summary['outstanding']) == tuple(expected)
+    assert summary['count'] == 7
@@ -0,0 +1,35 @@
+import gzip
+
+from flask import Flask, url_for
+
+from app.utils.assets import compress_static_files, init_assets
+
+
+def test_fingerprinted_static_files_are_immutable(tmp_path):
+    """
+    GIVEN a static folder with a precompressed stylesheet
+    WHEN the stylesheet URL is built and requested
+    THEN the URL names the content hash, and the gzipped sibling is served
+        with immutable caching
+    """
+    (tmp_path / 'styles.css').write_text('body { color: red; }\n' * 50)
+    assert compress_static_files(str(tmp_path))[0] == 'styles.css.gz'
+    app = Flask(__name__, static_folder=str(tmp_path),
+                static_url_path='/static')
+    app.config['STATIC_FINGERPRINTS'] = True
+    init_assets(app)
+
+    with app.test_request_context():
+        url = url_for('static', filename='styles.css')
+    response = app.test_client().get(
+        url, headers={'Accept-Encoding': 'gzip'})
+
+    assert url.startswith('/static/styles.') and url != '/static/styles.css'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Content-Type'].startswith('text/css')
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    assert gzip.decompress(response.data) == (
+        tmp_path / 'styles.css').read_bytes()
+    assert app.test_client().get(url).data == (
+        tmp_path / 'styles.css').read_bytes()
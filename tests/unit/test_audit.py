@@ -0,0 +1,35 @@
+import sqlalchemy as sa
+
+from app import db
+from app.models import AuditEvent
+from app.utils.audit import AuditBuffer
+
+
+def test_audit_buffer_writes_full_batches(app):
+    """
+    GIVEN an audit buffer with a batch size of 2 and a long interval
+    WHEN events are added, flushed and the buffer is stopped
+    THEN nothing is written until the batch is full or flush() is called
+    AND stopping writes the queued events and ends the writer thread
+    """
+    buffer = AuditBuffer()
+    buffer.configure(app)
+    buffer.batch_size, buffer.interval_ms = 2, 60000
+
+    def count():
+        db.session.rollback()
+        return db.session.scalar(sa.select(sa.func.count(AuditEvent.id)))
+
+    row = {'created_at': sa.func.now(), 'action': 'test_event'}
+    try:
+        buffer.add(row)
+        assert count() == 0
+        assert buffer.flush() == 1
+
+        buffer.add(row)
+        buffer.add(row)
+        writer = buffer._thread
+    finally:
+        buffer.stop()
+    assert count() == 3
+    assert not writer.is_alive()
@@ -0,0 +1,63 @@
+import gzip
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from app.utils.compression import CompressionMiddleware
+
+HTML = b'<tr><td>Invoice</td><td>$10.00</td></tr>' * 100
+
+
+def _get(response, accept_encoding='gzip, deflate'):
+    client = Client(CompressionMiddleware(response, min_size=500))
+    return client.get('/', headers={'Accept-Encoding': accept_encoding})
+
+
+def test_large_html_is_gzipped():
+    """
+    GIVEN a large HTML response
+    WHEN a client accepting gzip requests it
+    THEN it is gzipped with a matching Content-Length and Vary header
+    """
+    response = _get(Response(HTML, mimetype='text/html'))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert gzip.decompress(response.data) == HTML
+
+
+def test_small_pdf_and_unaccepted_responses_are_untouched():
+    """
+    GIVEN a small response, a PDF and a client not accepting gzip
+    WHEN they are requested
+    THEN the bodies are sent as they are
+    """
+    small = _get(Response(b'<p>ok</p>', mimetype='text/html'))
+    pdf = _get(Response(HTML, mimetype='application/pdf'))
+    identity = _get(Response(HTML, mimetype='text/html'), 'identity')
+    for response, body in ((small, b'<p>ok</p>'), (pdf, HTML),
+                           (identity, HTML)):
+        assert 'Content-Encoding' not in response.headers
+        assert response.data == body
+
+
+def test_streamed_response_is_compressed_per_chunk():
+    """
+    GIVEN a streamed response
+    WHEN it is requested with gzip accepted
+    THEN every chunk is flushed compressed, without a Content-Length
+    """
+    def rows():
+        for _ in range(5):
+            yield HTML
+
+    client = Client(CompressionMiddleware(
+        Response(rows(), mimetype='text/html'), min_size=500))
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'},
+                          buffered=False)
+    chunks = list(response.iter_encoded())
+    response.close()
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert len(chunks) > 5
+    assert gzip.decompress(b''.join(chunks)) == HTML * 5
@@ -0,0 +1,43 @@
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask_login import login_user
+
+from app import db
+from app.models import Client
+from app.utils.db import get_owned
+
+
+def test_get_owned_reuses_cached_statement(app, user):
+    """
+    GIVEN clients owned by the logged in user
+    WHEN they are fetched one after the other with get_owned
+    THEN the first lookup compiles the SELECT
+    AND the next ones, for other ids, reuse the cached statement
+    AND loader options are part of the cache key
+    """
+    clients = [Client(name=name, email=f'{name}@example.com',
+                      user_id=user.id) for name in ('acme', 'globex')]
+    db.session.add_all(clients)
+    db.session.commit()
+    ids = [client.id for client in clients]
+
+    hits = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM clients' in statement:
+            hits.append(context.cache_hit)
+
+    sa.event.listen(db.engine, 'after_cursor_execute', record)
+    try:
+        with app.test_request_context():
+            login_user(user)
+            for ident in ids:
+                db.session.expunge_all()
+                assert get_owned(Client, ident).id == ident
+            db.session.expunge_all()
+            get_owned(Client, ids[0], so.selectinload(Client.projects))
+    finally:
+        sa.event.remove(db.engine, 'after_cursor_execute', record)
+
+    miss, hit = sa.engine.default.CACHE_MISS, sa.engine.default.CACHE_HIT
+    assert hits == [miss, hit, miss]
@@ -0,0 +1,84 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import sqlalchemy as sa
+
+from app import db
+from app.utils.email_utils import EmailClient
+from app.utils.engine import TimedQueuePool, dispose_engines
+
+
+def test_post_fork_dispose_keeps_parent_connections(app):
+    """
+    GIVEN a pool holding a connection opened before a fork
+    WHEN the child disposes the engines without closing them
+    THEN the child gets a fresh pool and the parent's connection stays open
+    """
+    engine = db.engines[None]
+    pool = engine.pool
+    with engine.connect() as connection:
+        inherited = connection.connection.dbapi_connection
+
+    dispose_engines(db, close=False)
+
+    assert engine.pool is not pool
+    assert inherited.execute('SELECT 1').fetchone() == (1,)
+    with engine.connect() as connection:
+        assert connection.connection.dbapi_connection is not inherited
+
+
+def test_connection_from_another_process_is_replaced(app):
+    """
+    GIVEN a pooled connection recorded as opened by another process
+    WHEN it is checked out
+    THEN the fork guard discards it and opens a new one
+    """
+    engine = db.engines[None]
+    with engine.connect() as connection:
+        record = connection.connection._connection_record
+        inherited = connection.connection.dbapi_connection
+    record.info['pid'] = os.getpid() + 1
+
+    with engine.connect() as connection:
+        assert connection.execute(sa.text('SELECT 1')).scalar() == 1
+        assert connection.connection.dbapi_connection is not inherited
+
+
+def test_email_is_not_sent_without_api_key(monkeypatch):
+    """
+    GIVEN no BREVO_API_KEY
+    WHEN an email is sent
+    THEN no Brevo client is built and the send reports failure
+    """
+    monkeypatch.delenv('BREVO_API_KEY', raising=False)
+    client = EmailClient()
+
+    assert client.api_instance is None
+    assert client.send_email('jane@example.com', 'Hi', text_content='Hi',
+                             sync=True) is False
+
+
+def test_pool_wait_excludes_connect_time(monkeypatch, caplog):
+    """
+    GIVEN a pool of one connection that takes 50 ms to open
+    WHEN it is checked out, and then checked out again while in use
+    THEN only the second checkout, which waits for the first to be
+        returned, is logged as a wait
+    """
+    def connect():
+        time.sleep(0.05)
+        return sqlite3.connect(':memory:', check_same_thread=False)
+
+    monkeypatch.setattr(TimedQueuePool, 'wait_log_threshold_ms', 40)
+    pool = TimedQueuePool(connect, pool_size=1, max_overflow=0)
+
+    with caplog.at_level(logging.WARNING, logger='app.utils.engine'):
+        first = pool.connect()
+        assert not caplog.records
+
+        threading.Timer(0.1, first.close).start()
+        pool.connect().close()
+    assert 'Waited' in caplog.text
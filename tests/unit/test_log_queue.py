@@ -0,0 +1,42 @@
+import logging
+
+from app.utils.log_queue import install_log_queue
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_log_queue_drops_and_reports():
+    """
+    GIVEN a logger routed through a log queue of two records
+    WHEN more records are logged than the queue holds
+    THEN logging does not block, the excess is counted as dropped
+    AND the listener reports the drop count, then writes out the queued
+        records when the queue is stopped
+    """
+    logger = logging.getLogger('test_log_queue')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    target = ListHandler()
+    log_queue = install_log_queue(logger, [target], maxsize=2)
+    # Stop the listener so the queue fills up deterministically
+    log_queue.listener.stop()
+
+    for i in range(5):
+        logger.info('record %d', i)
+    assert log_queue.handler.dropped == 3
+
+    log_queue.listener.start()
+    logger.info('after')
+    log_queue.stop()
+    logger.removeHandler(log_queue.handler)
+
+    messages = [record.getMessage() for record in target.records]
+    assert messages[0].startswith('Log queue full: dropped 3 records')
+    assert messages[1:] == ['record 0', 'record 1', 'after']
@@ -0,0 +1,38 @@
+import io
+import json
+import logging
+
+from app.utils.logger import (JsonFormatter, RequestContextFilter,
+                              log_user_action)
+
+
+def test_json_log_lines_carry_context(app):
+    """
+    GIVEN a JSON log handler
+    WHEN a user action is logged while handling a request
+    THEN the line is a JSON object with the message, the action context
+        and the request id, endpoint and duration
+    AND context shadowing LogRecord attributes is renamed
+    """
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(RequestContextFilter())
+    app.logger.addHandler(handler)
+    try:
+        with app.test_request_context(
+                '/', headers={'X-Request-ID': 'req-1'}):
+            app.preprocess_request()
+            log_user_action('invoice_deleted', user_id=7, name='Acme')
+    finally:
+        app.logger.removeHandler(handler)
+
+    line = json.loads(stream.getvalue().splitlines()[-1])
+    assert line['message'] == 'User action: invoice_deleted'
+    assert line['level'] == 'INFO'
+    assert line['location'].startswith('test_logger.py:')
+    assert (line['action'], line['user_id'], line['ctx_name']) == (
+        'invoice_deleted', 7, 'Acme')
+    assert line['request_id'] == 'req-1'
+    assert line['endpoint'] == 'main.index'
+    assert line['duration_ms'] >= 0
@@ -0,0 +1,20 @@
+from decimal import Decimal
+
+import pytest
+
+from app.utils.money import Money, format_money
+
+
+def test_money_from_decimal_is_exact():
+    assert Money.from_decimal('0.29').cents == 29
+    assert Money.from_decimal(Decimal('1.005')).cents == 101
+    assert Money.from_decimal('19.99', 'EUR').amount == Decimal('19.99')
+    with pytest.raises(TypeError):
+        Money.from_decimal(0.29)
+
+
+def test_money_formatting():
+    assert str(Money(123450)) == '$1,234.50'
+    assert str(Money(-5, 'EUR')) == '-€0.05'
+    assert format_money(999, 'CAD') == '9.99 CAD'
+    assert format_money(None) == '$0.00'
@@ -0,0 +1,139 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from app.utils.partitions import (add_months, detach_partitions, month_start,
+                                  partition_month, partition_name,
+                                  partition_table)
+
+
+class _RecordingConnection:
+    """Records the SQL it is given; queries return ``partitions``."""
+
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.statements = []
+
+    def execute(self, statement, parameters=None):
+        self.statements.append(str(statement))
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.partitions
+
+
+class _CatalogConnection(_RecordingConnection):
+    """A PostgreSQL connection answering the catalog queries from
+    ``answers``, keyed by a fragment of the query."""
+
+    dialect = SimpleNamespace(name='postgresql')
+
+    def __init__(self, answers):
+        super().__init__([])
+        self.answers = answers
+
+    def execute(self, statement, parameters=None):
+        self.statements.append(str(statement))
+        answer = next((rows for fragment, rows in self.answers.items()
+                       if fragment in str(statement)), [])
+        return _Result(answer)
+
+
+class _Result:
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows[0] if self.rows else None
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def test_partition_months():
+    """
+    GIVEN dates around a year boundary
+    WHEN monthly partitions are named and parsed
+    THEN months roll over years and names round-trip
+    """
+    month = month_start(datetime(2026, 12, 31, 23, 59))
+    assert month == date(2026, 12, 1)
+    assert add_months(month, 1) == date(2027, 1, 1)
+    assert add_months(month, -12) == date(2025, 12, 1)
+    assert partition_name(month) == 'invoices_p2026_12'
+    assert partition_month('invoices_p2026_12') == month
+    assert partition_month('invoices_default') is None
+
+
+def test_detach_partitions_sql():
+    """
+    GIVEN monthly partitions and the default partition
+    WHEN partitions before a month are detached and dropped
+    THEN only the older monthly partitions are detached, without
+        CONCURRENTLY, which PostgreSQL refuses with a default partition
+    AND each detach waits at most lock_timeout_ms for its lock
+    """
+    connection = _RecordingConnection([
+        'invoices_default', 'invoices_p2026_08', 'invoices_p2026_09',
+        'invoices_p2026_10'])
+
+    detached = detach_partitions(connection, date(2026, 10, 15), drop=True,
+                                 lock_timeout_ms=2000)
+
+    assert detached == ['invoices_p2026_08', 'invoices_p2026_09']
+    statements = connection.statements
+    assert statements[0] == 'SET lock_timeout = 2000'
+    assert statements[-1] == 'RESET lock_timeout'
+    assert [s for s in statements if 'DETACH' in s] == [
+        'ALTER TABLE invoices DETACH PARTITION invoices_p2026_08',
+        'ALTER TABLE invoices DETACH PARTITION invoices_p2026_09']
+    assert 'DROP TABLE invoices_p2026_09' in statements
+    assert not any('default' in s for s in statements[1:])
+
+
+def test_partition_table_recreates_current_indexes():
+    """
+    GIVEN a plain invoices table whose indexes include one added after the
+        partitioning migration
+    WHEN it is converted to monthly partitions
+    THEN partitions run from the oldest invoice to months ahead, plus the
+        default partition
+    AND every index and foreign key found in the catalog is recreated
+    AND the rows are copied before the old table is dropped
+    """
+    indexes = [
+        ('ix_invoices_user_id', 'CREATE INDEX ix_invoices_user_id ON '
+         'public.invoices USING btree (user_id)'),
+        ('ix_invoices_user_id_updated_at_live', 'CREATE INDEX '
+         'ix_invoices_user_id_updated_at_live ON public.invoices USING '
+         'btree (user_id, updated_at) WHERE (deleted_at IS NULL)'),
+    ]
+    foreign_keys = [('invoices_user_id_fkey',
+                     'FOREIGN KEY (user_id) REFERENCES users(id)')]
+    connection = _CatalogConnection({
+        'pg_partitioned_table': [False],
+        'pg_indexes': indexes,
+        'pg_constraint': foreign_keys,
+        'min(date)': [date(2026, 8, 1)],
+    })
+
+    created = partition_table(connection, date(2026, 10, 19), months_ahead=1)
+
+    assert created == ['invoices_p2026_08', 'invoices_p2026_09',
+                       'invoices_p2026_10', 'invoices_p2026_11']
+    statements = connection.statements
+    assert ('CREATE TABLE invoices_default PARTITION OF invoices DEFAULT'
+            in statements)
+    assert 'DROP INDEX ix_invoices_user_id_updated_at_live' in statements
+    copy = statements.index('INSERT INTO invoices SELECT * FROM invoices_old')
+    recreated = [definition for _, definition in indexes] + [
+        'ALTER TABLE invoices ADD CONSTRAINT invoices_user_id_fkey '
+        'FOREIGN KEY (user_id) REFERENCES users(id)']
+    assert statements[copy + 1:copy + 4] == recreated
+    assert statements.index('DROP TABLE invoices_old') > copy + 3
@@ -0,0 +1,55 @@
+import pytest
+
+from app import create_app, db
+from app.commands import seed_db
+from app.models import User
+from app.utils.replica import READ_YOUR_WRITES_KEY, REPLICA_BIND
+from config import TestConfig
+
+
+class ReplicaTestConfig(TestConfig):
+    SQLALCHEMY_BINDS = {REPLICA_BIND: 'sqlite://'}
+
+
+@pytest.fixture()
+def replica_app():
+    app = create_app(config_class=ReplicaTestConfig)
+    with app.app_context():
+        db.create_all()
+        # Users reference a role, which SQLite now enforces
+        app.test_cli_runner().invoke(seed_db)
+        db.session.remove()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    # init_app registered a metadata for the bind on the shared extension
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def test_routing_session(replica_app):
+    """
+    GIVEN an app with a replica bind
+    WHEN queries are issued while handling different requests
+    THEN reads from safe methods use the replica
+    AND writes, reads after a write and non-safe methods use the primary
+    AND a commit pins the user to the primary for a while
+    """
+    primary = db.engines[None]
+    replica = db.engines[REPLICA_BIND]
+
+    with replica_app.test_request_context('/', method='GET'):
+        assert db.session.get_bind(mapper=User) is replica
+        db.session.remove()
+
+    with replica_app.test_request_context('/', method='POST'):
+        assert db.session.get_bind(mapper=User) is primary
+        db.session.remove()
+
+    with replica_app.test_request_context('/', method='GET') as ctx:
+        db.session.add(User(first_name='a', last_name='b', email='a@b.co',
+                            password_hash='x'))
+        db.session.flush()
+        assert db.session.get_bind(mapper=User) is primary
+        db.session.commit()
+        assert ctx.session[READ_YOUR_WRITES_KEY] > 0
+        db.session.remove()
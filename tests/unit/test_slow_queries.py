@@ -0,0 +1,100 @@
+import os
+import time
+
+from app.commands import slow_queries
+from app.utils.slow_queries import (SlowQueryRecorder, fingerprint,
+                                     load_dumps)
+
+
+def test_fingerprint_strips_literals():
+    """
+    GIVEN statements that differ only in literals and parameters
+    WHEN they are fingerprinted
+    THEN they share the same fingerprint
+    """
+    first = fingerprint(
+        "SELECT * FROM clients WHERE name ILIKE '%acme%' AND id IN (1, 2, 3)"
+        " LIMIT 10")
+    second = fingerprint(
+        "SELECT *  FROM clients\nWHERE name ILIKE %(name_1)s AND id IN "
+        "(%(id_1_1)s, %(id_1_2)s) LIMIT %(param_1)s")
+    assert first == second
+    assert first == (
+        'SELECT * FROM clients WHERE name ILIKE ? AND id IN (...) LIMIT ?')
+
+
+def test_recorder_keeps_top_k():
+    """
+    GIVEN a recorder keeping the two most expensive fingerprints
+    WHEN fast, slow and repeated statements are recorded
+    THEN statements under the threshold are ignored
+    AND only the two fingerprints with the highest total time are kept,
+        with their calls aggregated
+    """
+    recorder = SlowQueryRecorder(threshold_ms=10, top_k=2)
+    recorder.record('SELECT 1', 5, 'fast')
+    recorder.record('SELECT a FROM t WHERE id = 1', 50, 'main.index')
+    recorder.record('SELECT a FROM t WHERE id = 2', 30, 'main.index')
+    recorder.record('SELECT b FROM t', 20, 'main.index')
+    recorder.record('SELECT c FROM t', 100, 'main.index')
+
+    rows = recorder.top()
+    assert [row['fingerprint'] for row in rows] == [
+        'SELECT c FROM t', 'SELECT a FROM t WHERE id = ?']
+    assert rows[1]['calls'] == 2
+    assert rows[1]['mean_ms'] == 40
+
+
+def test_recorder_dumps_outside_record(tmp_path):
+    """
+    GIVEN a recorder with a dump directory and a long dump interval
+    WHEN a slow statement is recorded
+    THEN nothing is written by the recording thread
+    AND a dump writes the table that load_dumps reads back
+    """
+    recorder = SlowQueryRecorder(threshold_ms=10, dump_dir=str(tmp_path),
+                                 dump_interval=3600)
+    recorder.record('SELECT a FROM t WHERE id = 1', 50, 'main.index')
+    assert list(tmp_path.iterdir()) == []
+
+    recorder.dump()
+    rows = load_dumps(str(tmp_path))
+    assert [(row['fingerprint'], row['calls']) for row in rows] == [
+        ('SELECT a FROM t WHERE id = ?', 1)]
+
+
+def test_exited_workers_drop_out_of_dumps(tmp_path):
+    """
+    GIVEN a worker's dump and a stale dump left by a killed worker
+    WHEN the dumps are merged, and the worker then exits
+    THEN the stale dump is removed instead of merged
+    AND the exiting worker removes its dump and writes no more
+    """
+    recorder = SlowQueryRecorder(threshold_ms=10, dump_dir=str(tmp_path),
+                                 dump_interval=3600)
+    recorder.record('SELECT a FROM t', 50)
+    recorder.dump()
+    killed = tmp_path / 'slow_queries-1.json'
+    killed.write_text('[{"fingerprint": "SELECT b FROM t", "endpoint": "-", '
+                      '"calls": 9, "total_ms": 900.0, "max_ms": 100.0}]')
+    old = time.time() - 3600
+    os.utime(killed, (old, old))
+
+    rows = load_dumps(str(tmp_path), stale_after=60)
+    assert [row['fingerprint'] for row in rows] == ['SELECT a FROM t']
+    assert not killed.exists()
+
+    recorder.close()
+    recorder.dump()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_slow_queries_command_without_dump_dir(app):
+    """
+    GIVEN an app without SLOW_QUERY_DUMP_DIR
+    WHEN the slow-queries command is run
+    THEN it fails with a message instead of a traceback
+    """
+    result = app.test_cli_runner().invoke(slow_queries)
+    assert result.exit_code == 1
+    assert 'SLOW_QUERY_DUMP_DIR is not set' in result.output
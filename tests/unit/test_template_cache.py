@@ -0,0 +1,30 @@
+from flask import Flask
+
+from app.utils.template_cache import init_template_cache, precompile_templates
+
+
+def _app(tmp_path):
+    app = Flask(__name__, template_folder=str(tmp_path / 'templates'))
+    app.config['TEMPLATE_CACHE_DIR'] = str(tmp_path / 'cache')
+    init_template_cache(app)
+    return app
+
+
+def test_precompiled_templates_are_loaded_from_the_cache(tmp_path):
+    """
+    GIVEN templates precompiled into the bytecode cache
+    WHEN another application loads them
+    THEN they are read from the cache instead of compiled again
+    """
+    (tmp_path / 'templates').mkdir()
+    (tmp_path / 'templates' / 'page.html').write_text('Hello {{ name }}')
+    assert precompile_templates(_app(tmp_path)) == ['page.html']
+    assert len(list((tmp_path / 'cache').iterdir())) == 1
+
+    app = _app(tmp_path)
+    compiled = []
+    app.jinja_env.compile = lambda *args, **kwargs: compiled.append(args)
+    template = app.jinja_env.get_template('page.html')
+
+    assert template.render(name='you') == 'Hello you'
+    assert compiled == []